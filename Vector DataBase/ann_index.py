@@ -0,0 +1,583 @@
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+import os
+import threading
+import time
+import logging
+
+from scoring_engine import AspectScoringEngine, top_k_rows
+
+# Approximate nearest neighbor libraries are optional: only needed for large catalogs
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+# Catalogs below this size are searched exactly; brute force is already fast there
+EXACT_SEARCH_MAX_MOVIES = 100000
+
+MANIFEST_FILE = "manifest.json"
+
+
+class ExactIndex:
+    """Brute-force inner product search over an in-memory matrix."""
+
+    backend = "exact"
+
+    def __init__(self, vectors: np.ndarray, block_size: int = 4096):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.block_size = block_size
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def search(self, queries: np.ndarray, k: int,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k vectors by inner product for each query.
+
+        Args:
+            queries: ``(queries, dim)`` query vectors
+            k: Number of results per query
+            allowed: Boolean mask of the rows that may be returned (all if omitted)
+
+        Returns:
+            Tuple of ``(queries, k)`` row positions and scores, best first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        rows = np.flatnonzero(allowed) if allowed is not None else None
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        if len(vectors) == 0:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+
+        ids_blocks, score_blocks = [], []
+        for start_idx in range(0, len(queries), self.block_size):
+            ids, scores = top_k_rows(queries[start_idx:start_idx + self.block_size] @ vectors.T, k)
+            ids_blocks.append(ids if rows is None else rows[ids])
+            score_blocks.append(scores)
+        return np.vstack(ids_blocks), np.vstack(score_blocks)
+
+    def save(self, path: str) -> None:
+        # Through a file object, so np.save keeps the path as given
+        with open(path, "wb") as f:
+            np.save(f, self.vectors)
+
+    @classmethod
+    def load(cls, path: str, **params) -> "ExactIndex":
+        return cls(np.load(path, mmap_mode="r"))
+
+
+class HNSWIndex:
+    """
+    Hierarchical navigable small world graph index (hnswlib).
+
+    ``M`` and ``ef_construction`` trade build time and memory for graph quality;
+    ``ef_search`` trades query latency for recall and can be changed at any time.
+    Searches for more than ``ef_search`` results raise ``ef`` to k for their
+    duration; they run one at a time so concurrent searches never see an ``ef``
+    below their own k (the others search with at least ``ef_search``).
+    """
+
+    backend = "hnsw"
+
+    def __init__(self, vectors: Optional[np.ndarray] = None,
+                 M: int = 16,
+                 ef_construction: int = 200,
+                 ef_search: int = 64,
+                 num_threads: int = -1,
+                 index: Any = None):
+        if hnswlib is None:
+            raise ImportError("The 'hnsw' index backend requires hnswlib (pip install hnswlib)")
+
+        self.num_threads = num_threads
+        self._ef_lock = threading.Lock()
+        if index is None:
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+            index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+            index.init_index(max_elements=vectors.shape[0], ef_construction=ef_construction, M=M)
+            index.add_items(vectors, np.arange(vectors.shape[0]), num_threads=num_threads)
+        self.index = index
+        self.set_ef(ef_search)
+
+    def __len__(self) -> int:
+        return self.index.get_current_count()
+
+    def set_ef(self, ef_search: int) -> None:
+        with self._ef_lock:
+            self.ef_search = ef_search
+            self.index.set_ef(ef_search)
+
+    def search(self, queries: np.ndarray, k: int,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self) if allowed is None else int(allowed.sum()))
+        if k == 0:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+        # The graph is traversed as usual; disallowed nodes are only kept out of the results
+        search_filter = (lambda label: bool(allowed[label])) if allowed is not None else None
+        # The candidate list must be at least as long as the result list
+        if k > self.ef_search:
+            with self._ef_lock:
+                self.index.set_ef(k)
+                try:
+                    labels, distances = self._knn_query(queries, k, search_filter)
+                finally:
+                    self.index.set_ef(self.ef_search)
+        else:
+            labels, distances = self._knn_query(queries, k, search_filter)
+        # hnswlib reports inner product as the distance 1 - ip
+        return labels.astype(np.int64), (1.0 - distances).astype(np.float32)
+
+    def _knn_query(self, queries: np.ndarray, k: int, search_filter: Optional[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        try:
+            return self.index.knn_query(queries, k=k, num_threads=self.num_threads, filter=search_filter)
+        except RuntimeError:
+            # A filtered search that reached fewer than k allowed nodes cannot fill its results
+            return (np.full((len(queries), k), -1, dtype=np.int64),
+                    np.full((len(queries), k), np.inf, dtype=np.float32))
+
+    def save(self, path: str) -> None:
+        self.index.save_index(path)
+
+    @classmethod
+    def load(cls, path: str, dim: int, ef_search: int = 64, num_threads: int = -1, **params) -> "HNSWIndex":
+        if hnswlib is None:
+            raise ImportError("The 'hnsw' index backend requires hnswlib (pip install hnswlib)")
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.load_index(path)
+        return cls(ef_search=ef_search, num_threads=num_threads, index=index)
+
+
+class IVFIndex:
+    """
+    Inverted file index with exact inner products inside each list (faiss).
+
+    ``nlist`` is the number of k-means clusters (default about 4 * sqrt(movies));
+    ``nprobe`` is the number of clusters scanned per query.
+    """
+
+    backend = "ivf"
+
+    def __init__(self, vectors: Optional[np.ndarray] = None,
+                 nlist: Optional[int] = None,
+                 nprobe: int = 16,
+                 train_size: Optional[int] = None,
+                 seed: int = 0,
+                 index: Any = None):
+        if faiss is None:
+            raise ImportError("The 'ivf' index backend requires faiss (pip install faiss-cpu)")
+
+        if index is None:
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+            num_vectors, dim = vectors.shape
+            nlist = nlist or max(1, int(4 * np.sqrt(num_vectors)))
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+
+            # k-means needs a few dozen points per cluster, not the whole catalog
+            train_size = min(num_vectors, train_size or 64 * nlist)
+            sample = np.random.default_rng(seed).choice(num_vectors, train_size, replace=False)
+            index.train(vectors[np.sort(sample)])
+            index.add(vectors)
+        self.index = index
+        self.set_nprobe(nprobe)
+
+    def __len__(self) -> int:
+        return self.index.ntotal
+
+    def set_nprobe(self, nprobe: int) -> None:
+        self.nprobe = nprobe
+        self.index.nprobe = nprobe
+
+    def search(self, queries: np.ndarray, k: int,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        if allowed is None:
+            scores, labels = self.index.search(queries, min(k, len(self)))
+        else:
+            k = min(k, int(allowed.sum()))
+            if k == 0:
+                return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+            # Lists are scanned as usual; the selector keeps disallowed ids out of the results
+            selector = faiss.IDSelectorBatch(np.flatnonzero(allowed).astype(np.int64))
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe)
+            scores, labels = self.index.search(queries, k, params=params)
+        # Lists scanned by a query can hold fewer than k vectors; faiss pads with -1
+        scores[labels < 0] = -np.inf
+        return labels.astype(np.int64), scores
+
+    def save(self, path: str) -> None:
+        faiss.write_index(self.index, path)
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = 16, **params) -> "IVFIndex":
+        if faiss is None:
+            raise ImportError("The 'ivf' index backend requires faiss (pip install faiss-cpu)")
+        return cls(nprobe=nprobe, index=faiss.read_index(path))
+
+
+INDEX_BACKENDS = {
+    "exact": ExactIndex,
+    "hnsw": HNSWIndex,
+    "ivf": IVFIndex
+}
+
+# Keyword arguments that only matter at query time and may differ on load
+SEARCH_PARAMS = {"ef_search", "nprobe", "num_threads", "rescore_factor"}
+
+# Aspects indexed by default: one vector per movie, the other aspects are rescored by the engine
+DEFAULT_INDEX_ASPECTS = ["overall"]
+
+# Candidates retrieved per result when weighted aspects outside the index are rescored
+RESCORE_FACTOR = 4
+
+
+def resolve_backend(backend: str, num_movies: int) -> str:
+    """
+    Pick a concrete backend name.
+
+    "auto" searches exactly up to EXACT_SEARCH_MAX_MOVIES movies, then uses
+    whichever approximate library is installed (hnswlib first, then faiss).
+    """
+    if backend != "auto":
+        if backend not in INDEX_BACKENDS:
+            raise ValueError(f"Unknown index backend '{backend}', expected one of {list(INDEX_BACKENDS)} or 'auto'")
+        return backend
+
+    if num_movies <= EXACT_SEARCH_MAX_MOVIES:
+        return "exact"
+    if hnswlib is not None:
+        return "hnsw"
+    if faiss is not None:
+        return "ivf"
+    logger.warning(f"No ANN library installed, searching {num_movies} movies exactly")
+    return "exact"
+
+
+class AspectAnnIndex:
+    """
+    Nearest neighbor index over the aspect embeddings of every movie.
+
+    Each movie is indexed as the concatenation of its normalized vectors of the
+    indexed aspects, and a query concatenates its vectors of those aspects
+    scaled by the aspect weights, so the inner product with a movie is the
+    engine's blended score ``sum(w_a * cos_a)``. By default only "overall" is
+    indexed (dim floats per movie): a weighting that uses other aspects
+    retrieves ``rescore_factor`` times more candidates by its indexed aspects and
+    ranks them exactly with the engine. Indexing every aspect (``aspects``)
+    makes any weighting a single index search, at aspects x dim floats per movie.
+    """
+
+    def __init__(self, engine: AspectScoringEngine,
+                 backend: str = "auto",
+                 aspects: Optional[List[str]] = None,
+                 index: Any = None,
+                 rescore_factor: int = RESCORE_FACTOR,
+                 **params):
+        """
+        Build the index.
+
+        Args:
+            engine: Scoring engine holding the aspect matrices
+            backend: "exact", "hnsw", "ivf" or "auto"
+            aspects: Aspects to index (DEFAULT_INDEX_ASPECTS if omitted)
+            index: Already built backend index (used when loading)
+            rescore_factor: Candidates retrieved per result for weightings with unindexed aspects
+            params: Build and search parameters of the backend, e.g. M, ef_construction,
+                ef_search for "hnsw" or nlist, nprobe for "ivf"
+        """
+        self.engine = engine
+        self.aspects = list(aspects or DEFAULT_INDEX_ASPECTS)
+        self.positions = np.array([engine.aspect_positions[a] for a in self.aspects], dtype=np.int64)
+        self.rescore_factor = rescore_factor
+        self.params = params
+
+        if index is None:
+            backend = resolve_backend(backend, engine.num_movies)
+            start_time = time.time()
+            vectors = np.hstack([engine.aspect_vectors(a) for a in self.positions])
+            index = INDEX_BACKENDS[backend](vectors, **params)
+            logger.info(f"Built {backend} index over {engine.num_movies} movies x {len(self.aspects)} aspects "
+                        f"in {time.time() - start_time:.2f}s")
+        self.index = index
+
+    @property
+    def backend(self) -> str:
+        return self.index.backend
+
+    def matches(self, backend: str, aspects: Optional[List[str]] = None, **params) -> bool:
+        """Whether the index was built with this backend, aspects and build parameters (search parameters may differ)."""
+        def build_params(values: Dict[str, Any]) -> Dict[str, Any]:
+            return {key: value for key, value in values.items() if key not in SEARCH_PARAMS}
+
+        return (self.backend == backend and self.aspects == list(aspects or DEFAULT_INDEX_ASPECTS)
+                and build_params(self.params) == build_params(params))
+
+    def is_exact_for(self, aspect_weights: Dict[str, float]) -> bool:
+        """Whether every weighted aspect is indexed, so index scores are the blended scores."""
+        weights = self.engine.weight_vector(aspect_weights)
+        return all(a in self.aspects for a, w in zip(self.engine.aspects, weights) if w != 0)
+
+    def query_vectors(self, query_vectors: np.ndarray, aspect_weights: Dict[str, float]) -> np.ndarray:
+        """
+        Concatenated weighted query for ``(aspects, dim)`` or ``(queries, aspects, dim)`` engine-aligned vectors.
+
+        Aspects outside the index are dropped; a weighting of unindexed aspects
+        only queries the indexed ones with equal weights.
+        """
+        weights = self.engine.weight_vector(aspect_weights)[self.positions]
+        if not weights.any():
+            weights = np.ones(len(self.positions), dtype=np.float32)
+
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        batched = query_vectors.ndim == 3
+        if not batched:
+            query_vectors = query_vectors[None]
+        weighted = query_vectors[:, self.positions, :] * weights[None, :, None]
+        flat = weighted.reshape(len(query_vectors), -1)
+        return flat if batched else flat[0]
+
+    def _rescore(self, query_vectors: np.ndarray, ids: np.ndarray,
+                 aspect_weights: Dict[str, float]) -> np.ndarray:
+        """Exact blended scores of ``(queries, candidates)`` retrieved ids (-inf for padding)."""
+        weights = self.engine.weight_vector(aspect_weights)
+        found = ids >= 0
+        rows = np.where(found, ids, 0)
+        scores = np.zeros(ids.shape, dtype=np.float32)
+        for a, weight in enumerate(weights):
+            if weight != 0:
+                vectors = self.engine.aspect_vectors(a, rows.ravel()).reshape(ids.shape + (-1,))
+                scores += weight * np.einsum("qcd,qd->qc", vectors, query_vectors[:, a])
+        scores[~found] = -np.inf
+        return scores
+
+    def search(self, query_vectors: np.ndarray, aspect_weights: Dict[str, float], k: int,
+               exclude: Optional[Sequence[int]] = None,
+               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k movies for blended aspect queries.
+
+        Args:
+            query_vectors: Normalized ``(aspects, dim)`` query, or ``(queries, aspects, dim)`` batch
+            aspect_weights: Weights per aspect
+            k: Number of results per query
+            exclude: Row positions to leave out of every result list
+            mask: Boolean mask of the movies that may be returned (see ``_filtered_search``)
+
+        Returns:
+            Tuple of ``(queries, k)`` row positions and blended scores, best first
+            (padded with -1 / -inf where fewer than k movies were found)
+        """
+        if mask is not None:
+            allowed = np.array(mask, dtype=bool)
+            if exclude is not None and len(exclude):
+                allowed[np.asarray(exclude, dtype=np.int64)] = False
+            return self._filtered_search(query_vectors, aspect_weights, k, allowed)
+
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        batch = query_vectors if query_vectors.ndim == 3 else query_vectors[None]
+        exclude = np.asarray(exclude if exclude is not None else [], dtype=np.int64)
+
+        ids, scores = self._index_search(batch, aspect_weights, k + len(exclude))
+        keep = np.isfinite(scores) & (ids >= 0)
+        if len(exclude):
+            keep &= ~np.isin(ids, exclude)
+
+        # Move kept entries to the front of each row, preserving their order
+        order = np.argsort(~keep, axis=1, kind="stable")[:, :k]
+        ids, scores = np.take_along_axis(ids, order, axis=1), np.take_along_axis(scores, order, axis=1)
+        missing = ~np.take_along_axis(keep, order, axis=1)
+        ids[missing], scores[missing] = -1, -np.inf
+        return ids, scores
+
+    def _index_search(self, batch: np.ndarray, aspect_weights: Dict[str, float], k: int,
+                      allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Backend search of ``(queries, aspects, dim)`` queries, rescored exactly if unindexed aspects are weighted."""
+        queries = self.query_vectors(batch, aspect_weights)
+        if self.is_exact_for(aspect_weights):
+            return self.index.search(queries, k, allowed=allowed)
+
+        ids, scores = self.index.search(queries, k * self.rescore_factor, allowed=allowed)
+        if ids.shape[1] == 0:
+            return ids, scores
+        top, scores = top_k_rows(self._rescore(batch, ids, aspect_weights), k)
+        return np.take_along_axis(ids, top, axis=1), scores
+
+    def _filtered_search(self, query_vectors: np.ndarray, aspect_weights: Dict[str, float], k: int,
+                         allowed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k among the allowed movies only, always filling k results when k movies are allowed.
+
+        Selective filters (at most EXACT_SEARCH_MAX_MOVIES allowed movies) are
+        ranked exactly by the engine over the allowed rows alone. Broader ones are
+        pushed into the backend search (hnswlib filter, faiss ID selector), and any
+        query that still comes back short is ranked exactly over the allowed rows.
+        """
+        query_vectors = np.asarray(query_vectors, dtype=np.float32)
+        batch = query_vectors if query_vectors.ndim == 3 else query_vectors[None]
+        candidate_rows = np.flatnonzero(allowed)
+        expected = min(k, len(candidate_rows))
+
+        if len(candidate_rows) <= EXACT_SEARCH_MAX_MOVIES:
+            ids, scores = self.engine.search_batch(batch, k, aspect_weights, candidate_rows=candidate_rows)
+        else:
+            ids, scores = self._index_search(batch, aspect_weights, k, allowed)
+            short = np.flatnonzero(((ids >= 0) & np.isfinite(scores)).sum(axis=1) < expected)
+            if len(short):
+                logger.info(f"Filtered index search filled {len(batch) - len(short)}/{len(batch)} queries, "
+                            f"ranking the rest exactly")
+                ids[short], scores[short] = self.engine.search_batch(batch[short], k, aspect_weights,
+                                                                     candidate_rows=candidate_rows)
+
+        # Pad to k columns, as unfiltered searches are
+        padded_ids = np.full((len(batch), k), -1, dtype=np.int64)
+        padded_scores = np.full((len(batch), k), -np.inf, dtype=np.float32)
+        padded_ids[:, :ids.shape[1]], padded_scores[:, :ids.shape[1]] = ids, scores
+        padded_ids[~np.isfinite(padded_scores)] = -1
+        return padded_ids, padded_scores
+
+    def similar_to_row(self, row: int, k: int, aspect_weights: Dict[str, float],
+                       exclude: Optional[Sequence[int]] = None,
+                       mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Same contract as ``AspectScoringEngine.similar_to_row``, with candidates from the index.
+
+        The returned scores are recomputed exactly for the retrieved movies.
+        """
+        excluded = [row] + (list(exclude) if exclude is not None else [])
+        ids, _ = self.search(self.engine.row_vectors(row), aspect_weights, k, exclude=excluded, mask=mask)
+        ids = ids[0][ids[0] >= 0]
+        weighted = self.engine.weighted_scores_for(row, ids, aspect_weights)
+        scores = weighted.sum(axis=0)
+        order = np.argsort(-scores, kind="stable")
+        return ids[order], scores[order], weighted[:, order]
+
+    def save(self, path: str, data_hash: str) -> None:
+        """Persist the backend index with a manifest tying it to the embedding data."""
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+        # Written aside and swapped in, so hard-linked copies of the old file stay intact
+        index_path = os.path.join(path, f"index.{self.backend}")
+        self.index.save(f"{index_path}.tmp")
+        os.replace(f"{index_path}.tmp", index_path)
+        manifest = {
+            "backend": self.backend,
+            "aspects": self.aspects,
+            "rescore_factor": self.rescore_factor,
+            "num_rows": self.engine.num_movies,
+            "dimension": self.engine.dim * len(self.aspects),
+            "data_hash": data_hash,
+            "params": self.params,
+            "created_at": time.time()
+        }
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, engine: AspectScoringEngine, data_hash: str,
+             **search_params) -> Optional["AspectAnnIndex"]:
+        """
+        Open a persisted index if it was built from the same embedding data.
+
+        Args:
+            search_params: Query-time parameters overriding the stored ones (ef_search, nprobe, rescore_factor)
+
+        Returns:
+            The index, or None if it is missing or stale
+        """
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get("data_hash") != data_hash or manifest.get("num_rows") != engine.num_movies:
+            return None
+
+        backend = manifest["backend"]
+        params = {**manifest["params"], **search_params}
+        rescore_factor = params.pop("rescore_factor", manifest.get("rescore_factor", RESCORE_FACTOR))
+        load_params = {key: value for key, value in params.items() if key in SEARCH_PARAMS}
+        index = INDEX_BACKENDS[backend].load(
+            os.path.join(path, f"index.{backend}"), dim=manifest["dimension"], **load_params
+        )
+        return cls(engine, backend, aspects=manifest["aspects"], index=index, rescore_factor=rescore_factor,
+                   **params)
+
+
+def recall_report(engine: AspectScoringEngine,
+                  configs: List[Dict[str, Any]],
+                  aspect_weights: Optional[Dict[str, float]] = None,
+                  k: int = 10,
+                  num_queries: int = 200,
+                  seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Recall@k and latency of index configurations against exact engine search.
+
+    Queries are randomly drawn catalog movies, ranked against the rest of the
+    catalog exactly as ``hybrid_content_based_search`` does.
+
+    Args:
+        engine: Scoring engine providing the ground truth
+        configs: Index configurations, e.g. ``{"backend": "hnsw", "M": 32, "ef_search": 128}``
+        aspect_weights: Query weighting (hybrid search defaults if omitted)
+        k: Result list length
+        num_queries: Number of sampled query movies
+        seed: Seed of the query sample
+
+    Returns:
+        One row per configuration (the exact engine first) with build time, recall@k
+        and p50/p95/p99 latency in milliseconds
+    """
+    if aspect_weights is None:
+        aspect_weights = {"overall": 0.4, "genre": 0.3, "plot": 0.2, "cast": 0.1}
+    rows = np.random.default_rng(seed).choice(engine.num_movies, min(num_queries, engine.num_movies), replace=False)
+
+    def measure(search_fn) -> Tuple[List[np.ndarray], np.ndarray]:
+        results, latencies = [], []
+        for row in rows:
+            start_time = time.perf_counter()
+            results.append(search_fn(row)[0])
+            latencies.append((time.perf_counter() - start_time) * 1000)
+        return results, np.percentile(latencies, [50, 95, 99])
+
+    truth, exact_latency = measure(lambda row: engine.similar_to_row(row, k, aspect_weights))
+    report = [{
+        "backend": "engine",
+        "params": {},
+        "build_seconds": 0.0,
+        f"recall@{k}": 1.0,
+        "p50_ms": exact_latency[0], "p95_ms": exact_latency[1], "p99_ms": exact_latency[2]
+    }]
+
+    for config in configs:
+        params = dict(config)
+        backend = params.pop("backend", "auto")
+        start_time = time.time()
+        index = AspectAnnIndex(engine, backend, **params)
+        build_seconds = time.time() - start_time
+
+        found, latency = measure(lambda row: index.similar_to_row(row, k, aspect_weights))
+        recall = np.mean([len(np.intersect1d(t, f)) / max(len(t), 1) for t, f in zip(truth, found)])
+        report.append({
+            "backend": index.backend,
+            "params": params,
+            "build_seconds": build_seconds,
+            f"recall@{k}": float(recall),
+            "p50_ms": latency[0], "p95_ms": latency[1], "p99_ms": latency[2]
+        })
+        logger.info(f"{index.backend} {params}: recall@{k}={recall:.3f}, "
+                    f"p50={latency[0]:.2f}ms, p99={latency[2]:.2f}ms")
+
+    return [{key: float(value) if isinstance(value, np.floating) else value for key, value in row.items()}
+            for row in report]
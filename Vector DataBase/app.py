@@ -104,7 +104,8 @@ def get_recommender():
     # Default paths - modify as needed
     data_path = "Data/imdb_top_1000.csv"  # Path to your IMDb dataset
     db_path = "chroma_db_movies"  # Path to store ChromaDB
-    cache_file = "movie_embeddings_cache.npz"  # Embedding cache file
+    embedding_store_path = "movie_embeddings_store"  # Memory-mapped embedding store
+    snapshot_path = "movie_snapshot"  # Cold-start snapshot of the preprocessed catalog and indexes
     
     # Check if the data file exists, otherwise show a file uploader
     if not os.path.exists(data_path):
@@ -116,8 +117,12 @@ def get_recommender():
             data_path=data_path,
             db_path=db_path,
             use_cached_embeddings=True,
-            cache_file=cache_file
+            embedding_store_path=embedding_store_path,
+            snapshot_path=snapshot_path,
+            reload_interval=10.0  # Pick up edits to the dataset without restarting the app
         )
+        # Bring the ChromaDB collections in line with the dataset; reloads keep them in sync
+        recommender.sync_vector_db()
         return recommender
     except Exception as e:
         st.error(f"Error initializing recommender: {e}")
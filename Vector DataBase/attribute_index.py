@@ -0,0 +1,201 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Number of set bits in every byte value, for NumPy versions without bitwise_count
+_BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    """Number of set bits in each element of a uint64 array."""
+    bits = np.ascontiguousarray(bits, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).astype(np.int64)
+    return _BYTE_POPCOUNT[bits.view(np.uint8).reshape(-1, 8)].sum(axis=1).astype(np.int64)
+
+
+def parse_runtime(runtimes: pd.Series) -> np.ndarray:
+    """Minutes from runtime strings like "142 min" (0 where unknown)."""
+    minutes = pd.to_numeric(runtimes.astype(str).str.extract(r"(\d+)", expand=False), errors="coerce")
+    return minutes.fillna(0).to_numpy(dtype=np.int32)
+
+
+class AttributeIndex:
+    """
+    Columnar index of the filterable movie attributes.
+
+    Genre sets are encoded as one uint64 bitmask per movie, and rating, year,
+    votes and runtime are kept as contiguous arrays, so any combination of
+    filters is a vectorized boolean mask over the catalog. Directors and stars
+    are integer-coded against a vocabulary so they can be counted with bincount.
+    """
+
+    MAX_GENRES = 64
+
+    def __init__(self,
+                 genres: Iterable[str],
+                 ratings: np.ndarray,
+                 years: np.ndarray,
+                 votes: np.ndarray,
+                 runtimes: np.ndarray,
+                 directors: Optional[Iterable[str]] = None,
+                 stars: Optional[np.ndarray] = None):
+        """
+        Build the index.
+
+        Args:
+            genres: Comma separated genre string per movie, e.g. "Crime, Drama"
+            ratings: IMDB rating per movie
+            years: Release year per movie
+            votes: Number of votes per movie
+            runtimes: Runtime in minutes per movie
+            directors: Director per movie
+            stars: ``(movies, n_stars)`` array of star names
+        """
+        genre_lists = [[g for g in str(genre).split(", ") if g] for genre in genres]
+        self.genre_vocab: List[str] = sorted({g for genre_list in genre_lists for g in genre_list})
+        if len(self.genre_vocab) > self.MAX_GENRES:
+            raise ValueError(f"{len(self.genre_vocab)} genres do not fit in a {self.MAX_GENRES}-bit mask")
+        self.genre_bits: Dict[str, int] = {g: 1 << i for i, g in enumerate(self.genre_vocab)}
+
+        self.genre_masks = np.array(
+            [sum(self.genre_bits[g] for g in set(genre_list)) for genre_list in genre_lists],
+            dtype=np.uint64
+        )
+        self.genre_counts = popcount(self.genre_masks)
+
+        # Genre codes in listed order, padded with -1
+        self.genre_codes = np.full((len(genre_lists), max(map(len, genre_lists), default=0)), -1, dtype=np.int16)
+        genre_positions = {g: i for i, g in enumerate(self.genre_vocab)}
+        for row, genre_list in enumerate(genre_lists):
+            self.genre_codes[row, :len(genre_list)] = [genre_positions[g] for g in genre_list]
+
+        self.ratings = np.ascontiguousarray(ratings, dtype=np.float32)
+        self.years = np.ascontiguousarray(years, dtype=np.int32)
+        self.votes = np.ascontiguousarray(votes, dtype=np.int64)
+        self.runtimes = np.ascontiguousarray(runtimes, dtype=np.int32)
+        self.decades = (self.years // 10) * 10
+
+        # Integer codes into sorted vocabularies (-1 where unknown)
+        self.director_codes, self.director_vocab = self._encode(
+            np.asarray(list(directors) if directors is not None else ["Unknown"] * len(self), dtype=object)
+        )
+        self.star_codes, self.star_vocab = self._encode(
+            np.asarray(stars if stars is not None else np.full((len(self), 0), "Unknown"), dtype=object)
+        )
+
+        # A star listed twice in one movie counts once
+        self.star_distinct = np.ones(self.star_codes.shape, dtype=bool)
+        for j in range(1, self.star_codes.shape[1]):
+            self.star_distinct[:, j] = ~(self.star_codes[:, :j] == self.star_codes[:, [j]]).any(axis=1)
+        self.distinct_star_counts = self.star_distinct.sum(axis=1)
+
+        logger.info(f"Attribute index ready: {len(self)} movies, {len(self.genre_vocab)} genres")
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "AttributeIndex":
+        return cls(
+            df["Genre"].tolist(),
+            df["IMDB_Rating"].to_numpy(),
+            df["Released_Year"].to_numpy(),
+            df["No_of_Votes"].to_numpy(),
+            parse_runtime(df["Runtime"]),
+            df["Director"].tolist(),
+            df[["Star1", "Star2", "Star3", "Star4"]].to_numpy()
+        )
+
+    @staticmethod
+    def _encode(values: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+        """Integer codes of a name array and the sorted vocabulary; empty and "Unknown" names get -1."""
+        codes, vocab = pd.factorize(values.ravel(), sort=True)
+        unknown = np.array([name in ("", "Unknown") for name in vocab], dtype=bool)
+        # Renumber the known names consecutively so codes index the returned vocabulary
+        remap = np.full(len(vocab) + 1, -1, dtype=np.int32)
+        remap[:-1][~unknown] = np.arange((~unknown).sum(), dtype=np.int32)
+        return remap[codes].reshape(values.shape), [str(name) for name in vocab[~unknown]]
+
+    def __len__(self) -> int:
+        return len(self.genre_masks)
+
+    def genre_mask(self, genres: Iterable[str]) -> np.uint64:
+        """Bitmask of a set of genres (unknown genres are ignored)."""
+        return np.uint64(sum(self.genre_bits.get(g, 0) for g in set(genres)))
+
+    def genre_overlap(self, genres: Iterable[str]) -> np.ndarray:
+        """Number of the given genres each movie has."""
+        return popcount(self.genre_masks & self.genre_mask(genres))
+
+    def _codes(self, vocab: List[str], names: Iterable[str]) -> List[int]:
+        """Vocabulary codes of the known names."""
+        positions = {name: i for i, name in enumerate(vocab)}
+        return [positions[name] for name in set(names) if name in positions]
+
+    def star_overlap(self, names: Iterable[str]) -> np.ndarray:
+        """Number of distinct given stars in each movie's cast."""
+        codes = self._codes(self.star_vocab, names)
+        return (np.isin(self.star_codes, codes) & self.star_distinct).sum(axis=1)
+
+    def filter(self,
+               genres_any: Optional[Iterable[str]] = None,
+               genres_all: Optional[Iterable[str]] = None,
+               min_rating: Optional[float] = None,
+               max_rating: Optional[float] = None,
+               min_year: Optional[int] = None,
+               max_year: Optional[int] = None,
+               min_votes: Optional[int] = None,
+               max_votes: Optional[int] = None,
+               min_runtime: Optional[int] = None,
+               max_runtime: Optional[int] = None,
+               directors: Optional[Iterable[str]] = None,
+               actors: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Boolean mask of movies matching every given condition.
+
+        Args:
+            genres_any: Movie must have at least one of these genres
+            genres_all: Movie must have all of these genres
+            min_rating / max_rating: Inclusive IMDB rating range
+            min_year / max_year: Inclusive release year range
+            min_votes / max_votes: Inclusive number of votes range
+            min_runtime / max_runtime: Inclusive runtime range in minutes
+            directors: Movie must be directed by one of these directors
+            actors: Movie must star at least one of these actors
+
+        Returns:
+            Boolean array with one entry per movie
+        """
+        mask = np.ones(len(self), dtype=bool)
+
+        if genres_any:
+            mask &= (self.genre_masks & self.genre_mask(genres_any)) != 0
+        if genres_all:
+            genres_all = set(genres_all)
+            if not genres_all.issubset(self.genre_bits):
+                return np.zeros(len(self), dtype=bool)
+            required = self.genre_mask(genres_all)
+            mask &= (self.genre_masks & required) == required
+        if min_rating is not None:
+            mask &= self.ratings >= min_rating
+        if max_rating is not None:
+            mask &= self.ratings <= max_rating
+        if min_year is not None:
+            mask &= self.years >= min_year
+        if max_year is not None:
+            mask &= self.years <= max_year
+        if min_votes is not None:
+            mask &= self.votes >= min_votes
+        if max_votes is not None:
+            mask &= self.votes <= max_votes
+        if min_runtime is not None:
+            mask &= self.runtimes >= min_runtime
+        if max_runtime is not None:
+            mask &= self.runtimes <= max_runtime
+        if directors is not None:
+            mask &= np.isin(self.director_codes, self._codes(self.director_vocab, directors))
+        if actors is not None:
+            mask &= np.isin(self.star_codes, self._codes(self.star_vocab, actors)).any(axis=1)
+
+        return mask
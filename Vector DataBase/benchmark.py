@@ -0,0 +1,373 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import argparse
+import json
+import os
+import platform
+import re
+import time
+import zlib
+import logging
+
+from resource_usage import peak_rss_bytes, rss_bytes
+
+logger = logging.getLogger(__name__)
+
+# Name the stub model is registered under, so no model is ever downloaded
+STUB_MODEL_NAME = "benchmark-stub-hashing"
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+class StubEmbeddingModel:
+    """
+    Deterministic offline stand-in for a SentenceTransformer.
+
+    A text embeds as the sum of fixed random vectors of its hashed tokens, so
+    texts sharing words (genres, cast, plot vocabulary) stay similar and results
+    have a realistic structure without loading a model.
+    """
+
+    def __init__(self, dimension: int = 64, num_buckets: int = 2**16, seed: int = 0):
+        self.dimension = dimension
+        self.num_buckets = num_buckets
+        self.token_vectors = np.random.default_rng(seed).standard_normal((num_buckets, dimension)).astype(np.float32)
+        self._buckets: Dict[str, int] = {}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _bucket(self, token: str) -> int:
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            bucket = self._buckets[token] = zlib.crc32(token.encode()) % self.num_buckets
+        return bucket
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+
+        buckets, offsets = [], []
+        for text in texts:
+            offsets.append(len(buckets))
+            buckets.extend(self._bucket(token) for token in _TOKEN.findall(text.lower()))
+            # Every text gets at least its own bucket so empty texts are not zero vectors
+            buckets.append(self._bucket(f"<text:{len(text)}>"))
+
+        embeddings = np.add.reduceat(self.token_vectors[np.asarray(buckets, dtype=np.int64)],
+                                     np.asarray(offsets, dtype=np.int64), axis=0) if texts else \
+            np.empty((0, self.dimension), dtype=np.float32)
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+
+def _zipf_choice(rng: np.random.Generator, pool: np.ndarray, size: int, exponent: float = 1.0) -> np.ndarray:
+    """Sample from ``pool`` with heavy-tailed (Zipf) popularity, as credits are distributed."""
+    weights = 1.0 / np.arange(1, len(pool) + 1) ** exponent
+    return pool[rng.choice(len(pool), size=size, p=weights / weights.sum())]
+
+
+def _name_pool(rng: np.random.Generator, names: pd.Series, size: int) -> np.ndarray:
+    """
+    ``size`` person names: the observed names first (by frequency), then new
+    names combining observed first and last names.
+    """
+    observed = names[~names.isin(["", "Unknown"])].value_counts().index.to_numpy(dtype=object)
+    if size <= len(observed):
+        return observed[:size]
+
+    parts = pd.Series(observed).str.split()
+    first_names = parts.str[0].unique()
+    last_names = parts.str[-1].unique()
+    synthetic = pd.unique(pd.Series(rng.choice(first_names, 2 * size)) + " " +
+                          pd.Series(rng.choice(last_names, 2 * size)))
+    synthetic = synthetic[~np.isin(synthetic, observed)][:size - len(observed)]
+    return np.concatenate([observed, synthetic])
+
+
+def _splice(rng: np.random.Generator, texts: np.ndarray, size: int) -> List[str]:
+    """New texts from the first half of one source text and the second half of another."""
+    words = [text.split() for text in texts]
+    heads = rng.integers(len(words), size=size)
+    tails = rng.integers(len(words), size=size)
+    return [" ".join(words[h][:len(words[h]) // 2] + words[t][len(words[t]) // 2:]) for h, t in zip(heads, tails)]
+
+
+def synthesize_catalog(source: pd.DataFrame, num_movies: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Scale the IMDB catalog to ``num_movies`` rows with realistic distributions.
+
+    Genre combinations are drawn from their observed distribution, directors and
+    stars from name pools that grow with the catalog under Zipf popularity,
+    titles and overviews are spliced from two source texts, and numeric columns
+    are jittered around a random source movie.
+
+    Args:
+        source: The IMDB top 1000 DataFrame
+        num_movies: Number of movies to generate
+        seed: Random seed (the same seed always yields the same catalog)
+
+    Returns:
+        DataFrame with the columns of the source CSV
+    """
+    rng = np.random.default_rng(seed)
+    source = source.reset_index(drop=True)
+    base = source.iloc[rng.integers(len(source), size=num_movies)].reset_index(drop=True)
+    catalog = base.copy()
+
+    catalog["Genre"] = source["Genre"].to_numpy()[rng.integers(len(source), size=num_movies)]
+    catalog["Overview"] = _splice(rng, source["Overview"].astype(str).to_numpy(), num_movies)
+
+    titles = pd.Series(_splice(rng, source["Series_Title"].astype(str).to_numpy(), num_movies))
+    titles[titles == ""] = "Untitled"
+    copy_number = titles.groupby(titles).cumcount()
+    catalog["Series_Title"] = titles.where(copy_number == 0, titles + " " + (copy_number + 1).astype(str))
+
+    # About one director per 5 movies and one star per 2 credits, as in large catalogs
+    directors = _name_pool(rng, source["Director"].astype(str), max(num_movies // 5, 1))
+    catalog["Director"] = _zipf_choice(rng, directors, num_movies, exponent=0.8)
+    star_columns = ["Star1", "Star2", "Star3", "Star4"]
+    stars = _name_pool(rng, pd.concat([source[col].astype(str) for col in star_columns]), max(num_movies * 2, 4))
+    for col in star_columns:
+        catalog[col] = _zipf_choice(rng, stars, num_movies, exponent=0.8)
+
+    year = pd.to_numeric(base["Released_Year"], errors="coerce").fillna(2000)
+    catalog["Released_Year"] = np.clip(year + rng.integers(-5, 6, size=num_movies), 1920, 2025).astype(int)
+    catalog["IMDB_Rating"] = np.clip(base["IMDB_Rating"] + rng.normal(0, 0.3, num_movies), 1.0, 10.0).round(1)
+    catalog["No_of_Votes"] = np.maximum(base["No_of_Votes"] * rng.lognormal(0, 0.5, num_movies), 25).astype(int)
+    runtime = base["Runtime"].astype(str).str.extract(r"(\d+)")[0].astype(float).fillna(120)
+    catalog["Runtime"] = (np.maximum(runtime + rng.integers(-15, 16, size=num_movies), 60).astype(int)
+                          .astype(str) + " min")
+    return catalog
+
+
+def catalog_path(work_dir: str, num_movies: int, source_path: str, seed: int = 0) -> str:
+    """Path of the synthetic catalog CSV, generated on first use."""
+    path = os.path.join(work_dir, f"catalog_{num_movies}_{seed}.csv")
+    if not os.path.exists(path):
+        start_time = time.time()
+        os.makedirs(work_dir, exist_ok=True)
+        catalog = synthesize_catalog(pd.read_csv(source_path), num_movies, seed)
+        catalog.to_csv(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+        logger.info(f"Generated {num_movies} movie catalog at {path} in {time.time() - start_time:.1f}s")
+    return path
+
+
+def latency_stats(latencies_ms: List[float]) -> Dict[str, float]:
+    """Count, mean and p50/p95/p99 of latencies in milliseconds."""
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "calls": len(latencies_ms),
+        "mean_ms": float(np.mean(latencies_ms)),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(np.max(latencies_ms))
+    }
+
+
+def _time_calls(fn: Callable[[Any], Any], inputs: List[Any]) -> Dict[str, float]:
+    """Latency stats of ``fn`` over ``inputs``; the first (cold) call is reported separately."""
+    start_time = time.perf_counter()
+    fn(inputs[0])
+    first_call_ms = (time.perf_counter() - start_time) * 1000
+
+    latencies = []
+    for value in inputs:
+        start_time = time.perf_counter()
+        fn(value)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return {"first_call_ms": first_call_ms, **latency_stats(latencies)}
+
+
+def benchmark_catalog(data_path: str,
+                      work_dir: str,
+                      num_queries: int = 200,
+                      k: int = 10,
+                      history_size: int = 20,
+                      seed: int = 0,
+                      dimension: int = 64,
+                      recommender_params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Initialize a recommender on a catalog and time every public method.
+
+    Run it in a fresh process (see ``run_benchmarks``) so peak RSS belongs to this catalog.
+
+    Args:
+        data_path: Catalog CSV
+        work_dir: Directory for the recommender's stores and indexes
+        num_queries: Timed calls per method
+        k: Results per call
+        history_size: Watched movies per synthetic user
+        seed: Seed of the sampled inputs
+        dimension: Embedding dimension of the stub model
+        recommender_params: Extra ``MovieRecommender`` arguments (e.g. index_backend)
+
+    Returns:
+        Dictionary with init time, startup phases, memory, per-method latency stats and
+        per-stage pipeline timings
+    """
+    from model_registry import register_model
+    from movie_recommender import MovieRecommender
+
+    register_model(STUB_MODEL_NAME, StubEmbeddingModel(dimension))
+    params = {
+        "db_path": os.path.join(work_dir, "chroma"),
+        "embedding_store_path": os.path.join(work_dir, "embeddings"),
+        "neighbor_table_path": os.path.join(work_dir, "neighbors"),
+        "ann_index_path": os.path.join(work_dir, "ann_index"),
+        "profile_store_path": os.path.join(work_dir, "profiles.db"),
+        "encode_processes": 1,
+        **(recommender_params or {})
+    }
+
+    rss_before = rss_bytes()
+    start_time = time.perf_counter()
+    recommender = MovieRecommender(data_path=data_path, embedding_model=STUB_MODEL_NAME, **params)
+    init_seconds = time.perf_counter() - start_time
+    rss_after_init = rss_bytes()
+
+    rng = np.random.default_rng(seed)
+    titles = recommender.df["Series_Title"].to_numpy()
+    sample_titles = list(rng.choice(titles, num_queries))
+    overviews = recommender.df["Overview"].astype(str).to_numpy()
+    text_queries = [" ".join(text.split()[:6]) for text in rng.choice(overviews, num_queries)]
+    genre_vocab = recommender.attribute_index.genre_vocab
+    genre_mixes = [list(rng.choice(genre_vocab, rng.integers(1, 4), replace=False)) for _ in range(num_queries)]
+    histories = [list(rng.choice(titles, history_size)) for _ in range(num_queries)]
+    profiles = [recommender.build_user_profile(f"user-{i}", history) for i, history in enumerate(histories)]
+
+    methods = {
+        "get_similar_movies": (lambda title: recommender.get_similar_movies(title, k), sample_titles),
+        "hybrid_content_based_search": (lambda title: recommender.hybrid_content_based_search(title, k),
+                                        sample_titles),
+        "get_personalized_recommendations": (lambda profile: recommender.get_personalized_recommendations(profile, k),
+                                             profiles),
+        "get_recommendations_by_text_query": (
+            lambda query: recommender.get_recommendations_by_text_query(query, k, rerank=False), text_queries
+        ),
+        "recommend_by_genre_mix": (lambda genres: recommender.recommend_by_genre_mix(genres, k), genre_mixes),
+        "build_user_profile": (lambda history: recommender.build_user_profile("benchmark-user", history), histories)
+    }
+    if recommender.cross_encoder is not None:
+        methods["get_recommendations_by_text_query_reranked"] = (
+            lambda query: recommender.get_recommendations_by_text_query(query, k, rerank=True), text_queries
+        )
+    results = {}
+    for pipeline in recommender.pipelines.values():
+        pipeline.reset_stats()
+    for name, (fn, inputs) in methods.items():
+        results[name] = _time_calls(fn, inputs)
+        logger.info(f"{name}: p50 {results[name]['p50_ms']:.2f} ms, p99 {results[name]['p99_ms']:.2f} ms")
+
+    run = {
+        "num_movies": len(recommender.df),
+        "init_seconds": init_seconds,
+        "startup_phases": recommender.startup.phases,
+        "init_rss_delta_mb": (rss_after_init - rss_before) / 2**20,
+        "rss_mb": rss_bytes() / 2**20,
+        "peak_rss_mb": peak_rss_bytes() / 2**20,
+        "index_backend": recommender.ann_index.backend if recommender.ann_index is not None else "exact",
+        "embedding_precision": recommender.embedding_precision,
+        "methods": results,
+        "pipeline_stages": recommender.pipeline_stats()
+    }
+    if recommender.cross_encoder is not None:
+        run["reranker"] = recommender.cross_encoder.stats()
+
+    # Hot reload of the unchanged catalog: every embedding and index is reused
+    run["reload"] = recommender.reload()
+    return run
+
+
+def run_benchmarks(sizes: List[int],
+                   work_dir: str = "benchmark_data",
+                   source_path: str = "Data/imdb_top_1000.csv",
+                   seed: int = 0,
+                   **kwargs) -> Dict[str, Any]:
+    """
+    Benchmark the recommender on synthetic catalogs of several sizes.
+
+    Each size runs in its own spawned process, so init memory and peak RSS are
+    measured from a clean interpreter.
+
+    Args:
+        sizes: Catalog sizes to benchmark
+        work_dir: Directory for generated catalogs and recommender state
+        source_path: IMDB CSV the catalogs are synthesized from
+        seed: Seed of catalog generation and sampled inputs
+        **kwargs: Passed to ``benchmark_catalog``
+
+    Returns:
+        JSON-serializable report with environment details and one run per size
+    """
+    runs = []
+    context = multiprocessing.get_context("spawn")
+    for num_movies in sizes:
+        data_path = catalog_path(work_dir, num_movies, source_path, seed)
+        run_dir = os.path.join(work_dir, f"run_{num_movies}")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            run = executor.submit(benchmark_catalog, data_path, run_dir, seed=seed, **kwargs).result()
+        logger.info(f"{num_movies} movies: init {run['init_seconds']:.1f}s, peak RSS {run['peak_rss_mb']:.0f} MiB")
+        runs.append(run)
+
+    return {
+        "created_at": time.time(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "settings": {"seed": seed, **kwargs},
+        "runs": runs
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark MovieRecommender on synthetic catalogs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Catalog sizes")
+    parser.add_argument("--queries", type=int, default=200, help="Timed calls per method")
+    parser.add_argument("-k", type=int, default=10, help="Results per call")
+    parser.add_argument("--dimension", type=int, default=64, help="Stub embedding dimension")
+    parser.add_argument("--index-backend", default="auto", help="ANN backend (auto, exact, hnsw, ivf)")
+    parser.add_argument("--precision", default="float32", help="Embedding precision (float32, float16, int8)")
+    parser.add_argument("--rerank-model", default=None,
+                        help="Cross-encoder to also benchmark re-ranked text queries with (stub-cross-encoder for the stub)")
+    parser.add_argument("--rerank-top-n", type=int, default=50, help="Candidates re-ranked per text query")
+    parser.add_argument("--work-dir", default="benchmark_data", help="Generated catalogs and recommender state")
+    parser.add_argument("--source", default="Data/imdb_top_1000.csv", help="IMDB CSV to scale up")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON report path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    report = run_benchmarks(
+        args.sizes,
+        work_dir=args.work_dir,
+        source_path=args.source,
+        seed=args.seed,
+        num_queries=args.queries,
+        k=args.k,
+        dimension=args.dimension,
+        recommender_params={
+            "index_backend": args.index_backend,
+            "embedding_precision": args.precision,
+            "rerank_model": args.rerank_model,
+            "rerank_params": {"top_n": args.rerank_top_n}
+        }
+    )
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Wrote benchmark report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Matches titles written with a trailing year, e.g. "Drishyam (2015)"
+_TITLE_WITH_YEAR = re.compile(r"^(?P<title>.*\S)\s*\((?P<year>\d{4})\)$")
+
+
+def normalize_title(title: str) -> str:
+    """Case- and whitespace-insensitive form of a movie title."""
+    return " ".join(str(title).split()).casefold()
+
+
+class CatalogIndex:
+    """
+    Constant-time lookups from titles and vector DB ids to DataFrame row positions.
+
+    Duplicate titles keep every matching row, in catalog order, and can be told
+    apart by release year.
+    """
+
+    def __init__(self, titles: Iterable[str], years: Iterable[int], ids: Iterable[str]):
+        """
+        Build the index in a single pass over the catalog.
+
+        Args:
+            titles: Movie titles in row order
+            years: Release years in row order
+            ids: Vector DB ids in row order
+        """
+        self._title_rows: Dict[str, List[int]] = {}
+        self._title_year_rows: Dict[Tuple[str, int], int] = {}
+        self._id_rows: Dict[str, int] = {}
+
+        for row, (title, year, movie_id) in enumerate(zip(titles, years, ids)):
+            key = normalize_title(title)
+            self._title_rows.setdefault(key, []).append(row)
+            self._title_year_rows.setdefault((key, int(year)), row)
+            self._id_rows[str(movie_id)] = row
+
+        duplicates = sum(1 for rows in self._title_rows.values() if len(rows) > 1)
+        if duplicates:
+            logger.info(f"Catalog index: {duplicates} titles are shared by several movies")
+
+    def __len__(self) -> int:
+        return len(self._id_rows)
+
+    def find(self, title: str, year: Optional[int] = None) -> Optional[int]:
+        """
+        Row position of a movie by title.
+
+        Args:
+            title: Movie title, optionally suffixed with its year as "Title (YYYY)"
+            year: Release year used to pick between movies sharing a title
+
+        Returns:
+            Row position, or None if the title is unknown
+        """
+        key = normalize_title(title)
+        if year is None and key not in self._title_rows:
+            match = _TITLE_WITH_YEAR.match(key)
+            if match:
+                key, year = match.group("title"), int(match.group("year"))
+
+        if year is not None:
+            return self._title_year_rows.get((key, int(year)))
+
+        rows = self._title_rows.get(key)
+        return rows[0] if rows else None
+
+    def find_all(self, title: str) -> List[int]:
+        """Row positions of every movie with this title."""
+        return list(self._title_rows.get(normalize_title(title), []))
+
+    def find_many(self, titles: Iterable[str]) -> List[Optional[int]]:
+        """Row positions for several titles, None for unknown ones."""
+        return [self.find(title) for title in titles]
+
+    def row_for_id(self, movie_id: str) -> Optional[int]:
+        """Row position of a vector DB id."""
+        return self._id_rows.get(str(movie_id))
@@ -0,0 +1,147 @@
+import numpy as np
+from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ChromaDB collection holding each aspect's embeddings
+COLLECTION_NAMES = {
+    "overall": "movies",
+    "genre": "movies_genre",
+    "cast": "movies_cast",
+    "plot": "movies_plot"
+}
+
+# Metadata key under which each stored row keeps the content hash it was written with
+HASH_KEY = "content_hash"
+
+# Upsert batch size for clients that do not report their limit
+DEFAULT_BATCH_SIZE = 5000
+
+
+def metadata_hashes(metadatas: List[Dict[str, Any]]) -> List[str]:
+    """Content hash of each row's metadata."""
+    return [
+        hashlib.blake2b(json.dumps(metadata, sort_keys=True, default=str).encode("utf-8"), digest_size=16).hexdigest()
+        for metadata in metadatas
+    ]
+
+
+def content_hashes(text_hashes: np.ndarray, meta_hashes: List[str], model_name: str) -> List[str]:
+    """
+    Per-row hash of everything a collection stores: embedded text, embedding model and metadata.
+
+    Args:
+        text_hashes: Row hashes of the embedded texts (as kept by the embedding store)
+        meta_hashes: Row hashes of the metadata (see ``metadata_hashes``)
+        model_name: Embedding model, so switching models rewrites every row
+    """
+    salt = model_name.encode("utf-8")
+    return [
+        hashlib.blake2b(salt + text_hash + meta_hash.encode("ascii"), digest_size=16).hexdigest()
+        for text_hash, meta_hash in zip(np.asarray(text_hashes).tolist(), meta_hashes)
+    ]
+
+
+def max_batch_size(client: Any) -> int:
+    """Largest batch the ChromaDB client accepts in one call."""
+    try:
+        return int(client.get_max_batch_size())
+    except AttributeError:
+        return int(getattr(client, "max_batch_size", DEFAULT_BATCH_SIZE))
+
+
+def stored_hashes(collection: Any, page_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Optional[str]]:
+    """Content hash of every row in a collection, keyed by id (None for rows written without one)."""
+    hashes = {}
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+        for row_id, metadata in zip(page["ids"], page["metadatas"]):
+            hashes[row_id] = (metadata or {}).get(HASH_KEY)
+        if len(page["ids"]) < page_size:
+            return hashes
+        offset += page_size
+
+
+def sync_collection(collection: Any,
+                    ids: List[str],
+                    hashes: List[str],
+                    embeddings: np.ndarray,
+                    metadatas: List[Dict[str, Any]],
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Make a collection hold exactly the given rows.
+
+    Stored content hashes are diffed against ``hashes``: rows that are new or
+    changed are upserted, rows whose id is no longer in the catalog are deleted
+    and matching rows are left alone, so running it twice is a no-op and an
+    interrupted sync is finished by the next one.
+
+    Args:
+        collection: ChromaDB collection
+        ids: Catalog ids
+        hashes: Content hash of each row
+        embeddings: ``(rows, dim)`` embeddings
+        metadatas: Metadata of each row (without the content hash)
+        batch_size: Rows per upsert/delete call
+
+    Returns:
+        Counts of upserted, deleted and unchanged rows
+    """
+    stored = stored_hashes(collection, batch_size)
+    changed = np.array([stored.get(row_id) != row_hash for row_id, row_hash in zip(ids, hashes)], dtype=bool)
+    rows = np.flatnonzero(changed)
+    removed = list(stored.keys() - set(ids))
+
+    for start_idx in range(0, len(rows), batch_size):
+        batch_rows = rows[start_idx:start_idx + batch_size]
+        collection.upsert(
+            ids=[ids[i] for i in batch_rows],
+            embeddings=embeddings[batch_rows].tolist(),
+            metadatas=[{**metadatas[i], HASH_KEY: hashes[i]} for i in batch_rows]
+        )
+    for start_idx in range(0, len(removed), batch_size):
+        collection.delete(ids=removed[start_idx:start_idx + batch_size])
+
+    return {"upserted": len(rows), "deleted": len(removed), "unchanged": len(ids) - len(rows)}
+
+
+def sync_collections(collections: Dict[str, Any],
+                     ids: List[str],
+                     hashes: Dict[str, List[str]],
+                     embeddings: Dict[str, np.ndarray],
+                     metadatas: List[Dict[str, Any]],
+                     batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Dict[str, int]]:
+    """
+    Sync several collections concurrently (see ``sync_collection``).
+
+    Args:
+        collections: Mapping of aspect name to collection
+        ids: Catalog ids, shared by every collection
+        hashes: Mapping of aspect name to row content hashes
+        embeddings: Mapping of aspect name to a ``(rows, dim)`` matrix
+        metadatas: Metadata of each row, shared by every collection
+        batch_size: Rows per upsert/delete call
+
+    Returns:
+        Mapping of aspect name to its sync counts
+    """
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=len(collections)) as executor:
+        futures = {
+            aspect: executor.submit(sync_collection, collection, ids, hashes[aspect], embeddings[aspect],
+                                    metadatas, batch_size)
+            for aspect, collection in collections.items()
+        }
+        stats = {aspect: future.result() for aspect, future in futures.items()}
+
+    for aspect, counts in stats.items():
+        logger.info(f"Synced {aspect} collection: {counts['upserted']} upserted, "
+                    f"{counts['deleted']} deleted, {counts['unchanged']} unchanged")
+    logger.info(f"Vector database synced in {time.time() - start_time:.2f}s")
+    return stats
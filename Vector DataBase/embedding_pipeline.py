@@ -0,0 +1,95 @@
+import numpy as np
+from typing import Any, List, Optional
+import os
+import time
+import logging
+from tqdm import tqdm
+
+logger = logging.getLogger(__name__)
+
+# Below this many texts, spawning a pool (one model copy per process) costs more than it saves
+MIN_TEXTS_FOR_POOL = 10000
+
+
+def token_lengths(model: Any, texts: List[str]) -> np.ndarray:
+    """Token count of each text, capped at the model's max sequence length."""
+    tokenizer = getattr(model, "tokenizer", None)
+    if tokenizer is None:
+        # Without a tokenizer, character length is a reasonable proxy for ordering
+        return np.array([len(text) for text in texts], dtype=np.int64)
+
+    lengths = np.array(
+        [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]],
+        dtype=np.int64
+    )
+    max_length = getattr(model, "max_seq_length", None)
+    return np.minimum(lengths, max_length) if max_length else lengths
+
+
+def length_buckets(lengths: np.ndarray, num_buckets: int) -> List[np.ndarray]:
+    """Split positions, sorted by length, into buckets of similar-length texts."""
+    order = np.argsort(lengths, kind="stable")
+    return [bucket for bucket in np.array_split(order, num_buckets) if len(bucket)]
+
+
+def encode_texts(model: Any,
+                 texts: List[str],
+                 batch_size: int = 64,
+                 processes: Optional[int] = None,
+                 num_buckets: int = 32,
+                 desc: str = "Encoding") -> np.ndarray:
+    """
+    Encode texts in length buckets, fanning out over a multi-process pool.
+
+    Texts are sorted by token length and encoded bucket by bucket, so each batch
+    holds texts of similar length and little compute is spent on padding.
+
+    Args:
+        model: SentenceTransformer (or compatible) model
+        texts: Texts to encode
+        batch_size: Texts per forward pass
+        processes: Worker processes; None uses every CPU core for large jobs
+        num_buckets: Number of length buckets (also the progress granularity)
+        desc: Progress bar label
+
+    Returns:
+        ``(len(texts), dim)`` float32 matrix in the original text order
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+
+    if processes is None:
+        processes = (os.cpu_count() or 1) if len(texts) >= MIN_TEXTS_FOR_POOL else 1
+
+    start_time = time.time()
+    buckets = length_buckets(token_lengths(model, texts), min(num_buckets, len(texts)))
+    result = None
+
+    pool = None
+    if processes > 1:
+        logger.info(f"{desc}: starting encode pool with {processes} processes")
+        pool = model.start_multi_process_pool(target_devices=["cpu"] * processes)
+
+    try:
+        with tqdm(total=len(texts), desc=desc, unit="texts") as progress:
+            for bucket in buckets:
+                bucket_texts = [texts[i] for i in bucket]
+                if pool is not None:
+                    embeddings = model.encode_multi_process(bucket_texts, pool, batch_size=batch_size)
+                else:
+                    embeddings = model.encode(bucket_texts, batch_size=batch_size)
+                embeddings = np.asarray(embeddings, dtype=np.float32)
+
+                if result is None:
+                    result = np.empty((len(texts), embeddings.shape[1]), dtype=np.float32)
+                result[bucket] = embeddings
+
+                progress.update(len(bucket))
+    finally:
+        if pool is not None:
+            model.stop_multi_process_pool(pool)
+
+    elapsed = max(time.time() - start_time, 1e-9)
+    logger.info(f"{desc}: encoded {len(texts)} texts in {elapsed:.1f}s "
+                f"({len(texts) / elapsed:.0f} texts/sec, {processes} process(es))")
+    return result
@@ -0,0 +1,215 @@
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Embedded aspects and the DataFrame text column each one is generated from
+ASPECT_TEXT_COLUMNS = {
+    "overall": "movie_description",
+    "title_director": "title_director",
+    "genre": "genre_info",
+    "cast": "cast_info",
+    "plot": "plot_info"
+}
+
+MANIFEST_FILE = "manifest.json"
+
+# Row hashes are stored as fixed-width hex digests next to each aspect matrix
+ROW_HASH_DTYPE = "S32"
+
+
+def hash_text(text: str) -> str:
+    """Content hash of a single generated text."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def hash_rows(texts: Iterable[str]) -> np.ndarray:
+    """Per-row content hashes of a text column."""
+    return np.array([hash_text(text) for text in texts], dtype=ROW_HASH_DTYPE)
+
+
+def combine_hashes(row_hashes: Dict[str, np.ndarray]) -> str:
+    """Catalog-level content hash built from per-aspect row hashes."""
+    digest = hashlib.sha256()
+    for aspect in sorted(row_hashes):
+        digest.update(aspect.encode("utf-8"))
+        digest.update(np.asarray(row_hashes[aspect], dtype=ROW_HASH_DTYPE).tobytes())
+    return digest.hexdigest()
+
+
+class EmbeddingStore:
+    """
+    On-disk store of aspect embedding matrices.
+
+    Each aspect is one contiguous float32 ``.npy`` file, described by a small
+    JSON manifest (model name, dimension, row count, data hash). Matrices are
+    opened with ``mmap_mode="r"`` so loading is zero-copy.
+
+    Every aspect also keeps the content hash of the text behind each row, so a
+    previous store doubles as a cache keyed by (model name, aspect, text hash).
+    """
+
+    def __init__(self, path: str, manifest: Dict):
+        self.path = path
+        self.manifest = manifest
+        self._matrices: Dict[str, np.ndarray] = {}
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, MANIFEST_FILE))
+
+    @classmethod
+    def open(cls, path: str) -> "EmbeddingStore":
+        """Open an existing store without reading the matrices into memory."""
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        return cls(path, manifest)
+
+    @classmethod
+    def write(cls,
+              path: str,
+              aspect_embeddings: Dict[str, np.ndarray],
+              model_name: str,
+              data_hash: str,
+              row_hashes: Optional[Dict[str, np.ndarray]] = None) -> "EmbeddingStore":
+        """
+        Persist aspect matrices and return the reopened store.
+
+        The manifest is written last, so a store interrupted mid-write is never
+        mistaken for a complete one.
+
+        Args:
+            path: Store directory
+            aspect_embeddings: Mapping of aspect name to a ``(rows, dim)`` matrix
+            model_name: Embedding model that produced the matrices
+            data_hash: Content hash of the texts that were embedded
+            row_hashes: Optional per-aspect content hash of each embedded text
+        """
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+        shapes = set()
+        for aspect, matrix in aspect_embeddings.items():
+            matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+            shapes.add(matrix.shape)
+            tmp_path = os.path.join(path, f"{aspect}.tmp.npy")
+            np.save(tmp_path, matrix)
+            os.replace(tmp_path, os.path.join(path, f"{aspect}.npy"))
+
+            if row_hashes is not None:
+                tmp_path = os.path.join(path, f"{aspect}.hashes.tmp.npy")
+                np.save(tmp_path, np.asarray(row_hashes[aspect], dtype=ROW_HASH_DTYPE))
+                os.replace(tmp_path, os.path.join(path, f"{aspect}.hashes.npy"))
+
+        if len(shapes) != 1:
+            raise ValueError(f"Aspect matrices have mismatched shapes: {sorted(shapes)}")
+        num_rows, dimension = shapes.pop()
+
+        manifest = {
+            "model_name": model_name,
+            "dimension": int(dimension),
+            "num_rows": int(num_rows),
+            "data_hash": data_hash,
+            "aspects": list(aspect_embeddings.keys()),
+            "row_hashes": row_hashes is not None,
+            "dtype": "float32",
+            "created_at": time.time()
+        }
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        logger.info(f"Wrote embedding store to {path} ({num_rows} rows x {dimension} dims)")
+        return cls(path, manifest)
+
+    @property
+    def aspects(self) -> List[str]:
+        return self.manifest["aspects"]
+
+    @property
+    def num_rows(self) -> int:
+        return self.manifest["num_rows"]
+
+    @property
+    def dimension(self) -> int:
+        return self.manifest["dimension"]
+
+    def is_compatible(self, model_name: str, num_rows: int, data_hash: str,
+                      aspects: Optional[Iterable[str]] = None) -> bool:
+        """Whether the store was built from the same model and catalog texts."""
+        return (self.manifest.get("model_name") == model_name
+                and self.manifest.get("num_rows") == num_rows
+                and self.manifest.get("data_hash") == data_hash
+                and set(aspects or []).issubset(self.aspects))
+
+    def get(self, aspect: str) -> np.ndarray:
+        """Read-only memory-mapped ``(rows, dim)`` matrix for an aspect."""
+        if aspect not in self._matrices:
+            if aspect not in self.aspects:
+                raise KeyError(f"Aspect '{aspect}' not in embedding store {self.path}")
+            self._matrices[aspect] = np.load(os.path.join(self.path, f"{aspect}.npy"), mmap_mode="r")
+        return self._matrices[aspect]
+
+    def row(self, aspect: str, row: int) -> np.ndarray:
+        return np.asarray(self.get(aspect)[row])
+
+    def row_hashes(self, aspect: str) -> Optional[np.ndarray]:
+        """Content hash of the text behind each row, if the store recorded them."""
+        if not self.manifest.get("row_hashes") or aspect not in self.aspects:
+            return None
+        return np.load(os.path.join(self.path, f"{aspect}.hashes.npy"))
+
+    def lookup(self, aspect: str, hashes: np.ndarray) -> np.ndarray:
+        """
+        Find stored rows whose text hash matches.
+
+        Args:
+            aspect: Aspect to search
+            hashes: Content hashes to look up
+
+        Returns:
+            Stored row position for each hash, or -1 where the text is not cached
+        """
+        found = np.full(len(hashes), -1, dtype=np.int64)
+        stored = self.row_hashes(aspect)
+        if stored is None or len(stored) == 0:
+            return found
+
+        order = np.argsort(stored, kind="stable")
+        sorted_hashes = stored[order]
+        positions = np.minimum(np.searchsorted(sorted_hashes, hashes), len(sorted_hashes) - 1)
+        hits = sorted_hashes[positions] == hashes
+        found[hits] = order[positions[hits]]
+        return found
+
+    def save_array(self, name: str, array: np.ndarray, **info) -> None:
+        """
+        Persist an auxiliary array derived from the same model (e.g. query vectors).
+
+        Args:
+            name: Array name, stored as ``<name>.npy``
+            array: Array to save
+            info: JSON-serializable description recorded in the manifest
+        """
+        tmp_path = os.path.join(self.path, f"{name}.tmp.npy")
+        np.save(tmp_path, np.ascontiguousarray(array))
+        os.replace(tmp_path, os.path.join(self.path, f"{name}.npy"))
+
+        self.manifest.setdefault("extras", {})[name] = info
+        tmp_path = os.path.join(self.path, f"{MANIFEST_FILE}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST_FILE))
+
+    def load_array(self, name: str) -> Optional[Tuple[np.ndarray, Dict]]:
+        """Auxiliary array and its description, or None if it was never saved."""
+        info = self.manifest.get("extras", {}).get(name)
+        if info is None:
+            return None
+        return np.load(os.path.join(self.path, f"{name}.npy")), info
@@ -0,0 +1,94 @@
+import numpy as np
+from typing import Any, Dict, Hashable, Iterable, Optional, Union
+import logging
+
+from attribute_index import AttributeIndex
+
+logger = logging.getLogger(__name__)
+
+
+class MovieFilter:
+    """
+    Structured metadata filter accepted by every recommender method.
+
+    A filter becomes a boolean mask over the catalog (through the attribute
+    index), which is pushed down into the search: only the movies it allows are
+    scored, so results are never cut short by post-filtering.
+    """
+
+    FIELDS = ["genres_any", "genres_all", "min_rating", "max_rating", "min_year", "max_year",
+              "min_votes", "max_votes", "min_runtime", "max_runtime", "directors", "actors"]
+
+    def __init__(self,
+                 genres_any: Optional[Iterable[str]] = None,
+                 genres_all: Optional[Iterable[str]] = None,
+                 min_rating: Optional[float] = None,
+                 max_rating: Optional[float] = None,
+                 min_year: Optional[int] = None,
+                 max_year: Optional[int] = None,
+                 min_votes: Optional[int] = None,
+                 max_votes: Optional[int] = None,
+                 min_runtime: Optional[int] = None,
+                 max_runtime: Optional[int] = None,
+                 directors: Optional[Iterable[str]] = None,
+                 actors: Optional[Iterable[str]] = None):
+        """
+        Args:
+            genres_any: Movie must have at least one of these genres
+            genres_all: Movie must have all of these genres
+            min_rating / max_rating: Inclusive IMDB rating range
+            min_year / max_year: Inclusive release year range
+            min_votes / max_votes: Inclusive number of votes range
+            min_runtime / max_runtime: Inclusive runtime range in minutes
+            directors: Movie must be directed by one of these directors
+            actors: Movie must star at least one of these actors
+        """
+        self.genres_any = sorted(set(genres_any)) if genres_any is not None else None
+        self.genres_all = sorted(set(genres_all)) if genres_all is not None else None
+        self.min_rating = min_rating
+        self.max_rating = max_rating
+        self.min_year = min_year
+        self.max_year = max_year
+        self.min_votes = min_votes
+        self.max_votes = max_votes
+        self.min_runtime = min_runtime
+        self.max_runtime = max_runtime
+        self.directors = sorted(set(directors)) if directors is not None else None
+        self.actors = sorted(set(actors)) if actors is not None else None
+
+    @classmethod
+    def coerce(cls, filters: Union["MovieFilter", Dict[str, Any], None]) -> Optional["MovieFilter"]:
+        """
+        Filter from a MovieFilter, a dict of its fields or None.
+
+        Returns:
+            The filter, or None if it is missing or allows every movie
+        """
+        if filters is None:
+            return None
+        if isinstance(filters, dict):
+            unknown = set(filters) - set(cls.FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown filter fields {sorted(unknown)}, expected some of {cls.FIELDS}")
+            filters = cls(**filters)
+        return None if filters.is_empty() else filters
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Fields that are set."""
+        return {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not None}
+
+    def is_empty(self) -> bool:
+        return not self.to_dict()
+
+    def key(self) -> Hashable:
+        """Hashable identity of the filter, e.g. to cache its mask."""
+        return tuple((field, tuple(value) if isinstance(value, list) else value)
+                     for field, value in self.to_dict().items())
+
+    def mask(self, index: AttributeIndex) -> np.ndarray:
+        """Boolean mask of the catalog movies the filter allows."""
+        return index.filter(**self.to_dict())
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={value!r}" for field, value in self.to_dict().items())
+        return f"MovieFilter({fields})"
@@ -0,0 +1,203 @@
+from typing import Any, Callable, Dict, Iterator, Optional
+from contextlib import contextmanager
+import functools
+import inspect
+import os
+import threading
+import time
+import logging
+
+from query_cache import LRUCache
+import snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class ServingState:
+    """
+    Everything the recommender derives from one version of the catalog.
+
+    A reload builds a complete new state next to the serving one and swaps it
+    in with a single assignment, so a request never sees half of each.
+    """
+
+    FIELDS = ["df", "result_columns", "catalog_index", "attribute_index", "embedding_store", "scoring_engine",
+              "ann_index", "neighbor_table", "_movie_db", "_filter_masks", "_genre_query_vectors", "source"]
+
+    def __init__(self, version: int = 0):
+        self.version = version
+        self.created_at = time.time()
+        self.df = None
+        self.result_columns = None
+        self.catalog_index = None
+        self.attribute_index = None
+        self.embedding_store = None
+        self.scoring_engine = None
+        self.ann_index = None
+        self.neighbor_table = None
+        self._movie_db = None
+        self._filter_masks = LRUCache(maxsize=64)
+        self._genre_query_vectors = None
+        self.source = None
+
+    def __repr__(self) -> str:
+        num_movies = len(self.df) if self.df is not None else 0
+        return f"ServingState(version={self.version}, movies={num_movies})"
+
+
+def state_attribute(name: str) -> property:
+    """
+    Attribute of an owner (with ``_state`` and a thread-local ``_local``) kept on its serving state.
+
+    Reads and writes go to the state pinned to the calling thread (see
+    ``pinned``), else to the owner's current state.
+    """
+    def fget(owner: Any) -> Any:
+        return getattr(current_state(owner), name)
+
+    def fset(owner: Any, value: Any) -> None:
+        setattr(current_state(owner), name, value)
+
+    return property(fget, fset, doc=f"``{name}`` of the serving state")
+
+
+def current_state(owner: Any) -> ServingState:
+    """State pinned to the calling thread, else the owner's current one."""
+    state = getattr(owner._local, "state", None)
+    return owner._state if state is None else state
+
+
+@contextmanager
+def pinned(owner: Any, state: ServingState) -> Iterator[ServingState]:
+    """Serve the calling thread from ``state`` for the duration of the block."""
+    previous = getattr(owner._local, "state", None)
+    owner._local.state = state
+    try:
+        yield state
+    finally:
+        owner._local.state = previous
+
+
+def _iterate_pinned(owner: Any, state: ServingState, iterator: Iterator[Any]) -> Iterator[Any]:
+    while True:
+        with pinned(owner, state):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def on_serving_state(method: Callable) -> Callable:
+    """
+    Run a method on the serving state current when it is called.
+
+    A reload that swaps the state mid-call does not affect it: the call, and
+    every method it calls, finishes on the state it started on. Generators keep
+    their state until exhausted.
+    """
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def wrapper(owner, *args, **kwargs):
+            return _iterate_pinned(owner, current_state(owner), method(owner, *args, **kwargs))
+    else:
+        @functools.wraps(method)
+        def wrapper(owner, *args, **kwargs):
+            with pinned(owner, current_state(owner)):
+                return method(owner, *args, **kwargs)
+    return wrapper
+
+
+class CatalogWatcher:
+    """
+    Background thread that calls back when a file's content changes.
+
+    The file's size and mtime are polled; a change is acted on once they have
+    held still for one poll (so a file still being written is not picked up
+    half-way) and its content hash differs from the last one loaded (so
+    touching the file does nothing). A change is only recorded as loaded once
+    the callback returns, so a failed reload is retried on the next poll.
+    """
+
+    def __init__(self, path: str, on_change: Callable[[], Any], interval: float = 5.0,
+                 signature: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            path: File to watch
+            on_change: Called from the watcher thread after each content change (again on
+                the next poll if it raises)
+            interval: Seconds between polls
+            signature: ``snapshot.source_signature`` of the version already loaded
+                (default: the file as it is now); its content hash is the baseline
+                later changes are compared against
+        """
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        signature = signature or snapshot.source_signature(path)
+        self._signature = (signature["size"], signature["mtime_ns"])
+        self._pending = None
+        self._hash = signature.get("content_hash") or snapshot.file_hash(path)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "CatalogWatcher":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="catalog-watcher", daemon=True)
+            self._thread.start()
+            logger.info(f"Watching {self.path} for changes every {self.interval:g}s")
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def check(self) -> Optional[str]:
+        """
+        Poll the file once.
+
+        Returns:
+            The new content hash if the content changed and has settled, else None.
+            It stays pending, and is returned by every later poll, until
+            ``acknowledge`` records it as loaded.
+        """
+        stat = os.stat(self.path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if signature == self._signature:
+            self._pending = None
+            return None
+        if signature != self._pending:
+            # Changed since the last poll: wait for the writer to finish
+            self._pending = signature
+            return None
+
+        content_hash = snapshot.file_hash(self.path)
+        if content_hash == self._hash:
+            # Touched, not changed
+            self._signature, self._pending = signature, None
+            return None
+        return content_hash
+
+    def acknowledge(self, content_hash: str) -> None:
+        """Record the content returned by ``check`` as loaded."""
+        if self._pending is not None:
+            self._signature, self._pending = self._pending, None
+        self._hash = content_hash
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                content_hash = self.check()
+                if content_hash is not None:
+                    logger.info(f"{self.path} changed")
+                    self.on_change()
+                    self.acknowledge(content_hash)
+            except Exception as e:
+                # The change stays pending, so the next poll retries it
+                logger.error(f"Error watching {self.path}: {e}")
@@ -0,0 +1,103 @@
+import numpy as np
+from typing import TYPE_CHECKING, Any, Dict
+from collections import Counter
+import threading
+import logging
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder, SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+# Process-wide cache of loaded models, keyed by model name
+_models: Dict[str, Any] = {}
+_cross_encoders: Dict[str, Any] = {}
+_load_counts: Counter = Counter()
+_lock = threading.Lock()
+
+
+def get_model(model_name: str) -> "SentenceTransformer":
+    """
+    Return the shared instance of a SentenceTransformer, loading it on first use.
+
+    Args:
+        model_name: Hugging Face model name or local model path
+
+    Returns:
+        The single loaded model for this process
+    """
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(model_name)
+        if model is None:
+            logger.info(f"Loading embedding model: {model_name}")
+            # Imported on first load: importing sentence_transformers (torch) alone takes seconds
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+            _models[model_name] = model
+            _load_counts[model_name] += 1
+    return model
+
+
+def get_cross_encoder(model_name: str) -> "CrossEncoder":
+    """
+    Return the shared instance of a CrossEncoder (re-ranking model), loading it on first use.
+
+    Args:
+        model_name: Hugging Face model name or local model path
+
+    Returns:
+        The single loaded cross-encoder for this process
+    """
+    model = _cross_encoders.get(model_name)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _cross_encoders.get(model_name)
+        if model is None:
+            logger.info(f"Loading cross-encoder: {model_name}")
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(model_name, device="cpu")
+            _cross_encoders[model_name] = model
+            _load_counts[model_name] += 1
+    return model
+
+
+def register_cross_encoder(model_name: str, model: Any) -> None:
+    """Install an already constructed cross-encoder (e.g. a stub) under ``model_name``."""
+    with _lock:
+        _cross_encoders[model_name] = model
+
+
+def register_model(model_name: str, model: Any) -> None:
+    """Install an already constructed model (e.g. a stub) under ``model_name``."""
+    with _lock:
+        _models[model_name] = model
+
+
+def model_load_counts() -> Dict[str, int]:
+    """Number of times each model has been loaded from disk in this process."""
+    return dict(_load_counts)
+
+
+def clear_models() -> None:
+    """Drop every shared model so the next request reloads it."""
+    with _lock:
+        _models.clear()
+        _cross_encoders.clear()
+
+
+class SharedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Chroma embedding function backed by the shared model instance."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def __call__(self, input: Documents) -> Embeddings:
+        embeddings = get_model(self.model_name).encode(list(input))
+        return np.asarray(embeddings, dtype=np.float32).tolist()
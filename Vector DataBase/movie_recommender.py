@@ -1,25 +1,98 @@
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
+import gc
+import itertools
 import os
-from sentence_transformers import SentenceTransformer
+import threading
 import chromadb
 from chromadb import PersistentClient
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
 import logging
 import time
-from tqdm import tqdm
+
+from ann_index import SEARCH_PARAMS, AspectAnnIndex, resolve_backend
+from model_registry import SharedEmbeddingFunction, get_model, model_load_counts
+from attribute_index import AttributeIndex
+from catalog_index import CatalogIndex
+from chroma_sync import COLLECTION_NAMES, content_hashes, max_batch_size, metadata_hashes, sync_collections
+from embedding_pipeline import encode_texts
+from embedding_store import EmbeddingStore, ASPECT_TEXT_COLUMNS, combine_hashes, hash_rows
+from filters import MovieFilter
+from hot_reload import CatalogWatcher, ServingState, current_state, on_serving_state, pinned, state_attribute
+from neighbor_table import NeighborTable
+from pipeline import (AnnCandidates, AspectFeatures, AttributeCandidates, CandidateGenerator, ChromaCandidates,
+                      EngineCandidates, FallbackCandidates, GenreMatchFeature, MMRReRanker, NeighborTableCandidates,
+                      PersonalizationFeature, Pipeline, PipelineRequest, PipelineResult, PrecomputedCandidates,
+                      PrecomputedFeature, QuerySimilarityFeature, RatingBoostFeature, SeedCandidates,
+                      WeightedScorer)
+from profile_store import ProfileStore
+from query_cache import QueryEmbeddingCache
+from reranker import CrossEncoderReRanker
+from results import ResultColumns
+from resource_usage import PhaseTimer, rss_bytes
+import snapshot
+from scoring_engine import AspectScoringEngine, ENGINE_ASPECTS, l2_normalize, top_k_rows
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class MovieRecommender:
+    # Aspect weights used to match candidates against a user's watch history
+    PERSONALIZED_ASPECT_WEIGHTS = {
+        "overall": 0.3,
+        "genre": 0.4,
+        "plot": 0.2,
+        "cast": 0.1
+    }
+    
+    # Latency budgets (ms) of the default pipelines, per stage and for the whole run ("total").
+    # A run that overruns one skips its remaining optional stages and returns the best scored
+    # candidates: the retrieval similarity (hybrid, re-ranked text), the semantic score (genre
+    # mix) or the undiversified history similarity (personalized).
+    PIPELINE_BUDGETS = {
+        "hybrid": {"candidates": 100.0, "total": 250.0},
+        "genre_mix": {"semantic": 100.0},
+        "personalized": {"seeds": 150.0, "total": 300.0},
+        "text_rerank": {"candidates": 100.0}
+    }
+    
+    # Sources of exact nearest neighbor candidates (see ``search_backend``)
+    SEARCH_BACKENDS = ["engine", "chroma"]
+    
+    # Catalog-derived state, swapped as a whole by reload()
+    df = state_attribute("df")
+    result_columns = state_attribute("result_columns")
+    catalog_index = state_attribute("catalog_index")
+    attribute_index = state_attribute("attribute_index")
+    embedding_store = state_attribute("embedding_store")
+    scoring_engine = state_attribute("scoring_engine")
+    ann_index = state_attribute("ann_index")
+    neighbor_table = state_attribute("neighbor_table")
+    source = state_attribute("source")
+    _movie_db = state_attribute("_movie_db")
+    _filter_masks = state_attribute("_filter_masks")
+    _genre_query_vectors = state_attribute("_genre_query_vectors")
+    
     def __init__(self, data_path: str = "Data/imdb_top_1000.csv", 
                  db_path: str = "chroma_db_movies",
                  embedding_model: str = "sentence-transformers/all-mpnet-base-v2",
                  use_cached_embeddings: bool = True,
-                 cache_file: str = "movie_embeddings_cache.npz"):
+                 embedding_store_path: str = "movie_embeddings_store",
+                 neighbor_table_path: str = "movie_neighbors",
+                 query_cache_size: int = 1024,
+                 encode_processes: Optional[int] = None,
+                 index_backend: str = "auto",
+                 index_params: Optional[Dict[str, Any]] = None,
+                 ann_index_path: str = "movie_ann_index",
+                 embedding_precision: str = "float32",
+                 profile_store_path: str = "user_profiles.db",
+                 snapshot_path: Optional[str] = None,
+                 rerank_model: Optional[str] = None,
+                 rerank_params: Optional[Dict[str, Any]] = None,
+                 reload_interval: Optional[float] = None,
+                 pipeline_budgets: Optional[Dict[str, Dict[str, float]]] = None,
+                 search_backend: str = "engine"):
         """
         Initialize the movie recommender system with advanced vector embeddings.
         
@@ -27,354 +100,644 @@ class MovieRecommender:
             data_path: Path to the IMDB dataset
             db_path: Path to store ChromaDB
             embedding_model: Model to use for generating embeddings
-            use_cached_embeddings: Whether to use cached embeddings if available
-            cache_file: File to store embedding cache
+            use_cached_embeddings: Whether to use stored embeddings if they match the catalog
+            embedding_store_path: Directory of the memory-mapped embedding store
+            neighbor_table_path: Directory of the precomputed neighbor table, if built
+            query_cache_size: Number of query embeddings kept in the LRU cache
+            encode_processes: Processes used to generate embeddings (None: all cores for large catalogs)
+            index_backend: Nearest neighbor backend: "exact", "hnsw", "ivf" or "auto"
+                (exact search for small catalogs, an ANN index for large ones)
+            index_params: Build and search parameters of the ANN backend, and its indexed
+                ``aspects`` (default: "overall" only, other aspects are rescored exactly)
+            ann_index_path: Directory the ANN index is persisted to
+            embedding_precision: In-memory precision of the aspect matrices: "float32",
+                "float16" or "int8" (compressed rankings are rescored in float32)
+            profile_store_path: SQLite file of the persistent user profile store
+            snapshot_path: Cold-start snapshot directory: restored in one step when it matches
+                the data file, model, index configuration and embedding precision, (re)written
+                after a full initialization otherwise
+            rerank_model: Cross-encoder (model name, local path or reranker.STUB_CROSS_ENCODER)
+                that re-ranks text query results; None disables re-ranking
+            rerank_params: CrossEncoderReRanker options (top_n, min_n, latency_budget_ms, ...)
+            reload_interval: Poll data_path this often (seconds) and reload the catalog in the
+                background when it changes; None disables watching (see ``reload``)
+            pipeline_budgets: Stage budgets in milliseconds per pipeline, with the run's under
+                "total" (default: PIPELINE_BUDGETS; {} disables early termination)
+            search_backend: Where similar-movie and text query candidates come from when
+                neither the neighbor table nor the ANN index applies: "engine" (exact
+                in-memory search) or "chroma" (the main ChromaDB collection, falling back
+                to the engine for requests it cannot serve)
+        
+        The embedding model and ChromaDB are opened lazily: the model on the first
+        free-text query (or when embeddings must be generated), ChromaDB on the
+        first request served from it or by ``sync_vector_db``, which brings its
+        collections in line with the catalog (once opened, every ``reload``
+        re-syncs them). So is the cross-encoder, on the first re-ranked query.
         """
         self.data_path = data_path
         self.db_path = db_path
         self.embedding_model_name = embedding_model
         self.use_cached_embeddings = use_cached_embeddings
-        self.cache_file = cache_file
-        self.df = None
-        self.embedding_model = None
+        self.encode_processes = encode_processes
+        self.embedding_store_path = embedding_store_path
+        self.neighbor_table_path = neighbor_table_path
+        self.index_backend = index_backend
+        self.index_params = index_params or {}
+        self.ann_index_path = ann_index_path
+        self.embedding_precision = embedding_precision
+        self.profile_store_path = profile_store_path
+        self.snapshot_path = snapshot_path
+        self._state = ServingState()
+        self._local = threading.local()
+        self._reload_lock = threading.Lock()
+        self.last_reload = None
+        self.watcher = None
+        self._embedding_model = None
         self.chroma_client = None
-        self.movie_db = None
+        self.query_cache = QueryEmbeddingCache(self._encode_query, maxsize=query_cache_size)
+        self.cross_encoder = CrossEncoderReRanker(rerank_model, **(rerank_params or {})) if rerank_model else None
+        if search_backend not in self.SEARCH_BACKENDS:
+            raise ValueError(f"Unknown search backend '{search_backend}', expected one of {self.SEARCH_BACKENDS}")
+        self.search_backend = search_backend
+        self.pipeline_budgets = self.PIPELINE_BUDGETS if pipeline_budgets is None else pipeline_budgets
+        self.pipelines = self._default_pipelines()
+        self._profile_store = None
+        self.startup = PhaseTimer("Startup phase ")
         
         # Create directory for ChromaDB if it doesn't exist
         os.makedirs(db_path, exist_ok=True)
         
-        # Initialize the system
-        self._load_data()
-        self._initialize_embedding_model()
-        self._initialize_vector_db()
+        # Initialize the system, from the snapshot when it is current
+        if not (snapshot_path and self._restore_snapshot()):
+            with self.startup.phase("load catalog"):
+                self._load_data()
+            with self.startup.phase("embeddings"):
+                self._generate_embeddings()
+            with self.startup.phase("scoring engine"):
+                self._build_scoring_engine()
+            with self.startup.phase("ann index"):
+                self._build_ann_index()
+            with self.startup.phase("neighbor table"):
+                self._load_neighbor_table()
+            if snapshot_path:
+                with self.startup.phase("write snapshot"):
+                    self.save_snapshot(snapshot_path)
+        logger.info(f"Recommender ready in {self.startup.total_seconds:.2f}s")
+        
+        if reload_interval:
+            self.watch_catalog(reload_interval)
+    
+    @property
+    def embedding_model(self):
+        """Shared SentenceTransformer, loaded on first use."""
+        if self._embedding_model is None:
+            with self.startup.phase("embedding model (lazy)"):
+                self._initialize_embedding_model()
+        return self._embedding_model
+    
+    @property
+    def movie_db(self):
+        """Main ChromaDB collection, opened (and synced with the catalog) on first use."""
+        if self._movie_db is None:
+            with self.startup.phase("vector database (lazy)"):
+                self._initialize_vector_db()
+        return self._movie_db
+    
+    def _snapshot_signature(self) -> Dict[str, Any]:
+        """Manifest fields a snapshot must match to be restored, besides the content of the data file."""
+        return {
+            "model_name": self.embedding_model_name,
+            "index_backend": self.index_backend,
+            "index_params": {key: value for key, value in self.index_params.items() if key not in SEARCH_PARAMS},
+            "embedding_precision": self.embedding_precision
+        }
+    
+    @on_serving_state
+    def save_snapshot(self, path: str) -> None:
+        """
+        Persist the preprocessed catalog, embedding store and indexes for a fast cold start.
+        
+        Args:
+            path: Snapshot directory
+        """
+        components = {"embeddings": self.embedding_store.path}
+        if self.neighbor_table is not None:
+            components["neighbors"] = self.neighbor_table.path
+        if self.ann_index is not None:
+            components["ann"] = self.ann_index_path
+        snapshot.write_snapshot(path, self.df, components, {
+            "source": self.source,
+            **self._snapshot_signature(),
+            "data_hash": self.embedding_store.manifest["data_hash"]
+        })
+    
+    def _restore_snapshot(self) -> bool:
+        """Restore catalog, embeddings and indexes from the snapshot; False if it is missing or stale."""
+        with self.startup.phase("read snapshot"):
+            restored = snapshot.open_snapshot(self.snapshot_path, self._snapshot_signature(), self.data_path)
+            if restored is None:
+                return False
+            manifest, self.df = restored
+            self.source = snapshot.source_signature(self.data_path, manifest["source"]["content_hash"])
+        
+        with self.startup.phase("index catalog"):
+            self._index_catalog()
+        with self.startup.phase("embeddings"):
+            self.embedding_store = EmbeddingStore.open(
+                snapshot.component_path(self.snapshot_path, manifest, "embeddings")
+            )
+        with self.startup.phase("scoring engine"):
+            self._build_scoring_engine()
+        with self.startup.phase("ann index"):
+            self._build_ann_index(snapshot.component_path(self.snapshot_path, manifest, "ann"))
+        with self.startup.phase("neighbor table"):
+            neighbor_path = snapshot.component_path(self.snapshot_path, manifest, "neighbors")
+            if neighbor_path is not None:
+                self.neighbor_table = NeighborTable.open(neighbor_path)
+            else:
+                self._load_neighbor_table()
         
-    # In the _load_data method of MovieRecommender class:
+        logger.info(f"Restored snapshot from {self.snapshot_path}")
+        return True
+    
     def _load_data(self) -> None:
         """Load and preprocess the IMDB dataset."""
         logger.info(f"Loading data from {self.data_path}")
+        self.source = snapshot.source_signature(self.data_path)
         
-        # Load IMDB dataset
-        self.df = pd.read_csv(self.data_path)
-        
-        # Select relevant features
-        self.df = self.df[["Series_Title", "Genre", "IMDB_Rating", "Overview", "Director",
-                        "Star1", "Star2", "Star3", "Star4", "No_of_Votes", "Gross", "Runtime", "Released_Year"]]
+        # Load only the relevant features of the IMDB dataset
+        columns = ["Series_Title", "Genre", "IMDB_Rating", "Overview", "Director",
+                   "Star1", "Star2", "Star3", "Star4", "No_of_Votes", "Gross", "Runtime", "Released_Year"]
+        self.df = pd.read_csv(self.data_path, usecols=columns)[columns]
         
         # Convert Released_Year to numeric first
         self.df["Released_Year"] = pd.to_numeric(self.df["Released_Year"], errors='coerce')
         
-        # Handle missing values more robustly
-        for col in self.df.columns:
-            if col == "Released_Year":
-                # Fill missing years with median year
-                median_year = self.df[col].median()
-                self.df[col].fillna(median_year, inplace=True)
-                self.df[col] = self.df[col].astype(int)
-            elif self.df[col].dtype == object:
-                self.df[col].fillna("Unknown", inplace=True)
-            else:
-                self.df[col].fillna(self.df[col].median(), inplace=True)
+        # Handle missing values in a single pass: medians for numeric columns
+        # (including the year), "Unknown" for text columns
+        fill_values = self.df.select_dtypes(include="number").median().to_dict()
+        fill_values.update({col: "Unknown" for col in self.df.select_dtypes(include="object").columns})
+        self.df = self.df.fillna(fill_values)
+        self.df["Released_Year"] = self.df["Released_Year"].astype(int)
         
         # Create a rich movie description for better semantic understanding
         self._generate_movie_descriptions()
+        self._index_catalog()
         
         logger.info(f"Loaded {len(self.df)} movies")
+    
+    def _index_catalog(self) -> None:
+        """Build the result metadata and lookup indexes of the preprocessed catalog."""
+        self.result_columns = ResultColumns.from_dataframe(self.df)
+        
+        # Index titles and ids once so lookups never scan the DataFrame
+        self.catalog_index = CatalogIndex(
+            self.df["Series_Title"].tolist(),
+            self.df["Released_Year"].tolist(),
+            [str(i) for i in self.df.index.tolist()]
+        )
+        self.attribute_index = AttributeIndex.from_dataframe(self.df)
         
     def _generate_movie_descriptions(self) -> None:
         """Generate comprehensive textual representations of movies."""
         logger.info("Generating rich movie descriptions")
         
-        self.df["movie_description"] = self.df.apply(
-            lambda row: f"""Title: {row['Series_Title']}
-            Year: {row['Released_Year']}
-            Genres: {row['Genre']}
-            Director: {row['Director']}
-            Stars: {row['Star1']}, {row['Star2']}, {row['Star3']}, {row['Star4']}
-            Runtime: {row['Runtime']}
-            IMDB Rating: {row['IMDB_Rating']} based on {row['No_of_Votes']} votes
-            Overview: {row['Overview']}""".replace('\n            ', ' ').strip(),
-            axis=1
-        )
-        
-        # Create separate embeddings for each aspect to enable more nuanced recommendations
-        self.df["title_director"] = self.df.apply(
-            lambda row: f"Title: {row['Series_Title']} Director: {row['Director']}", axis=1
-        )
-        
-        self.df["genre_info"] = self.df.apply(
-            lambda row: f"Genres: {row['Genre']}", axis=1
-        )
-        
-        self.df["cast_info"] = self.df.apply(
-            lambda row: f"Cast: {row['Star1']}, {row['Star2']}, {row['Star3']}, {row['Star4']}", axis=1
-        )
+        df = self.df
+        title = df["Series_Title"].astype(str)
+        year = df["Released_Year"].astype(str)
+        genre = df["Genre"].astype(str)
+        director = df["Director"].astype(str)
+        overview = df["Overview"].astype(str)
+        stars = (df["Star1"].astype(str) + ", " + df["Star2"].astype(str) + ", " +
+                 df["Star3"].astype(str) + ", " + df["Star4"].astype(str))
         
-        self.df["plot_info"] = self.df.apply(
-            lambda row: f"Plot: {row['Overview']}", axis=1
-        )
+        self.df["movie_description"] = (
+            "Title: " + title +
+            " Year: " + year +
+            " Genres: " + genre +
+            " Director: " + director +
+            " Stars: " + stars +
+            " Runtime: " + df["Runtime"].astype(str) +
+            " IMDB Rating: " + df["IMDB_Rating"].astype(str) +
+            " based on " + df["No_of_Votes"].astype(str) + " votes" +
+            " Overview: " + overview
+        ).str.strip()
         
+        # Create separate embeddings for each aspect to enable more nuanced recommendations
+        self.df["title_director"] = "Title: " + title + " Director: " + director
+        self.df["genre_info"] = "Genres: " + genre
+        self.df["cast_info"] = "Cast: " + stars
+        self.df["plot_info"] = "Plot: " + overview
+    
     def _initialize_embedding_model(self) -> None:
         """Initialize the embedding model."""
         logger.info(f"Initializing embedding model: {self.embedding_model_name}")
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        self._embedding_model = get_model(self.embedding_model_name)
+        logger.info(f"Embedding model loads in this process: {model_load_counts()}")
     
     def _generate_embeddings(self) -> None:
-        """Generate vector embeddings for movies."""
-        # Check if embeddings cache exists and should be used
-        if self.use_cached_embeddings and os.path.exists(self.cache_file):
-            logger.info(f"Loading cached embeddings from {self.cache_file}")
-            cache_data = np.load(self.cache_file, allow_pickle=True)
-            self.df["embeddings"] = list(cache_data["embeddings"])
-            self.df["title_director_embeddings"] = list(cache_data["title_dir_emb"])
-            self.df["genre_embeddings"] = list(cache_data["genre_emb"])
-            self.df["cast_embeddings"] = list(cache_data["cast_emb"])
-            self.df["plot_embeddings"] = list(cache_data["plot_emb"])
-            return
+        """
+        Generate vector embeddings for movies.
+        
+        Rows are cached by (model name, aspect, text hash): only texts that are not
+        in the previous embedding store are re-encoded.
+        """
+        row_hashes = {
+            aspect: hash_rows(self.df[text_col].tolist())
+            for aspect, text_col in ASPECT_TEXT_COLUMNS.items()
+        }
+        data_hash = combine_hashes(row_hashes)
+        total_movies = len(self.df)
+        
+        previous = None
+        if self.use_cached_embeddings and EmbeddingStore.exists(self.embedding_store_path):
+            previous = EmbeddingStore.open(self.embedding_store_path)
+            if previous.is_compatible(self.embedding_model_name, total_movies, data_hash, ASPECT_TEXT_COLUMNS):
+                logger.info(f"Using embedding store at {self.embedding_store_path}")
+                self.embedding_store = previous
+                return
+        
+        # Cached vectors are only valid for the model that produced them
+        cache = previous if previous is not None and previous.manifest.get("model_name") == self.embedding_model_name else None
         
         logger.info("Generating embeddings for movies")
         
-        # Generate embeddings using batch processing for efficiency
-        # Main description embeddings
-        descriptions = self.df["movie_description"].tolist()
-        
-        # Use batched encoding for efficiency
-        batch_size = 64
-        embeddings = []
-        
-        for i in tqdm(range(0, len(descriptions), batch_size), desc="Generating main embeddings"):
-            batch = descriptions[i:i+batch_size]
-            batch_embeddings = self.embedding_model.encode(batch)
-            embeddings.extend(batch_embeddings)
-        
-        self.df["embeddings"] = embeddings
-        
-        # Generate aspect-specific embeddings
-        logger.info("Generating aspect-specific embeddings")
-        
-        # Title and director embeddings
-        title_dir_texts = self.df["title_director"].tolist()
-        title_dir_emb = []
-        for i in tqdm(range(0, len(title_dir_texts), batch_size), desc="Title/Director embeddings"):
-            batch = title_dir_texts[i:i+batch_size]
-            batch_embeddings = self.embedding_model.encode(batch)
-            title_dir_emb.extend(batch_embeddings)
-        self.df["title_director_embeddings"] = title_dir_emb
-        
-        # Genre embeddings
-        genre_texts = self.df["genre_info"].tolist()
-        genre_emb = []
-        for i in tqdm(range(0, len(genre_texts), batch_size), desc="Genre embeddings"):
-            batch = genre_texts[i:i+batch_size]
-            batch_embeddings = self.embedding_model.encode(batch)
-            genre_emb.extend(batch_embeddings)
-        self.df["genre_embeddings"] = genre_emb
-        
-        # Cast embeddings
-        cast_texts = self.df["cast_info"].tolist()
-        cast_emb = []
-        for i in tqdm(range(0, len(cast_texts), batch_size), desc="Cast embeddings"):
-            batch = cast_texts[i:i+batch_size]
-            batch_embeddings = self.embedding_model.encode(batch)
-            cast_emb.extend(batch_embeddings)
-        self.df["cast_embeddings"] = cast_emb
-        
-        # Plot embeddings
-        plot_texts = self.df["plot_info"].tolist()
-        plot_emb = []
-        for i in tqdm(range(0, len(plot_texts), batch_size), desc="Plot embeddings"):
-            batch = plot_texts[i:i+batch_size]
-            batch_embeddings = self.embedding_model.encode(batch)
-            plot_emb.extend(batch_embeddings)
-        self.df["plot_embeddings"] = plot_emb
-        
-        # Cache embeddings for future use
-        logger.info(f"Saving embeddings cache to {self.cache_file}")
-        np.savez(
-            self.cache_file,
-            embeddings=np.array(self.df["embeddings"].tolist()),
-            title_dir_emb=np.array(self.df["title_director_embeddings"].tolist()),
-            genre_emb=np.array(self.df["genre_embeddings"].tolist()),
-            cast_emb=np.array(self.df["cast_embeddings"].tolist()),
-            plot_emb=np.array(self.df["plot_embeddings"].tolist())
+        # Work out which rows of each aspect are cached and which need encoding
+        source_rows = {}
+        missing_rows = {}
+        for aspect in ASPECT_TEXT_COLUMNS:
+            source_rows[aspect] = cache.lookup(aspect, row_hashes[aspect]) if cache is not None else np.full(total_movies, -1)
+            missing_rows[aspect] = np.flatnonzero(source_rows[aspect] < 0)
+            logger.info(f"{aspect}: reusing {total_movies - len(missing_rows[aspect])} cached embeddings, "
+                        f"encoding {len(missing_rows[aspect])}")
+        
+        # Encode the missing texts of every aspect in a single length-bucketed job
+        texts = []
+        for aspect, text_col in ASPECT_TEXT_COLUMNS.items():
+            texts.extend(self.df[text_col].to_numpy()[missing_rows[aspect]].tolist())
+        encoded = encode_texts(self.embedding_model, texts, processes=self.encode_processes,
+                               desc="Generating embeddings") if texts else None
+        
+        aspect_embeddings = {}
+        offset = 0
+        
+        for aspect in ASPECT_TEXT_COLUMNS:
+            missing = missing_rows[aspect]
+            reused = np.flatnonzero(source_rows[aspect] >= 0)
+            
+            dim = encoded.shape[1] if encoded is not None else cache.dimension
+            matrix = np.empty((total_movies, dim), dtype=np.float32)
+            if len(reused):
+                matrix[reused] = cache.get(aspect)[source_rows[aspect][reused]]
+            if len(missing):
+                matrix[missing] = encoded[offset:offset + len(missing)]
+                offset += len(missing)
+            aspect_embeddings[aspect] = matrix
+        
+        self.embedding_store = EmbeddingStore.write(
+            self.embedding_store_path,
+            aspect_embeddings,
+            model_name=self.embedding_model_name,
+            data_hash=data_hash,
+            row_hashes=row_hashes
         )
     
     def _initialize_vector_db(self) -> None:
-        """Initialize and populate the vector database."""
+        """Open the vector database and bring it in line with the catalog."""
         logger.info(f"Initializing ChromaDB at {self.db_path}")
         
         # Generate embeddings if not already done
-        if "embeddings" not in self.df.columns:
+        if self.embedding_store is None:
             self._generate_embeddings()
         
-        # Initialize ChromaDB
         self.chroma_client = PersistentClient(path=self.db_path)
+        self.sync_vector_db()
+        logger.info("All collections initialized")
+    
+    @on_serving_state
+    def sync_vector_db(self) -> Dict[str, Dict[str, int]]:
+        """
+        Sync the main and aspect-specific ChromaDB collections with the catalog.
         
-        # Define embedding function using the same model
-        hf_embeddings = SentenceTransformerEmbeddingFunction(self.embedding_model_name)
+        Each stored row keeps the content hash it was written with; only new or
+        changed rows are upserted and rows no longer in the catalog are deleted,
+        so a partially built or outdated database is repaired in place. The four
+        collections are synced concurrently.
         
-        # Check if collection exists and recreate if needed
-        try:
-            self.movie_db = self.chroma_client.get_collection(name="movies")
-            logger.info("Using existing ChromaDB collection")
-        except Exception:
-            logger.info("Creating new ChromaDB collection")
-            self.movie_db = self.chroma_client.create_collection(
-                name="movies", 
+        Call it at startup to keep the collections current for other readers
+        when recommendations are served from the engine (ChromaDB is otherwise
+        only opened by the first request served from it); ``reload`` re-syncs
+        once it has run.
+        
+        Returns:
+            Mapping of aspect name to upserted, deleted and unchanged row counts
+        """
+        if self.chroma_client is None:
+            self.chroma_client = PersistentClient(path=self.db_path)
+        
+        # Define embedding function backed by the same shared model instance
+        hf_embeddings = SharedEmbeddingFunction(self.embedding_model_name)
+        collections = {
+            aspect: self.chroma_client.get_or_create_collection(
+                name=name,
                 embedding_function=hf_embeddings,
                 metadata={"hnsw:space": "cosine"}  # Use cosine similarity for semantic search
             )
-            
-            # Add movies to ChromaDB
-            self._populate_vector_db()
-            
-            self.index_aspects()  # Add this line
+            for aspect, name in COLLECTION_NAMES.items()
+        }
+        
+        metadatas = self.result_columns.records()
+        meta_hashes = metadata_hashes(metadatas)
+        stats = sync_collections(
+            collections,
+            ids=self.df.index.astype(str).tolist(),
+            hashes={
+                aspect: content_hashes(self.embedding_store.row_hashes(aspect), meta_hashes, self.embedding_model_name)
+                for aspect in collections
+            },
+            embeddings={aspect: self.embedding_store.get(aspect) for aspect in collections},
+            metadatas=metadatas,
+            batch_size=max_batch_size(self.chroma_client)
+        )
+        self._movie_db = collections["overall"]
+        return stats
+    
+    def index_aspects(self) -> None:
+        """Create or repair the aspect-specific collections (synced with the main one)."""
+        self.sync_vector_db()
     
-            logger.info("All collections initialized")
+    def _build_scoring_engine(self) -> None:
+        """Load the aspect embedding matrices into the in-memory scoring engine."""
+        self.scoring_engine = AspectScoringEngine(
+            {aspect: self.embedding_store.get(aspect) for aspect in ENGINE_ASPECTS},
+            precision=self.embedding_precision
+        )
     
-    def _populate_vector_db(self) -> None:
-        """Populate the vector database with movie data and embeddings."""
-        logger.info("Populating ChromaDB with movie data and embeddings")
+    def _build_ann_index(self, path: Optional[str] = None) -> None:
+        """
+        Load or build the ANN index when the catalog is too large for exact search.
         
-        # Add movies in batches for better performance
-        batch_size = 50
-        total_movies = len(self.df)
+        Args:
+            path: Directory of a persisted index to try first (default: ``ann_index_path``);
+                it is only used if it was built with the configured backend and parameters
+        """
+        backend = resolve_backend(self.index_backend, self.scoring_engine.num_movies)
+        if backend == "exact":
+            return
         
-        for start_idx in tqdm(range(0, total_movies, batch_size), desc="Adding movies to database"):
-            end_idx = min(start_idx + batch_size, total_movies)
-            batch_df = self.df.iloc[start_idx:end_idx]
-            
-            batch_ids = [str(i) for i in batch_df.index.tolist()]
-            batch_embeddings = batch_df["embeddings"].tolist()
-            
-            batch_metadatas = []
-            for _, row in batch_df.iterrows():
-                metadata = {
-                    "title": row["Series_Title"],
-                    "year": str(row["Released_Year"]),
-                    "genre": row["Genre"],
-                    "director": row["Director"],
-                    "stars": ", ".join([row["Star1"], row["Star2"], row["Star3"], row["Star4"]]),
-                    "imdb_rating": float(row["IMDB_Rating"]),
-                    "votes": int(row["No_of_Votes"]),
-                    "overview": row["Overview"],
-                    "gross": str(row["Gross"]),
-                    "runtime": str(row["Runtime"])
-                }
-                batch_metadatas.append(metadata)
-            
-            self.movie_db.add(
-                ids=batch_ids,
-                embeddings=batch_embeddings,
-                metadatas=batch_metadatas
-            )
+        data_hash = self.embedding_store.manifest["data_hash"]
+        search_params = {key: value for key, value in self.index_params.items() if key in SEARCH_PARAMS}
+        self.ann_index = AspectAnnIndex.load(path or self.ann_index_path, self.scoring_engine, data_hash,
+                                             **search_params)
+        if self.ann_index is None or not self.ann_index.matches(backend, **self.index_params):
+            self.ann_index = AspectAnnIndex(self.scoring_engine, backend, **self.index_params)
+            self.ann_index.save(self.ann_index_path, data_hash)
+        logger.info(f"Serving nearest neighbor queries from {backend} index")
+    
+    def _neighbor_row_hashes(self) -> np.ndarray:
+        """``(aspects, movies)`` content hashes the neighbor table is keyed on."""
+        return np.stack([self.embedding_store.row_hashes(aspect) for aspect in ENGINE_ASPECTS])
+    
+    def _load_neighbor_table(self) -> None:
+        """Open the neighbor table if one was built, updating it if the embeddings changed."""
+        if not NeighborTable.exists(self.neighbor_table_path):
+            return
         
-        logger.info(f"Added {total_movies} movies to ChromaDB")
+        table = NeighborTable.open(self.neighbor_table_path)
+        data_hash = self.embedding_store.manifest["data_hash"]
+        if not table.is_current(data_hash):
+            table = table.update(self.scoring_engine, data_hash, self._neighbor_row_hashes())
         
-    def index_aspects(self) -> None:
-        """Create separate collections for different movie aspects."""
-        logger.info("Creating aspect-specific collections")
+        self.neighbor_table = table
+        logger.info(f"Serving similar movies from neighbor table at {self.neighbor_table_path}")
+    
+    @on_serving_state
+    def build_neighbor_table(self, n_neighbors: int = 50,
+                             presets: Dict[str, Dict[str, float]] = None) -> None:
+        """
+        Precompute the top neighbors of every movie for each aspect weighting preset.
+        
+        Args:
+            n_neighbors: Number of neighbors kept per movie
+            presets: Mapping of preset name to aspect weights (defaults to NEIGHBOR_PRESETS)
+        """
+        self.neighbor_table = NeighborTable.build(
+            self.neighbor_table_path,
+            self.scoring_engine,
+            data_hash=self.embedding_store.manifest["data_hash"],
+            row_hashes=self._neighbor_row_hashes(),
+            presets=presets,
+            n_neighbors=n_neighbors
+        )
+    
+    def reload(self) -> Dict[str, Any]:
+        """
+        Rebuild the catalog, embeddings and indexes from ``data_path`` and swap them in.
+        
+        The new serving state is built while the current one keeps serving:
+        unchanged rows reuse their cached embeddings and indexes are reopened when
+        their data hash still matches. It replaces the current state in a single
+        assignment; requests already running finish on the state they started on.
+        Reloads run one at a time, and a failed reload leaves the current state
+        serving.
+        
+        Returns:
+            Report with the new version, catalog size, duration, phase timings and
+            memory overlap (resident memory added while both states were alive)
+        """
+        with self._reload_lock:
+            previous = self._state
+            timer = PhaseTimer("Reload phase ")
+            rss_before = rss_bytes()
+            start_time = time.perf_counter()
+            
+            state = ServingState(version=previous.version + 1)
+            with pinned(self, state):
+                with timer.phase("load catalog"):
+                    self._load_data()
+                with timer.phase("embeddings"):
+                    self._generate_embeddings()
+                with timer.phase("scoring engine"):
+                    self._build_scoring_engine()
+                with timer.phase("ann index"):
+                    self._build_ann_index()
+                with timer.phase("neighbor table"):
+                    self._load_neighbor_table()
+                if self.chroma_client is not None:
+                    with timer.phase("vector database"):
+                        self.sync_vector_db()
+                if self.snapshot_path:
+                    with timer.phase("write snapshot"):
+                        self.save_snapshot(self.snapshot_path)
+            rss_overlap = rss_bytes()
+            
+            # New requests see the new state from here on
+            self._state = state
+            del previous
+            gc.collect()
+            rss_after = rss_bytes()
+            
+            self.last_reload = {
+                "version": state.version,
+                "num_movies": len(state.df),
+                "seconds": time.perf_counter() - start_time,
+                "phases": timer.phases,
+                "overlap_mb": (rss_overlap - rss_before) / 2**20,
+                "released_mb": (rss_overlap - rss_after) / 2**20,
+                "rss_mb": rss_after / 2**20
+            }
+        logger.info(f"Reloaded {self.last_reload['num_movies']} movies (version {state.version}) in "
+                    f"{self.last_reload['seconds']:.2f}s: {self.last_reload['overlap_mb']:+.0f} MiB while both "
+                    f"catalogs were resident, {self.last_reload['released_mb']:.0f} MiB released after the swap")
+        return self.last_reload
+    
+    def watch_catalog(self, interval: float = 5.0) -> CatalogWatcher:
+        """
+        Reload in the background whenever the content of ``data_path`` changes.
+        
+        Args:
+            interval: Seconds between checks of the file's size and mtime
+            
+        Returns:
+            The running watcher (also kept as ``self.watcher``)
+        """
+        self.stop_watching()
+        self.watcher = CatalogWatcher(self.data_path, self.reload, interval, signature=self.source).start()
+        return self.watcher
+    
+    def stop_watching(self) -> None:
+        """Stop the catalog watcher, if one is running."""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+    
+    def _default_pipelines(self) -> Dict[str, Pipeline]:
+        """
+        Pipelines behind the recommendation methods.
+        
+        Candidates come from the neighbor table or ANN index when they apply,
+        else from the in-memory engine, or from ChromaDB first when
+        ``search_backend`` is "chroma". Stage budgets come from
+        ``pipeline_budgets``. Each pipeline can be replaced, re-budgeted or
+        have stages swapped through ``self.pipelines``, e.g. to profile a
+        method or serve it with cheaper stages under load.
+        """
+        def exact_candidates() -> List[CandidateGenerator]:
+            if self.search_backend == "chroma":
+                return [ChromaCandidates(), EngineCandidates()]
+            return [EngineCandidates()]
         
-        aspects = {
-            "genre": ("genre_info", "genre_embeddings"),
-            "cast": ("cast_info", "cast_embeddings"),
-            "plot": ("plot_info", "plot_embeddings")
+        pipelines = {
+            "similar": Pipeline("similar", [
+                FallbackCandidates(NeighborTableCandidates(preset="overall"), AnnCandidates(), *exact_candidates(),
+                                   name="candidates")
+            ]),
+            "hybrid": Pipeline("hybrid", [
+                FallbackCandidates(NeighborTableCandidates(), AnnCandidates(), EngineCandidates(), name="candidates")
+            ], [AspectFeatures()], WeightedScorer({"aspect_similarity": 1.0})),
+            "text": Pipeline("text", [
+                FallbackCandidates(AnnCandidates(), *exact_candidates(), name="candidates")
+            ]),
+            "genre_mix": Pipeline("genre_mix", [AttributeCandidates()], [
+                QuerySimilarityFeature("overall", "semantic"), GenreMatchFeature(), RatingBoostFeature()
+            ], WeightedScorer({"semantic": 0.4, "genre_match": 0.4, "rating_boost": 0.2})),
+            "personalized": Pipeline(
+                "personalized",
+                [SeedCandidates()],
+                [PersonalizationFeature()],
+                WeightedScorer({"similarity": 0.7, "personalization": 0.3}),
+                MMRReRanker(self.PERSONALIZED_ASPECT_WEIGHTS)
+            )
         }
+        if self.cross_encoder is not None:
+            pipelines["text_rerank"] = Pipeline("text_rerank", [
+                FallbackCandidates(AnnCandidates(), *exact_candidates(), name="candidates")
+            ], reranker=self.cross_encoder)
         
-        for aspect_name, (text_col, emb_col) in aspects.items():
-            try:
-                # Get or create collection
-                aspect_collection = self.chroma_client.get_or_create_collection(
-                    name=f"movies_{aspect_name}",
-                    embedding_function=SentenceTransformerEmbeddingFunction(self.embedding_model_name),
-                    metadata={"hnsw:space": "cosine"}
-                )
-                
-                # Check if collection is empty
-                if aspect_collection.count() == 0:
-                    logger.info(f"Populating {aspect_name} collection")
-                    
-                    # Add data in batches
-                    batch_size = 50
-                    total_movies = len(self.df)
-                    
-                    for start_idx in tqdm(range(0, total_movies, batch_size), 
-                                        desc=f"Adding {aspect_name} data"):
-                        end_idx = min(start_idx + batch_size, total_movies)
-                        batch_df = self.df.iloc[start_idx:end_idx]
-                        
-                        batch_ids = [str(i) for i in batch_df.index.tolist()]
-                        batch_embeddings = batch_df[emb_col].tolist()
-                        
-                        batch_metadatas = []
-                        for _, row in batch_df.iterrows():
-                            metadata = {
-                                "title": row["Series_Title"],
-                                "genre": row["Genre"],
-                                "director": row["Director"],
-                                "stars": ", ".join(filter(None, [row["Star1"], row["Star2"], 
-                                                            row["Star3"], row["Star4"]]))
-                            }
-                            batch_metadatas.append(metadata)
-                        
-                        aspect_collection.add(
-                            ids=batch_ids,
-                            embeddings=batch_embeddings,
-                            metadatas=batch_metadatas
-                        )
-                else:
-                    logger.info(f"{aspect_name.capitalize()} collection already populated")
-                    
-            except Exception as e:
-                logger.error(f"Error creating {aspect_name} collection: {e}")
-                raise
+        for name, budgets in self.pipeline_budgets.items():
+            if name in pipelines:
+                stage_budgets = {stage: budget_ms for stage, budget_ms in budgets.items() if stage != "total"}
+                pipelines[name] = pipelines[name].with_budgets(stage_budgets, budgets.get("total"))
+        return pipelines
+    
+    def run_pipeline(self, name: str, request: PipelineRequest) -> PipelineResult:
+        """Run one of ``self.pipelines`` against the current indexes, logging its stage timings."""
+        result = self.pipelines[name].run(self, request)
+        if logger.isEnabledFor(logging.DEBUG):
+            stages = ", ".join(f"{stage} {stage_ms:.1f} ms" for stage, stage_ms in result.timings.items())
+            logger.debug(f"Pipeline {name}: {len(result.rows)} results in {result.total_ms:.1f} ms ({stages})")
+        return result
+    
+    def pipeline_stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Per-stage latency of every pipeline (see ``Pipeline.stats``), to find the stage that burns the time."""
+        return {name: pipeline.stats() for name, pipeline in self.pipelines.items()}
+    
+    def _filter_mask(self, filters: Union[MovieFilter, Dict[str, Any], None]) -> Optional[np.ndarray]:
+        """
+        Boolean mask of the movies a filter allows, cached per distinct filter.
+        
+        Args:
+            filters: MovieFilter, dict of its fields, or None
+            
+        Returns:
+            Read-only mask, or None if nothing is filtered
+        """
+        movie_filter = MovieFilter.coerce(filters)
+        if movie_filter is None:
+            return None
+        mask = self._filter_masks.get(movie_filter.key())
+        if mask is None:
+            mask = movie_filter.mask(self.attribute_index)
+            mask.flags.writeable = False
+            self._filter_masks.put(movie_filter.key(), mask)
+        return mask
     
-    def get_similar_movies(self, movie_name: str, k: int = 5) -> List[Dict[str, Any]]:
+    def _expand_scores(self, scores: np.ndarray, candidate_rows: Optional[np.ndarray]) -> np.ndarray:
+        """Scores of the candidate rows spread over the whole catalog, -inf for every other movie."""
+        if candidate_rows is None:
+            return scores
+        expanded = np.full(scores.shape[:-1] + (self.scoring_engine.num_movies,), -np.inf, dtype=np.float32)
+        expanded[..., candidate_rows] = scores
+        return expanded
+    
+    @on_serving_state
+    def get_similar_movies(self, movie_name: str, k: int = 5,
+                           filters: Union[MovieFilter, Dict[str, Any], None] = None) -> List[Dict[str, Any]]:
         """
         Find movies similar to the given movie using semantic search.
         
         Args:
             movie_name: Name of the movie to find similar movies to
             k: Number of similar movies to return
+            filters: Only return movies matching this MovieFilter (or dict of its fields)
             
         Returns:
             List of dictionaries containing similar movie information
         """
         try:
-            # Find the movie in the dataframe
-            movie_info = self.df[self.df["Series_Title"] == movie_name]
+            mask = self._filter_mask(filters)
+            
+            # Find the movie in the catalog index
+            movie_idx = self.catalog_index.find(movie_name)
             
-            if movie_info.empty:
+            if movie_idx is None:
                 logger.warning(f"Movie '{movie_name}' not found in the database")
                 return []
             
-            movie_info = movie_info.iloc[0]
-            query_embedding = movie_info["embeddings"]
-            
-            # Retrieve similar movies with metadata
-            results = self.movie_db.query(
-                query_embeddings=[query_embedding],
-                n_results=k+1,  # +1 because the movie itself will be in results
-                include=["metadatas", "distances"]
-            )
-            
-            # Filter out the query movie
-            similar_movies = []
-            for i, (metadata, distance) in enumerate(zip(results["metadatas"][0], results["distances"][0])):
-                if metadata["title"] != movie_name:
-                    metadata["similarity_score"] = 1 - distance  # Convert distance to similarity score
-                    similar_movies.append(metadata)
-            
-            # Return top k results
-            return similar_movies[:k]
+            # Neighbor table, ANN index, vector database or exact search, whichever applies first
+            result = self.run_pipeline("similar", PipelineRequest(k, {"overall": 1.0}, row=movie_idx, mask=mask))
+            return self.result_columns.hydrate(result.rows, similarity_score=result.feature("similarity")).to_dicts()
             
         except Exception as e:
             logger.error(f"Error finding similar movies: {e}")
             return []
     
+    @on_serving_state
     def hybrid_content_based_search(self, 
                                    movie_name: str, 
                                    k: int = 5,
-                                   aspect_weights: Dict[str, float] = None) -> List[Dict[str, Any]]:
+                                   aspect_weights: Dict[str, float] = None,
+                                   filters: Union[MovieFilter, Dict[str, Any], None] = None) -> List[Dict[str, Any]]:
         """
         Advanced hybrid search using multiple aspects of movies with weighted scores.
         
@@ -382,6 +745,7 @@ class MovieRecommender:
             movie_name: Name of the movie to find similar movies to
             k: Number of similar movies to return
             aspect_weights: Dictionary of weights for different aspects (plot, genre, cast, etc.)
+            filters: Only return movies matching this MovieFilter (or dict of its fields)
             
         Returns:
             List of dictionaries containing similar movie information
@@ -396,241 +760,305 @@ class MovieRecommender:
             }
         
         try:
-            # Find the movie in the dataframe
-            movie_info = self.df[self.df["Series_Title"] == movie_name]
+            mask = self._filter_mask(filters)
             
-            if movie_info.empty:
+            # Find the movie in the catalog index
+            movie_idx = self.catalog_index.find(movie_name)
+            
+            if movie_idx is None:
                 logger.warning(f"Movie '{movie_name}' not found in the database")
                 return []
             
-            movie_info = movie_info.iloc[0]
-            
-            # Get movie index
-            movie_idx = movie_info.name
-            
-            # Calculate similarities for each aspect
-            results = {}
-            scores = {}
-            
-            # Overall similarity (main embeddings)
-            main_emb = movie_info["embeddings"]
-            # MAIN QUERY - remove 'ids' from include list
-            main_results = self.movie_db.query(
-                query_embeddings=[main_emb],
-                n_results=50,
-                include=["metadatas", "distances"]  # REMOVED 'ids' FROM HERE
+            # Retrieve candidates, then score them exactly on every aspect
+            result = self.run_pipeline("hybrid", PipelineRequest(k, aspect_weights, row=movie_idx, mask=mask))
+            weighted = result.aspect_weighted
+            if weighted is None:
+                weighted = self.scoring_engine.weighted_scores_for(movie_idx, result.rows, aspect_weights)
+            aspect_scores = self.scoring_engine.aspect_score_dicts(
+                weighted, self.scoring_engine.weight_vector(aspect_weights)
             )
             
-            # Map distances to ids for each aspect
-            for i, movie_id in enumerate(main_results["ids"][0]):
-                movie_id = int(movie_id)
-                if movie_id != movie_idx:  # Skip the query movie
-                    distance = main_results["distances"][0][i]
-                    similarity = 1 - distance
-                    scores[movie_id] = {"overall": similarity * aspect_weights["overall"]}
-            
-            # Get aspect-specific similarities if collections exist
-            aspects = {
-                "genre": "genre_embeddings",
-                "plot": "plot_embeddings",
-                "cast": "cast_embeddings"
-            }
-            
-            for aspect, emb_col in aspects.items():
-                try:
-                    aspect_collection = self.chroma_client.get_collection(name=f"movies_{aspect}")
-                    aspect_emb = movie_info[emb_col]
-                    
-                    aspect_results = aspect_collection.query(
-                        query_embeddings=[aspect_emb],
-                        n_results=50,
-                        include=["distances"]
-                    )
-                    
-                    for i, movie_id in enumerate(aspect_results["ids"][0]):
-                        movie_id = int(movie_id)
-                        if movie_id != movie_idx:  # Skip the query movie
-                            distance = aspect_results["distances"][0][i]
-                            similarity = 1 - distance
-                            
-                            if movie_id not in scores:
-                                scores[movie_id] = {"overall": 0.0}
-                            
-                            scores[movie_id][aspect] = similarity * aspect_weights[aspect]
-                except Exception:
-                    logger.warning(f"Aspect collection for {aspect} not found, skipping")
-            
-            # Calculate total scores
-            total_scores = []
-            for movie_id, aspect_scores in scores.items():
-                total_score = sum(aspect_scores.values())
-                total_scores.append((movie_id, total_score))
-            
-            # Sort by total score
-            total_scores.sort(key=lambda x: x[1], reverse=True)
-            
             # Get top k results with detailed metadata
-            top_movies = []
-            for movie_id, score in total_scores[:k]:
-                movie_data = self.df.iloc[movie_id]
-                movie_info = {
-                    "title": movie_data["Series_Title"],
-                    "year": str(movie_data["Released_Year"]),
-                    "genre": movie_data["Genre"],
-                    "director": movie_data["Director"],
-                    "stars": ", ".join([movie_data["Star1"], movie_data["Star2"], movie_data["Star3"], movie_data["Star4"]]),
-                    "imdb_rating": float(movie_data["IMDB_Rating"]),
-                    "similarity_score": score,
-                    "aspect_scores": scores[movie_id]
-                }
-                top_movies.append(movie_info)
-            
-            return top_movies
+            return self.result_columns.hydrate(result.rows, aspect_scores, similarity_score=result.scores).to_dicts()
             
         except Exception as e:
             logger.error(f"Error in hybrid search: {e}")
             return []
     
+    @property
+    def profile_store(self) -> ProfileStore:
+        """Persistent user profile store, opened on first use."""
+        if self._profile_store is None:
+            self._profile_store = ProfileStore(self.profile_store_path, self._movie_features)
+        return self._profile_store
+    
+    def _movie_features(self, titles: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Profile features of movies by title (None for titles not in the catalog)."""
+        movie_rows = self.catalog_index.find_many(titles)
+        rows = np.array([row for row in movie_rows if row is not None], dtype=np.int64)
+        vectors = iter(self.scoring_engine.rows_vectors(rows).transpose(1, 0, 2)) if len(rows) else iter([])
+        index = self.attribute_index
+        imdb_ratings = self.df["IMDB_Rating"].to_numpy()
+        
+        features = []
+        for row in movie_rows:
+            if row is None:
+                features.append(None)
+                continue
+            features.append({
+                "genres": [index.genre_vocab[code] for code in index.genre_codes[row] if code >= 0],
+                "actors": [index.star_vocab[code] for code in index.star_codes[row] if code >= 0],
+                "directors": [index.director_vocab[code] for code in [index.director_codes[row]] if code >= 0],
+                "decade": int(index.decades[row]),
+                "imdb_rating": float(imdb_ratings[row]),
+                "vector": next(vectors)
+            })
+        return features
+    
+    @on_serving_state
+    def record_watch(self, user_id: str, title: str, rating: Optional[float] = None) -> None:
+        """
+        Log that a user watched (and optionally rated) a movie.
+        
+        Args:
+            user_id: Unique user identifier
+            title: Watched movie title
+            rating: User rating on a 0-10 scale (the IMDB rating is used if omitted)
+        """
+        self.profile_store.record_event(user_id, title, rating)
+    
+    @on_serving_state
+    def record_rating(self, user_id: str, title: str, rating: float) -> None:
+        """
+        Log a user's rating of a movie, replacing the weight of their earlier watch of it.
+    
+        Args:
+            user_id: Unique user identifier
+            title: Rated movie title
+            rating: User rating on a 0-10 scale
+        """
+        self.profile_store.record_rating(user_id, title, rating)
+    
+    def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Profile of a user from the persistent store, or None for unknown users."""
+        return self.profile_store.profile(user_id)
+    
+    @on_serving_state
     def get_personalized_recommendations(self, 
-                                        user_profile: Dict[str, Any], 
+                                        user_profile: Optional[Dict[str, Any]] = None, 
                                         k: int = 5,
-                                        diversity_factor: float = 0.3) -> List[Dict[str, Any]]:
+                                        diversity_factor: float = 0.3,
+                                        seed_aggregation: str = "max",
+                                        mmr_lambda: float = 0.7,
+                                        candidate_pool: int = 500,
+                                        user_id: Optional[str] = None,
+                                        filters: Union[MovieFilter, Dict[str, Any], None] = None) -> List[Dict[str, Any]]:
         """
         Generate personalized movie recommendations based on user profile.
         
+        All recently watched movies are scored against the whole catalog in one
+        batched pass, so latency grows with catalog size, not with history length.
+        
         Args:
             user_profile: Dictionary containing user preferences
             k: Number of recommendations to return
             diversity_factor: Factor to control recommendation diversity (0-1)
+            seed_aggregation: How to combine per-seed similarity: "max" takes the closest
+                watched movie, "mean" weights watched movies by recency, "taste" scores
+                against the profile's taste vector as a single query
+            mmr_lambda: Relevance/novelty trade-off of the maximal marginal relevance
+                re-ranking (1.0 disables diversification)
+            candidate_pool: Number of top-scored movies the re-ranker chooses from
+            user_id: Read the user's stored profile aggregates (keys of ``user_profile``
+                take precedence)
+            filters: Only return movies matching this MovieFilter (or dict of its fields)
             
         Returns:
             List of dictionaries containing recommended movie information
         """
         try:
-            # Extract user preferences
-            liked_genres = set(user_profile.get("liked_genres", []))
-            favorite_actors = set(user_profile.get("favorite_actors", []))
-            recent_watches = user_profile.get("recent_watches", [])
-            preferred_decades = set(user_profile.get("preferred_decades", []))
-            min_rating = user_profile.get("min_rating", 6.0)
-            
-            # Get candidate recommendations based on recently watched movies
-            candidate_movies = {}
-            
-            for movie in recent_watches:
-                # Use hybrid search for better recommendations
-                similar_movies = self.hybrid_content_based_search(
-                    movie, 
-                    k=10,
-                    aspect_weights={
-                        "overall": 0.3,
-                        "genre": 0.4,
-                        "plot": 0.2,
-                        "cast": 0.1
-                    }
-                )
-                
-                # Add to candidates with similarity score
-                for movie_info in similar_movies:
-                    title = movie_info["title"]
-                    if title not in recent_watches and title not in candidate_movies:
-                        # Calculate a personalization score
-                        personalization_score = 0.0
-                        
-                        # Genre matching
-                        movie_genres = set(movie_info["genre"].split(", "))
-                        genre_overlap = len(movie_genres.intersection(liked_genres))
-                        if genre_overlap > 0:
-                            personalization_score += 0.3 * (genre_overlap / len(movie_genres))
-                        
-                        # Actor matching
-                        movie_actors = set(movie_info["stars"].split(", "))
-                        actor_overlap = len(movie_actors.intersection(favorite_actors))
-                        if actor_overlap > 0:
-                            personalization_score += 0.2 * (actor_overlap / len(movie_actors))
-                        
-                        # Rating threshold
-                        if movie_info["imdb_rating"] >= min_rating:
-                            personalization_score += 0.1 * (movie_info["imdb_rating"] / 10.0)
-                        
-                        # Decade preference (if available)
-                        if "year" in movie_info:
-                            decade = (int(movie_info["year"]) // 10) * 10
-                            if decade in preferred_decades:
-                                personalization_score += 0.1
-                        
-                        # Combine similarity and personalization
-                        combined_score = (movie_info["similarity_score"] * (1 - diversity_factor) + 
-                                         personalization_score * diversity_factor)
-                        
-                        candidate_movies[title] = {
-                            **movie_info,
-                            "combined_score": combined_score
-                        }
-            
-            # Sort by combined score
-            sorted_candidates = sorted(
-                candidate_movies.values(), 
-                key=lambda x: x["combined_score"], 
-                reverse=True
-            )
-            
-            # Apply diversity filtering to ensure variety in recommendations
-            diverse_recommendations = []
-            genres_added = set()
-            
-            for movie in sorted_candidates:
-                movie_genres = set(movie["genre"].split(", "))
-                
-                # Add movie if it introduces new genres or if we need more recommendations
-                if len(diverse_recommendations) < k * 0.6 or len(genres_added.intersection(movie_genres)) < 2:
-                    diverse_recommendations.append(movie)
-                    genres_added.update(movie_genres)
-                
-                if len(diverse_recommendations) >= k:
-                    break
+            mask = self._filter_mask(filters)
+            user_profile = self._resolve_profile(user_profile, user_id)
+            seed_rows = self._seed_rows(user_profile)
+            if not seed_rows:
+                return []
             
-            return diverse_recommendations
+            # Every allowed movie is scored against the watch history, all seeds at once
+            # (recent_watches is most recent first, so "mean" decays with position),
+            # blended with the profile features and diversified
+            request = self._personalized_request(user_profile, seed_rows, k, diversity_factor, seed_aggregation,
+                                                 mmr_lambda, candidate_pool, mask)
+            return self._personalized_results(request, self.run_pipeline("personalized", request))
             
         except Exception as e:
             logger.error(f"Error generating personalized recommendations: {e}")
             return []
     
-    def get_recommendations_by_text_query(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+    def _resolve_profile(self, user_profile: Optional[Dict[str, Any]], user_id: Optional[str]) -> Dict[str, Any]:
+        """Explicit profile merged over the user's stored profile."""
+        if user_id is not None:
+            stored_profile = self.profile_store.profile(user_id) or {}
+            user_profile = {**stored_profile, **(user_profile or {})}
+        return user_profile or {}
+    
+    def _seed_rows(self, user_profile: Dict[str, Any]) -> List[int]:
+        """Catalog rows of a profile's recently watched movies."""
+        return [row for row in self.catalog_index.find_many(user_profile.get("recent_watches", [])) if row is not None]
+    
+    def _taste_query(self, user_profile: Dict[str, Any], seed_rows: List[int]) -> np.ndarray:
+        """``(aspects, dim)`` taste vector of a profile, from its seeds if the profile has none."""
+        taste_vector = user_profile.get("taste_vector")
+        if taste_vector is None:
+            taste_vector = self.scoring_engine.taste_vector(seed_rows)
+        return np.asarray(taste_vector, dtype=np.float32)
+    
+    @staticmethod
+    def _recency_weights(num_seeds: int) -> np.ndarray:
+        return 1.0 / np.arange(1, num_seeds + 1)
+    
+    def _personalized_request(self,
+                              user_profile: Dict[str, Any],
+                              seed_rows: List[int],
+                              k: int,
+                              diversity_factor: float,
+                              seed_aggregation: str,
+                              mmr_lambda: float,
+                              candidate_pool: int,
+                              mask: Optional[np.ndarray],
+                              **params) -> PipelineRequest:
+        """Personalized pipeline request of a resolved profile; watched movies are never recommended."""
+        watched = [row for title in user_profile.get("recent_watches", []) for row in self.catalog_index.find_all(title)]
+        return PipelineRequest(
+            k,
+            self.PERSONALIZED_ASPECT_WEIGHTS,
+            query_vectors=self._taste_query(user_profile, seed_rows) if seed_aggregation == "taste" else None,
+            mask=mask,
+            exclude=watched,
+            profile=user_profile,
+            seed_rows=seed_rows,
+            seed_aggregation=seed_aggregation,
+            seed_weights=self._recency_weights(len(seed_rows)),
+            feature_weights={"similarity": 1 - diversity_factor, "personalization": diversity_factor},
+            mmr_lambda=mmr_lambda,
+            candidate_pool=candidate_pool,
+            **params
+        )
+    
+    def _personalized_results(self, request: PipelineRequest, result: PipelineResult) -> List[Dict[str, Any]]:
+        """Hydrate a personalized pipeline result, with its per-aspect breakdown computed for the selected movies only."""
+        if request.params["seed_aggregation"] == "taste":
+            weighted = self.scoring_engine.query_aspect_scores(
+                request.query_vectors, result.rows, self.PERSONALIZED_ASPECT_WEIGHTS
+            )
+        else:
+            weighted = self.scoring_engine.seed_aspect_scores(
+                request.params["seed_rows"], result.rows, self.PERSONALIZED_ASPECT_WEIGHTS,
+                request.params["seed_aggregation"], request.params["seed_weights"]
+            )
+        aspect_scores = self.scoring_engine.aspect_score_dicts(
+            weighted, self.scoring_engine.weight_vector(self.PERSONALIZED_ASPECT_WEIGHTS)
+        )
+        return self.result_columns.hydrate(
+            result.rows, aspect_scores, similarity_score=result.feature("similarity"), combined_score=result.scores
+        ).to_dicts()
+    
+    def _encode_query(self, text: str) -> np.ndarray:
+        """Encode a query (or a list of queries) with the embedding model."""
+        return self.embedding_model.encode(text)
+    
+    def _save_store_array(self, name: str, array: np.ndarray, **info) -> None:
+        """
+        Persist an auxiliary array with the serving embedding store.
+        
+        States share the store directory, so only the current state writes, and
+        never during a reload: a request still running on a replaced state (or
+        racing the reload's own store write) keeps its array in memory only.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            if current_state(self) is self._state:
+                self.embedding_store.save_array(name, array, **info)
+        finally:
+            self._reload_lock.release()
+    
+    def _genre_query_embedding(self, genres: List[str]) -> Optional[np.ndarray]:
+        """
+        Genre-mix query vector composed from precomputed per-genre query embeddings.
+        
+        Each genre in the catalog is encoded once as "Movies with genres: <genre>"
+        (and persisted with the embedding store); a mix is the normalized mean of
+        its genres' vectors, so genre-mix requests never run the transformer.
+        
+        Returns:
+            Query vector, or None if a genre is not in the catalog vocabulary
+        """
+        if self._genre_query_vectors is None:
+            vocab = self.attribute_index.genre_vocab
+            stored = self.embedding_store.load_array("genre_queries")
+            if stored is not None and stored[1].get("genres") == vocab:
+                vectors = stored[0]
+            else:
+                logger.info(f"Encoding {len(vocab)} genre query vectors")
+                vectors = l2_normalize(self.embedding_model.encode([f"Movies with genres: {g}" for g in vocab]))
+                self._save_store_array("genre_queries", vectors, genres=vocab)
+            self._genre_query_vectors = dict(zip(vocab, vectors))
+        
+        if not genres or any(genre not in self._genre_query_vectors for genre in genres):
+            return None
+        return l2_normalize(np.mean([self._genre_query_vectors[genre] for genre in genres], axis=0))
+    
+    @on_serving_state
+    def get_recommendations_by_text_query(self, query: str, k: int = 5,
+                                          filters: Union[MovieFilter, Dict[str, Any], None] = None,
+                                          rerank: Optional[bool] = None) -> List[Dict[str, Any]]:
         """
         Generate recommendations based on natural language query.
         
         Args:
             query: Natural language query text (e.g., "action movies with car chases")
             k: Number of recommendations to return
+            filters: Only return movies matching this MovieFilter (or dict of its fields)
+            rerank: Re-rank the top candidates with the cross-encoder (default: whenever
+                one is configured); re-ranked results carry a rerank_score (left out when
+                the pipeline ran out of budget before re-ranking)
             
         Returns:
             List of dictionaries containing recommended movie information
         """
         try:
-            # Generate embedding for the query text
-            query_embedding = self.embedding_model.encode(query)
-            
-            # Search in the vector database
-            results = self.movie_db.query(
-                query_embeddings=[query_embedding],
-                n_results=k,
-                include=["metadatas", "distances"]
-            )
+            mask = self._filter_mask(filters)
+            
+            # Generate embedding for the query text (cached across requests)
+            query_embedding = self.query_cache.encode(query)
             
-            # Format results
-            recommendations = []
-            for i, (metadata, distance) in enumerate(zip(results["metadatas"][0], results["distances"][0])):
-                metadata["relevance_score"] = 1 - distance
-                recommendations.append(metadata)
+            # ANN index, vector database or exact search, whichever applies first
+            request = PipelineRequest(k, {"overall": 1.0}, query_vectors=self._overall_queries(query_embedding[None])[0],
+                                      mask=mask, query=query)
+            if rerank is None:
+                rerank = self.cross_encoder is not None
+            if rerank and self.cross_encoder is None:
+                logger.warning("No cross-encoder configured (rerank_model), returning bi-encoder results")
+                rerank = False
+            if not rerank:
+                result = self.run_pipeline("text", request)
+                return self.result_columns.hydrate(result.rows, relevance_score=result.feature("similarity")).to_dicts()
             
-            return recommendations
+            # Retrieve the top N by bi-encoder similarity and re-rank them with the cross-encoder
+            request.params["num_candidates"] = self.cross_encoder.top_n.n
+            result = self.run_pipeline("text_rerank", request)
+            scores = {"relevance_score": result.feature("similarity")}
+            if "rerank_score" in result.features:
+                scores["rerank_score"] = result.features["rerank_score"]
+            return self.result_columns.hydrate(result.rows, **scores).to_dicts()
             
         except Exception as e:
             logger.error(f"Error in text query search: {e}")
             return []
     
-    def recommend_by_genre_mix(self, genres: List[str], k: int = 5, min_rating: float = 7.0) -> List[Dict[str, Any]]:
+    @on_serving_state
+    def recommend_by_genre_mix(self, genres: List[str], k: int = 5, min_rating: float = 7.0,
+                               filters: Union[MovieFilter, Dict[str, Any], None] = None) -> List[Dict[str, Any]]:
         """
         Recommend movies based on a mix of genres.
         
@@ -638,6 +1066,7 @@ class MovieRecommender:
             genres: List of genres to include
             k: Number of recommendations to return
             min_rating: Minimum IMDB rating threshold
+            filters: Only return movies matching this MovieFilter (or dict of its fields)
             
         Returns:
             List of dictionaries containing recommended movie information
@@ -646,49 +1075,293 @@ class MovieRecommender:
             # Create a query string from genres
             query_text = f"Movies with genres: {', '.join(genres)}"
             
-            # Generate embedding for the query
-            query_embedding = self.embedding_model.encode(query_text)
+            # Compose the query from per-genre vectors, falling back to the cached encoder
+            query_embedding = self._genre_query_embedding(genres)
+            if query_embedding is None:
+                query_embedding = self.query_cache.encode(query_text)
             
-            # Search in the vector database
-            results = self.movie_db.query(
-                query_embeddings=[query_embedding],
-                n_results=50,  # Get more to filter
-                include=["metadatas", "distances"]
-            )
-            
-            # Filter and rank results
-            recommendations = []
-            
-            for metadata, distance in zip(results["metadatas"][0], results["distances"][0]):
-                # Check if movie contains at least one of the requested genres
-                movie_genres = set(metadata["genre"].split(", "))
-                if any(genre in movie_genres for genre in genres) and metadata["imdb_rating"] >= min_rating:
-                    # Calculate genre match score
-                    genre_match_count = sum(1 for genre in genres if genre in movie_genres)
-                    genre_match_score = genre_match_count / len(genres)
-                    
-                    # Calculate combined score (semantic similarity + genre match + rating boost)
-                    semantic_score = 1 - distance
-                    rating_boost = (metadata["imdb_rating"] - min_rating) / (10 - min_rating)
-                    
-                    combined_score = (0.4 * semantic_score + 
-                                     0.4 * genre_match_score + 
-                                     0.2 * rating_boost)
-                    
-                    recommendations.append({
-                        **metadata,
-                        "combined_score": combined_score,
-                        "genre_match": genre_match_score
-                    })
-            
-            # Sort by combined score and return top k
-            recommendations.sort(key=lambda x: x["combined_score"], reverse=True)
-            return recommendations[:k]
+            # Only movies with at least one requested genre and a high enough rating are ranked,
+            # by semantic similarity, genre match and rating boost
+            request = self._genre_mix_request(genres, k, min_rating, self._filter_mask(filters),
+                                              embedding=query_embedding)
+            return self._genre_mix_results(self.run_pipeline("genre_mix", request))
             
         except Exception as e:
             logger.error(f"Error in genre mix recommendation: {e}")
             return []
     
+    @staticmethod
+    def _genre_mix_request(genres: List[str], k: int, min_rating: float, mask: Optional[np.ndarray],
+                           **params) -> PipelineRequest:
+        """Genre-mix pipeline request: movies with one of the genres and a high enough rating are candidates."""
+        return PipelineRequest(k, mask=mask, conditions={"genres_any": genres, "min_rating": min_rating},
+                               genres=genres, min_rating=min_rating, **params)
+    
+    def _genre_mix_results(self, result: PipelineResult) -> List[Dict[str, Any]]:
+        return self.result_columns.hydrate(
+            result.rows, combined_score=result.scores, genre_match=result.feature("genre_match")
+        ).to_dicts()
+    
+    @staticmethod
+    def _weighted_counts(codes: np.ndarray, weights: np.ndarray, vocab: List[Any]) -> Dict[Any, float]:
+        """
+        Sum of weights per vocabulary entry, highest first.
+        
+        Args:
+            codes: ``(movies,)`` or ``(movies, slots)`` codes into ``vocab`` (-1 is skipped)
+            weights: Weight per movie
+            vocab: Names of the codes
+            
+        Returns:
+            Dict of name to total weight, ties kept in order of first appearance
+        """
+        if len(weights) == 0:
+            return {}
+        codes = codes.reshape(len(weights), -1).astype(np.int64)
+        weights = np.broadcast_to(weights[:, None], codes.shape)
+        valid = codes >= 0
+        codes, weights = codes[valid], weights[valid]
+        if len(codes) == 0:
+            return {}
+        
+        totals = np.bincount(codes, weights=weights, minlength=len(vocab))
+        present, first_seen = np.unique(codes, return_index=True)
+        order = np.lexsort((first_seen, -totals[present]))
+        return {vocab[code]: float(totals[code]) for code in present[order]}
+    
+    @staticmethod
+    def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+        """Split an iterable (possibly a stream) into lists of at most ``size`` items."""
+        iterator = iter(items)
+        while True:
+            chunk = list(itertools.islice(iterator, size))
+            if not chunk:
+                return
+            yield chunk
+    
+    def _overall_queries(self, embeddings: np.ndarray) -> np.ndarray:
+        """``(queries, aspects, dim)`` engine queries holding free-text embeddings in the "overall" aspect."""
+        query_vectors = np.zeros((len(embeddings), len(self.scoring_engine.aspects), self.scoring_engine.dim),
+                                 dtype=np.float32)
+        query_vectors[:, self.scoring_engine.aspect_positions["overall"]] = l2_normalize(embeddings)
+        return query_vectors
+    
+    def _similar_rows_batch(self, rows: np.ndarray, k: int,
+                            mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ``(rows, k)`` neighbor rows and scores on the "overall" aspect, each seed excluded from its own list.
+        
+        Only movies allowed by ``mask`` (all if omitted) are ranked.
+        """
+        if mask is None and self.neighbor_table is not None and k <= self.neighbor_table.n_neighbors:
+            neighbors = [self.neighbor_table.neighbors("overall", row, k) for row in rows]
+            return np.array([n[0] for n in neighbors]), np.array([n[1] for n in neighbors])
+        
+        if self.ann_index is not None:
+            query_vectors = self.scoring_engine.rows_vectors(rows).transpose(1, 0, 2)
+            ids, scores = self.ann_index.search(query_vectors, {"overall": 1.0}, k + 1, mask=mask)
+            order = np.argsort(ids == rows[:, None], axis=1, kind="stable")[:, :k]
+            return np.take_along_axis(ids, order, axis=1), np.take_along_axis(scores, order, axis=1)
+        
+        return self.scoring_engine.similar_to_rows(rows, k, {"overall": 1.0},
+                                                   candidate_rows=None if mask is None else np.flatnonzero(mask))
+    
+    @on_serving_state
+    def get_similar_movies_batch(self, movie_names: Iterable[str], k: int = 5,
+                                 batch_size: int = 256,
+                                 filters: Union[MovieFilter, Dict[str, Any], None] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Batch variant of ``get_similar_movies`` for offline precompute jobs.
+        
+        Each batch of seeds is scored with one matrix-matrix product (or served
+        from the neighbor table / ANN index when available).
+        
+        Args:
+            movie_names: Names of the movies to find similar movies to
+            k: Number of similar movies per movie
+            batch_size: Seeds scored together
+            filters: Only return movies matching this MovieFilter (or dict of its fields)
+            
+        Yields:
+            One result list per movie name, in input order (empty if the movie is unknown)
+        """
+        for chunk in self._chunks(movie_names, batch_size):
+            results = [[] for _ in chunk]
+            try:
+                mask = self._filter_mask(filters)
+                movie_rows = self.catalog_index.find_many(chunk)
+                found = [i for i, row in enumerate(movie_rows) if row is not None]
+                if found:
+                    ids, scores = self._similar_rows_batch(np.array([movie_rows[i] for i in found]), k, mask)
+                    for i, row_ids, row_scores in zip(found, ids, scores):
+                        valid = (row_ids >= 0) & np.isfinite(row_scores)
+                        results[i] = self.result_columns.hydrate(
+                            row_ids[valid], similarity_score=row_scores[valid]
+                        ).to_dicts()
+            except Exception as e:
+                logger.error(f"Error finding similar movies in batch: {e}")
+            yield from results
+    
+    @on_serving_state
+    def get_recommendations_by_text_query_batch(self, queries: Iterable[str], k: int = 5,
+                                                batch_size: int = 256,
+                                                filters: Union[MovieFilter, Dict[str, Any], None] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Batch variant of ``get_recommendations_by_text_query``.
+        
+        Uncached queries of a batch are encoded in one transformer call and scored
+        with one matrix-matrix product.
+        
+        Args:
+            queries: Natural language query texts
+            k: Number of recommendations per query
+            batch_size: Queries encoded and scored together
+            filters: Only return movies matching this MovieFilter (or dict of its fields)
+            
+        Yields:
+            One result list per query, in input order
+        """
+        for chunk in self._chunks(queries, batch_size):
+            results = [[] for _ in chunk]
+            try:
+                mask = self._filter_mask(filters)
+                query_vectors = self._overall_queries(self.query_cache.encode_many(chunk))
+                if self.ann_index is not None:
+                    ids, scores = self.ann_index.search(query_vectors, {"overall": 1.0}, k, mask=mask)
+                else:
+                    ids, scores = self.scoring_engine.search_batch(
+                        query_vectors, k, {"overall": 1.0}, candidate_rows=None if mask is None else np.flatnonzero(mask)
+                    )
+                
+                valid = (ids >= 0) & np.isfinite(scores)
+                results = [
+                    self.result_columns.hydrate(row_ids[row_valid], relevance_score=row_scores[row_valid]).to_dicts()
+                    for row_ids, row_scores, row_valid in zip(ids, scores, valid)
+                ]
+            except Exception as e:
+                logger.error(f"Error in batch text query search: {e}")
+            yield from results
+    
+    @on_serving_state
+    def recommend_by_genre_mix_batch(self, genre_lists: Iterable[List[str]], k: int = 5, min_rating: float = 7.0,
+                                     batch_size: int = 256,
+                                     filters: Union[MovieFilter, Dict[str, Any], None] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Batch variant of ``recommend_by_genre_mix``.
+        
+        Semantic similarity of every mix in a batch is one matrix-matrix product;
+        eligibility, genre match and rating boost are then applied per mix.
+        
+        Args:
+            genre_lists: Genre mixes
+            k: Number of recommendations per mix
+            min_rating: Minimum IMDB rating threshold
+            batch_size: Mixes scored together
+            filters: Only return movies matching this MovieFilter (or dict of its fields)
+            
+        Yields:
+            One result list per genre mix, in input order
+        """
+        # Semantic similarity comes from the batched product instead of per-mix scoring
+        pipeline = self.pipelines["genre_mix"].with_stage("semantic", PrecomputedFeature("semantic"))
+        for chunk in self._chunks(genre_lists, batch_size):
+            results = [[] for _ in chunk]
+            try:
+                mask = self._filter_mask(filters)
+                candidate_rows = None if mask is None else np.flatnonzero(mask)
+                
+                # Compose queries from per-genre vectors, encoding the rest in one call
+                embeddings = [self._genre_query_embedding(genres) for genres in chunk]
+                missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+                if missing:
+                    encoded = self.query_cache.encode_many(
+                        [f"Movies with genres: {', '.join(chunk[i])}" for i in missing]
+                    )
+                    for i, embedding in zip(missing, encoded):
+                        embeddings[i] = embedding
+                semantic = self._expand_scores(
+                    self.scoring_engine.score_batch(self._overall_queries(np.stack(embeddings)), {"overall": 1.0},
+                                                    candidate_rows),
+                    candidate_rows
+                )
+                
+                for i, genres in enumerate(chunk):
+                    request = self._genre_mix_request(genres, k, min_rating, mask, semantic=semantic[i])
+                    results[i] = self._genre_mix_results(pipeline.run(self, request))
+            except Exception as e:
+                logger.error(f"Error in batch genre mix recommendation: {e}")
+            yield from results
+    
+    @on_serving_state
+    def get_personalized_recommendations_batch(self,
+                                               user_profiles: Optional[Iterable[Dict[str, Any]]] = None,
+                                               k: int = 5,
+                                               diversity_factor: float = 0.3,
+                                               seed_aggregation: str = "max",
+                                               mmr_lambda: float = 0.7,
+                                               candidate_pool: int = 500,
+                                               user_ids: Optional[Iterable[str]] = None,
+                                               batch_size: int = 64,
+                                               filters: Union[MovieFilter, Dict[str, Any], None] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Batch variant of ``get_personalized_recommendations``.
+        
+        The watch histories of a batch of users are scored against the catalog in
+        one matrix-matrix product per aspect (memory grows with the batch's total
+        seeds times the catalog size, so keep ``batch_size`` moderate).
+        
+        Args:
+            user_profiles: User profiles (ignored when ``user_ids`` is given)
+            k: Number of recommendations per user
+            diversity_factor: Factor to control recommendation diversity (0-1)
+            seed_aggregation: "max", "mean" or "taste", as in the single-user method
+            mmr_lambda: Relevance/novelty trade-off of the re-ranking
+            candidate_pool: Number of top-scored movies the re-ranker chooses from
+            user_ids: Read profiles from the persistent profile store instead
+            batch_size: Users scored together
+            filters: Only return movies matching this MovieFilter (or dict of its fields)
+            
+        Yields:
+            One result list per user, in input order
+        """
+        # Candidates come from the batched history scoring instead of per-user scoring
+        pipeline = self.pipelines["personalized"].with_stage("seeds", PrecomputedCandidates("similarity"))
+        items = user_ids if user_ids is not None else user_profiles
+        for chunk in self._chunks(items, batch_size):
+            results = [[] for _ in chunk]
+            try:
+                mask = self._filter_mask(filters)
+                candidate_rows = None if mask is None else np.flatnonzero(mask)
+                profiles = [self._resolve_profile(None, item) if user_ids is not None else item for item in chunk]
+                seeds = [self._seed_rows(profile) for profile in profiles]
+                active = [i for i, seed_rows in enumerate(seeds) if seed_rows]
+                
+                if not active or (candidate_rows is not None and len(candidate_rows) == 0):
+                    similarities = []
+                elif seed_aggregation == "taste":
+                    similarities = self._expand_scores(self.scoring_engine.score_batch(
+                        np.stack([self._taste_query(profiles[i], seeds[i]) for i in active]),
+                        self.PERSONALIZED_ASPECT_WEIGHTS,
+                        candidate_rows
+                    ), candidate_rows)
+                else:
+                    similarities = self._expand_scores(self.scoring_engine.score_seed_groups(
+                        [seeds[i] for i in active],
+                        self.PERSONALIZED_ASPECT_WEIGHTS,
+                        aggregation=seed_aggregation,
+                        seed_weights=[self._recency_weights(len(seeds[i])) for i in active],
+                        candidate_rows=candidate_rows
+                    ), candidate_rows)
+                
+                for i, similarity in zip(active, similarities):
+                    request = self._personalized_request(profiles[i], seeds[i], k, diversity_factor, seed_aggregation,
+                                                         mmr_lambda, candidate_pool, mask, similarity=similarity)
+                    results[i] = self._personalized_results(request, pipeline.run(self, request))
+            except Exception as e:
+                logger.error(f"Error generating personalized recommendations in batch: {e}")
+            yield from results
+    
+    @on_serving_state
     def build_user_profile(self, 
                       user_id: str,
                       watched_movies: List[str],
@@ -727,70 +1400,42 @@ class MovieRecommender:
                     if key in user_profile:
                         user_profile[key] = value
             
-            # Initialize counters
-            genre_counts = {}
-            actor_counts = {}
-            director_counts = {}
-            decade_counts = {}
+            # Resolve watched movies to catalog rows, keeping history order and repeats
+            movie_rows = self.catalog_index.find_many(watched_movies)
+            valid_movies = [movie for movie, row in zip(watched_movies, movie_rows) if row is not None]
+            rows = np.array([row for row in movie_rows if row is not None], dtype=np.int64)
             
-            # Process watched movies
-            valid_movies = []
+            # Get user rating or default to IMDB rating if not provided, normalized to 0-1
+            imdb_ratings = self.df["IMDB_Rating"].to_numpy()[rows]
+            if ratings:
+                imdb_ratings = [ratings.get(movie, rating) for movie, rating in zip(valid_movies, imdb_ratings)]
+            rating_weights = np.asarray(imdb_ratings, dtype=np.float64) / 10.0
             
-            for movie in watched_movies:
-                movie_info = self.df[self.df["Series_Title"] == movie]
-                
-                if not movie_info.empty:
-                    movie_info = movie_info.iloc[0]
-                    valid_movies.append(movie)
-                    
-                    # Get user rating or default to IMDB rating if not provided
-                    user_rating = ratings.get(movie, movie_info["IMDB_Rating"]) if ratings else movie_info["IMDB_Rating"]
-                    rating_weight = user_rating / 10.0  # Normalize to 0-1
-                    
-                    # Update genre preferences
-                    for genre in movie_info["Genre"].split(", "):
-                        if genre in genre_counts:
-                            genre_counts[genre] += rating_weight
-                        else:
-                            genre_counts[genre] = rating_weight
-                    
-                    # Update actor preferences
-                    for actor in [movie_info["Star1"], movie_info["Star2"], movie_info["Star3"], movie_info["Star4"]]:
-                        if actor and actor != "Unknown":
-                            if actor in actor_counts:
-                                actor_counts[actor] += rating_weight
-                            else:
-                                actor_counts[actor] = rating_weight
-                    
-                    # Update director preferences
-                    director = movie_info["Director"]
-                    if director and director != "Unknown":
-                        if director in director_counts:
-                            director_counts[director] += rating_weight
-                        else:
-                            director_counts[director] = rating_weight
-                    
-                    # Update decade preferences
-                    decade = (int(movie_info["Released_Year"]) // 10) * 10
-                    if decade in decade_counts:
-                        decade_counts[decade] += rating_weight
-                    else:
-                        decade_counts[decade] = rating_weight
-            
-            # Sort by counts and select top preferences
-            user_profile["genre_preferences"] = dict(sorted(genre_counts.items(), key=lambda x: x[1], reverse=True))
-            user_profile["actor_preferences"] = dict(sorted(actor_counts.items(), key=lambda x: x[1], reverse=True))
-            user_profile["director_preferences"] = dict(sorted(director_counts.items(), key=lambda x: x[1], reverse=True))
+            # Weighted counts of integer-coded attributes, one bincount each
+            index = self.attribute_index
+            genre_counts = self._weighted_counts(index.genre_codes[rows], rating_weights, index.genre_vocab)
+            actor_counts = self._weighted_counts(index.star_codes[rows], rating_weights, index.star_vocab)
+            director_counts = self._weighted_counts(index.director_codes[rows], rating_weights, index.director_vocab)
+            decades, decade_codes = np.unique(index.decades[rows], return_inverse=True)
+            decade_counts = self._weighted_counts(decade_codes, rating_weights, decades.tolist())
+            
+            # Preferences come ordered by weight
+            user_profile["genre_preferences"] = genre_counts
+            user_profile["actor_preferences"] = actor_counts
+            user_profile["director_preferences"] = director_counts
             
             # Select top-rated items for simplified lists
             user_profile["liked_genres"] = list(user_profile["genre_preferences"].keys())[:5]
             user_profile["favorite_actors"] = list(user_profile["actor_preferences"].keys())[:5]
-            user_profile["preferred_decades"] = [decade for decade, count in 
-                                                sorted(decade_counts.items(), key=lambda x: x[1], reverse=True)[:3]]
+            user_profile["preferred_decades"] = list(decade_counts.keys())[:3]
             
             # Add recent watches (most recent first, limited to 10)
             user_profile["recent_watches"] = valid_movies[-10:][::-1]
             
+            # Rating-weighted mean of the watched movies' aspect vectors, usable as a single query
+            if len(rows):
+                user_profile["taste_vector"] = self.scoring_engine.taste_vector(rows, rating_weights)
+            
             return user_profile
             
         except Exception as e:
@@ -0,0 +1,238 @@
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+import json
+import os
+import time
+import logging
+
+from scoring_engine import AspectScoringEngine
+
+logger = logging.getLogger(__name__)
+
+# Aspect weightings served from the table
+NEIGHBOR_PRESETS = {
+    # get_similar_movies ranks by the main description embedding only
+    "overall": {"overall": 1.0},
+    # Default weights of hybrid_content_based_search
+    "hybrid": {"overall": 0.4, "genre": 0.3, "plot": 0.2, "cast": 0.1},
+    # Weights used to match candidates against a watch history
+    "personalized": {"overall": 0.3, "genre": 0.4, "plot": 0.2, "cast": 0.1}
+}
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _top_neighbors(engine: AspectScoringEngine,
+                   rows: np.ndarray,
+                   weights: np.ndarray,
+                   n_neighbors: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact top-N neighbors of ``rows`` over the whole catalog, best first."""
+    scores = np.zeros((len(rows), engine.num_movies), dtype=np.float32)
+    for a, weight in enumerate(weights):
+        if weight != 0:
+            scores += weight * engine.aspect_dot(a, engine.aspect_vectors(a, rows).T).T
+    scores[np.arange(len(rows)), rows] = -np.inf
+
+    n = min(n_neighbors, engine.num_movies - 1)
+    top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+class NeighborTable:
+    """
+    Precomputed item-to-item neighbors for fixed aspect weightings.
+
+    For every preset the table holds a ``(movies, n_neighbors)`` int32 array of
+    neighbor rows and a float16 array of their blended scores, best first, so
+    serving a "similar movies" request is an array slice.
+    """
+
+    def __init__(self, path: str, manifest: Dict, arrays: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                 row_hashes: Optional[np.ndarray] = None):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+        self.row_hashes = row_hashes
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, MANIFEST_FILE))
+
+    @classmethod
+    def open(cls, path: str) -> "NeighborTable":
+        """Open a persisted table with memory-mapped neighbor arrays."""
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        arrays = {
+            preset: (np.load(os.path.join(path, f"{preset}.ids.npy"), mmap_mode="r"),
+                     np.load(os.path.join(path, f"{preset}.scores.npy"), mmap_mode="r"))
+            for preset in manifest["presets"]
+        }
+        row_hashes = np.load(os.path.join(path, "row_hashes.npy"))
+        return cls(path, manifest, arrays, row_hashes)
+
+    @classmethod
+    def build(cls,
+              path: str,
+              engine: AspectScoringEngine,
+              data_hash: str,
+              row_hashes: np.ndarray,
+              presets: Optional[Dict[str, Dict[str, float]]] = None,
+              n_neighbors: int = 50,
+              block_size: int = 1024) -> "NeighborTable":
+        """
+        Compute neighbors for every movie and preset from scratch.
+
+        Args:
+            path: Directory to persist the table to
+            engine: Scoring engine holding the aspect matrices
+            data_hash: Content hash of the embedding store the table is built from
+            row_hashes: ``(aspects, movies)`` content hashes used for incremental updates
+            presets: Mapping of preset name to aspect weights (defaults to NEIGHBOR_PRESETS)
+            n_neighbors: Neighbors kept per movie
+            block_size: Rows scored per matrix product
+        """
+        presets = presets or NEIGHBOR_PRESETS
+        start_time = time.time()
+        arrays = {}
+
+        for preset, aspect_weights in presets.items():
+            weights = engine.weight_vector(aspect_weights)
+            ids_blocks, score_blocks = [], []
+            for start_idx in range(0, engine.num_movies, block_size):
+                rows = np.arange(start_idx, min(start_idx + block_size, engine.num_movies))
+                ids, scores = _top_neighbors(engine, rows, weights, n_neighbors)
+                ids_blocks.append(ids.astype(np.int32))
+                score_blocks.append(scores.astype(np.float16))
+            arrays[preset] = (np.vstack(ids_blocks), np.vstack(score_blocks))
+
+        logger.info(f"Built neighbor table for {engine.num_movies} movies x {len(presets)} presets "
+                    f"in {time.time() - start_time:.2f}s")
+        return cls._save(path, arrays, presets, data_hash, row_hashes, n_neighbors)
+
+    @classmethod
+    def _save(cls, path: str, arrays: Dict[str, Tuple[np.ndarray, np.ndarray]],
+              presets: Dict[str, Dict[str, float]], data_hash: str,
+              row_hashes: np.ndarray, n_neighbors: int) -> "NeighborTable":
+        os.makedirs(path, exist_ok=True)
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+        for preset, (ids, scores) in arrays.items():
+            for suffix, array in (("ids", ids), ("scores", scores)):
+                tmp_path = os.path.join(path, f"{preset}.{suffix}.tmp.npy")
+                np.save(tmp_path, np.ascontiguousarray(array))
+                os.replace(tmp_path, os.path.join(path, f"{preset}.{suffix}.npy"))
+        tmp_path = os.path.join(path, "row_hashes.tmp.npy")
+        np.save(tmp_path, row_hashes)
+        os.replace(tmp_path, os.path.join(path, "row_hashes.npy"))
+
+        manifest = {
+            "data_hash": data_hash,
+            "num_rows": int(row_hashes.shape[1]),
+            "n_neighbors": int(n_neighbors),
+            "presets": presets,
+            "created_at": time.time()
+        }
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        return cls.open(path)
+
+    @property
+    def n_neighbors(self) -> int:
+        return self.manifest["n_neighbors"]
+
+    def is_current(self, data_hash: str) -> bool:
+        return self.manifest.get("data_hash") == data_hash
+
+    def update(self, engine: AspectScoringEngine, data_hash: str, row_hashes: np.ndarray,
+               block_size: int = 1024) -> "NeighborTable":
+        """
+        Bring the table in line with a changed embedding store.
+
+        Only rows whose embeddings changed, and rows that lost a neighbor to such
+        a change, are recomputed in full. Every other row merges its existing
+        neighbors with scores against the changed rows.
+
+        Returns:
+            The updated table (rebuilt from scratch if rows were removed)
+        """
+        presets = self.manifest["presets"]
+        n_neighbors = self.n_neighbors
+        old_rows = self.manifest["num_rows"]
+        num_rows = row_hashes.shape[1]
+
+        if num_rows < old_rows or self.row_hashes is None or self.row_hashes.shape[0] != row_hashes.shape[0]:
+            logger.info("Catalog shrank or changed shape, rebuilding neighbor table")
+            return NeighborTable.build(self.path, engine, data_hash, row_hashes, presets, n_neighbors, block_size)
+
+        changed = np.ones(num_rows, dtype=bool)
+        changed[:old_rows] = (self.row_hashes != row_hashes[:, :old_rows]).any(axis=0)
+        changed_rows = np.flatnonzero(changed)
+        logger.info(f"Updating neighbor table: {len(changed_rows)} of {num_rows} movies changed")
+
+        arrays = {}
+        for preset, aspect_weights in presets.items():
+            weights = engine.weight_vector(aspect_weights)
+            old_ids, old_scores = self.arrays[preset]
+            ids = np.zeros((num_rows, old_ids.shape[1]), dtype=np.int32)
+            scores = np.zeros((num_rows, old_ids.shape[1]), dtype=np.float16)
+            ids[:old_rows], scores[:old_rows] = old_ids, old_scores
+
+            # Rows whose own vector changed, or whose neighbor list lost an entry, need a full pass
+            kept = ~changed[ids[:old_rows]]
+            recompute = changed.copy()
+            recompute[:old_rows] |= ~kept.all(axis=1)
+
+            # Remaining rows only need to consider the changed movies as new neighbors
+            merge_rows = np.flatnonzero(~recompute)
+            for start_idx in range(0, len(merge_rows), block_size):
+                rows = merge_rows[start_idx:start_idx + block_size]
+                new_scores = np.zeros((len(rows), len(changed_rows)), dtype=np.float32)
+                for a, weight in enumerate(weights):
+                    if weight != 0:
+                        new_scores += weight * (engine.aspect_vectors(a, rows) @
+                                                engine.aspect_vectors(a, changed_rows).T)
+
+                all_ids = np.hstack([ids[rows], np.broadcast_to(changed_rows, new_scores.shape)])
+                all_scores = np.hstack([scores[rows].astype(np.float32), new_scores])
+                order = np.argsort(-all_scores, axis=1, kind="stable")[:, :ids.shape[1]]
+                ids[rows] = np.take_along_axis(all_ids, order, axis=1)
+                scores[rows] = np.take_along_axis(all_scores, order, axis=1)
+
+            full_rows = np.flatnonzero(recompute)
+            for start_idx in range(0, len(full_rows), block_size):
+                rows = full_rows[start_idx:start_idx + block_size]
+                block_ids, block_scores = _top_neighbors(engine, rows, weights, n_neighbors)
+                ids[rows], scores[rows] = block_ids, block_scores
+
+            arrays[preset] = (ids, scores)
+
+        return NeighborTable._save(self.path, arrays, presets, data_hash, row_hashes, n_neighbors)
+
+    def preset_for(self, aspect_weights: Dict[str, float], tolerance: float = 1e-6) -> Optional[str]:
+        """Name of the preset with the same aspect weights, if any."""
+        for preset, weights in self.manifest["presets"].items():
+            aspects = set(weights) | set(aspect_weights)
+            if all(abs(weights.get(a, 0.0) - aspect_weights.get(a, 0.0)) <= tolerance for a in aspects):
+                return preset
+        return None
+
+    def neighbors(self, preset: str, row: int, k: int,
+                  exclude: Optional[Sequence[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k precomputed neighbors of a movie.
+
+        Returns:
+            Tuple of (neighbor row positions, float32 scores), best first
+        """
+        ids, scores = self.arrays[preset]
+        row_ids = np.asarray(ids[row])
+        row_scores = np.asarray(scores[row], dtype=np.float32)
+        if exclude is not None and len(exclude):
+            keep = ~np.isin(row_ids, exclude)
+            row_ids, row_scores = row_ids[keep], row_scores[keep]
+        return row_ids[:k], row_scores[:k]
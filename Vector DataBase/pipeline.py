@@ -0,0 +1,745 @@
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from abc import ABC, abstractmethod
+import copy
+import threading
+import time
+import logging
+
+from scoring_engine import mmr_rerank, top_k_indices
+
+logger = logging.getLogger(__name__)
+
+# Candidates a generator returns: row positions and named features aligned with them
+Generated = Tuple[np.ndarray, Dict[str, np.ndarray]]
+
+
+class PipelineRequest:
+    """One request flowing through a pipeline."""
+
+    def __init__(self, k: int,
+                 aspect_weights: Optional[Dict[str, float]] = None,
+                 row: Optional[int] = None,
+                 query_vectors: Optional[np.ndarray] = None,
+                 mask: Optional[np.ndarray] = None,
+                 exclude: Optional[Sequence[int]] = None,
+                 **params):
+        """
+        Args:
+            k: Number of results
+            aspect_weights: Weights per aspect of the request's similarity
+            row: Catalog row of the query movie (similar-movie requests)
+            query_vectors: Normalized ``(aspects, dim)`` query (free-text and taste requests)
+            mask: Boolean mask of the movies that may be returned (None: all)
+            exclude: Rows never returned
+            **params: Stage-specific inputs (seed rows, genres, user profile, ...)
+        """
+        self.k = k
+        self.aspect_weights = aspect_weights or {"overall": 1.0}
+        self.row = row
+        self.query_vectors = query_vectors
+        self.mask = mask
+        self.exclude = [int(row) for row in exclude] if exclude is not None else []
+        self.params = params
+
+
+class CandidateSet:
+    """Candidate rows of a request, with one array per feature aligned with the rows."""
+
+    def __init__(self):
+        self.rows = np.empty(0, dtype=np.int64)
+        self.features: Dict[str, np.ndarray] = {}
+        self.aspect_weighted: Optional[np.ndarray] = None
+        self.scores: Optional[np.ndarray] = None
+        self.selected: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, rows: np.ndarray, features: Dict[str, np.ndarray]) -> None:
+        """
+        Merge generated candidates, keeping first-seen order.
+
+        A row generated twice keeps the best value of each feature; features a
+        generator does not produce are NaN for its rows.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(self.rows):
+            self.rows = rows
+            self.features = {name: np.asarray(values) for name, values in features.items()}
+            return
+
+        all_rows = np.concatenate([self.rows, rows])
+        unique, first_seen = np.unique(all_rows, return_index=True)
+        order = np.argsort(first_seen, kind="stable")
+        position = np.empty(len(unique), dtype=np.int64)
+        position[order] = np.arange(len(unique))
+        target = position[np.searchsorted(unique, all_rows)]
+
+        merged = {}
+        for name in list(self.features) + [name for name in features if name not in self.features]:
+            old = self.features.get(name, np.full(len(self.rows), np.nan))
+            new = features.get(name, np.full(len(rows), np.nan))
+            values = np.full(len(unique), np.nan)
+            np.fmax.at(values, target, np.concatenate([old, new]).astype(np.float64))
+            merged[name] = values
+        self.rows = unique[order]
+        self.features = merged
+        self.aspect_weighted = None
+
+
+class Stage(ABC):
+    """
+    A pipeline stage.
+
+    Every stage has a name (used for timings and to swap it out), an optional
+    time budget in milliseconds, and can be marked required so it still runs
+    after the pipeline has terminated early. Subclasses implement ``run``.
+    """
+
+    default_name = "stage"
+
+    def __init__(self, name: Optional[str] = None, budget_ms: Optional[float] = None, required: bool = False):
+        self.name = name or self.default_name
+        self.budget_ms = budget_ms
+        self.required = required
+
+    @abstractmethod
+    def run(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> None:
+        """Update the candidate set in place."""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(name={self.name!r}, budget_ms={self.budget_ms})"
+
+
+class CandidateGenerator(Stage):
+    """Adds candidate rows (and the features it scored them with) to the set; subclasses implement ``generate``."""
+
+    default_name = "candidates"
+
+    def __init__(self, n: Optional[int] = None, **kwargs):
+        """
+        Args:
+            n: Candidates to generate (the request's ``num_candidates`` parameter,
+                else its k, if omitted)
+        """
+        super().__init__(**kwargs)
+        self.n = n
+
+    def size(self, request: PipelineRequest) -> int:
+        return self.n or request.params.get("num_candidates") or request.k
+
+    @abstractmethod
+    def generate(self, state: Any, request: PipelineRequest) -> Optional[Generated]:
+        """Candidate rows and features, or None if the generator does not apply to the request."""
+
+    def run(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> None:
+        generated = self.generate(state, request)
+        if generated is not None:
+            candidates.add(*generated)
+
+
+def _allowed_rows(num_movies: int, request: PipelineRequest, extra_exclude: Sequence[int] = ()) -> np.ndarray:
+    """Sorted rows a request may return."""
+    allowed = np.ones(num_movies, dtype=bool) if request.mask is None else np.array(request.mask, dtype=bool)
+    excluded = list(request.exclude) + list(extra_exclude)
+    if excluded:
+        allowed[np.asarray(excluded, dtype=np.int64)] = False
+    return np.flatnonzero(allowed)
+
+
+class FallbackCandidates(CandidateGenerator):
+    """The first of several generators that applies to the request (e.g. neighbor table, then ANN, then exact)."""
+
+    def __init__(self, *generators: CandidateGenerator, **kwargs):
+        kwargs.setdefault("name", "|".join(generator.name for generator in generators))
+        super().__init__(**kwargs)
+        self.generators = list(generators)
+
+    def generate(self, state: Any, request: PipelineRequest) -> Optional[Generated]:
+        for generator in self.generators:
+            generated = generator.generate(state, request)
+            if generated is not None:
+                return generated
+        return None
+
+
+class NeighborTableCandidates(CandidateGenerator):
+    """Precomputed neighbors of the query movie (unfiltered requests only)."""
+
+    default_name = "neighbor_table"
+
+    def __init__(self, preset: Optional[str] = None, **kwargs):
+        """
+        Args:
+            preset: Neighbor table preset (the one matching the request's aspect weights if omitted)
+        """
+        super().__init__(**kwargs)
+        self.preset = preset
+
+    def generate(self, state: Any, request: PipelineRequest) -> Optional[Generated]:
+        table = state.neighbor_table
+        if table is None or request.row is None or request.mask is not None or request.exclude:
+            return None
+        preset = self.preset or table.preset_for(request.aspect_weights)
+        if preset is None or self.size(request) > table.n_neighbors:
+            return None
+        rows, scores = table.neighbors(preset, request.row, self.size(request))
+        return rows, {"similarity": scores}
+
+
+class AnnCandidates(CandidateGenerator):
+    """
+    Nearest neighbors from the ANN index (large catalogs only).
+
+    With single-aspect weights (e.g. ``{"plot": 1.0}``) this retrieves on one
+    aspect, so several instances give per-aspect candidate generation.
+    """
+
+    default_name = "ann"
+
+    def __init__(self, aspect_weights: Optional[Dict[str, float]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.aspect_weights = aspect_weights
+
+    def generate(self, state: Any, request: PipelineRequest) -> Optional[Generated]:
+        if state.ann_index is None:
+            return None
+        aspect_weights = self.aspect_weights or request.aspect_weights
+        if request.row is not None:
+            rows, scores, _ = state.ann_index.similar_to_row(request.row, self.size(request), aspect_weights,
+                                                             exclude=request.exclude, mask=request.mask)
+            return rows, {"similarity": scores}
+        ids, scores = state.ann_index.search(request.query_vectors, aspect_weights, self.size(request),
+                                             exclude=request.exclude, mask=request.mask)
+        found = ids[0] >= 0
+        return ids[0][found], {"similarity": scores[0][found]}
+
+
+class EngineCandidates(CandidateGenerator):
+    """Exact top movies from the scoring engine, ranking only the rows the request allows."""
+
+    default_name = "exact"
+
+    def __init__(self, aspect_weights: Optional[Dict[str, float]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.aspect_weights = aspect_weights
+
+    def generate(self, state: Any, request: PipelineRequest) -> Optional[Generated]:
+        engine = state.scoring_engine
+        if engine is None:
+            return None
+        aspect_weights = self.aspect_weights or request.aspect_weights
+        candidate_rows = None
+        if request.mask is not None or request.exclude:
+            candidate_rows = _allowed_rows(engine.num_movies, request)
+
+        if request.row is not None:
+            rows, scores, _ = engine.similar_to_row(request.row, self.size(request), aspect_weights,
+                                                    candidate_rows=candidate_rows)
+        else:
+            ids, scores = engine.search_batch(request.query_vectors[None], self.size(request), aspect_weights,
+                                              candidate_rows=candidate_rows)
+            rows, scores = ids[0], scores[0]
+        found = np.isfinite(scores)
+        return rows[found], {"similarity": scores[found]}
+
+
+class ChromaCandidates(CandidateGenerator):
+    """Nearest neighbors from the main ChromaDB collection (unfiltered "overall" requests only)."""
+
+    default_name = "vector_db"
+
+    def generate(self, state: Any, request: PipelineRequest) -> Optional[Generated]:
+        active = {aspect for aspect, weight in request.aspect_weights.items() if weight}
+        if request.mask is not None or request.exclude or active != {"overall"}:
+            return None
+
+        n = self.size(request)
+        if request.row is not None:
+            query_embedding = state.embedding_store.row("overall", request.row)
+            n += 1  # the movie itself will be in the results
+        else:
+            query_embedding = request.query_vectors[state.scoring_engine.aspect_positions["overall"]]
+        results = state.movie_db.query(query_embeddings=[np.asarray(query_embedding).tolist()], n_results=n,
+                                       include=["distances"])
+
+        # Convert ids to rows and distances to similarity scores
+        rows = np.array([state.catalog_index.row_for_id(movie_id) for movie_id in results["ids"][0]], dtype=np.int64)
+        similarity = 1 - np.asarray(results["distances"][0], dtype=np.float64)
+        keep = np.flatnonzero(rows != request.row)[:self.size(request)]
+        return rows[keep], {"similarity": similarity[keep]}
+
+
+class AttributeCandidates(CandidateGenerator):
+    """Every allowed movie matching the attribute conditions in ``params["conditions"]``."""
+
+    default_name = "attributes"
+
+    def generate(self, state: Any, request: PipelineRequest) -> Optional[Generated]:
+        matching = state.attribute_index.filter(**request.params.get("conditions", {}))
+        rows = _allowed_rows(len(matching), request)
+        return rows[matching[rows]], {}
+
+
+class SeedCandidates(CandidateGenerator):
+    """
+    Every allowed movie scored against a watch history.
+
+    Uses ``params["seed_rows"]`` aggregated with ``params["seed_aggregation"]``
+    ("max" or "mean", weighted by ``params["seed_weights"]``), or the
+    ``query_vectors`` taste query for the "taste" aggregation.
+    """
+
+    default_name = "seeds"
+
+    def __init__(self, aspect_weights: Optional[Dict[str, float]] = None, **kwargs):
+        """
+        Args:
+            aspect_weights: Weights per aspect (the request's if omitted)
+            n: Keep only the n most similar movies (all scored movies if omitted)
+        """
+        super().__init__(**kwargs)
+        self.aspect_weights = aspect_weights
+
+    def size(self, request: PipelineRequest) -> Optional[int]:
+        return self.n
+
+    def generate(self, state: Any, request: PipelineRequest) -> Optional[Generated]:
+        engine = state.scoring_engine
+        aspect_weights = self.aspect_weights or request.aspect_weights
+        candidate_rows = None if request.mask is None else np.flatnonzero(request.mask)
+        if candidate_rows is not None and len(candidate_rows) == 0:
+            return None
+
+        if request.params.get("seed_aggregation") == "taste":
+            similarity = engine.score_batch(request.query_vectors[None], aspect_weights, candidate_rows)[0]
+        else:
+            similarity, _ = engine.score_seeds(
+                request.params["seed_rows"],
+                aspect_weights,
+                aggregation=request.params.get("seed_aggregation", "max"),
+                seed_weights=request.params.get("seed_weights"),
+                candidate_rows=candidate_rows
+            )
+        rows = np.arange(engine.num_movies) if candidate_rows is None else candidate_rows
+        if self.n is not None:
+            top = top_k_indices(similarity, self.n)
+            rows, similarity = rows[top], similarity[top]
+        return rows, {"similarity": similarity}
+
+
+class PrecomputedCandidates(CandidateGenerator):
+    """Movies with a finite score in a precomputed whole-catalog array, e.g. from a batched product."""
+
+    default_name = "precomputed"
+
+    def __init__(self, feature: str = "similarity", param: Optional[str] = None, **kwargs):
+        """
+        Args:
+            feature: Feature the scores are stored as
+            param: Request parameter holding the ``(movies,)`` scores (``feature`` if omitted)
+        """
+        super().__init__(**kwargs)
+        self.feature = feature
+        self.param = param or feature
+
+    def generate(self, state: Any, request: PipelineRequest) -> Optional[Generated]:
+        scores = np.asarray(request.params[self.param])
+        rows = np.flatnonzero(np.isfinite(scores))
+        return rows, {self.feature: scores[rows]}
+
+
+class FeatureStage(Stage):
+    """Computes named features of every candidate; subclasses implement ``compute``."""
+
+    default_name = "features"
+
+    @abstractmethod
+    def compute(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> Dict[str, np.ndarray]:
+        """Named feature arrays aligned with the candidate rows."""
+
+    def run(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> None:
+        candidates.features.update(self.compute(state, request, candidates))
+
+
+class AspectFeatures(FeatureStage):
+    """
+    Exact weighted aspect similarity of every candidate to the query movie, seeds or query vectors.
+
+    Adds the blended ``aspect_similarity`` feature and keeps the per-aspect
+    breakdown on the candidate set.
+    """
+
+    default_name = "aspect_features"
+
+    def __init__(self, aspect_weights: Optional[Dict[str, float]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.aspect_weights = aspect_weights
+
+    def compute(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> Dict[str, np.ndarray]:
+        engine = state.scoring_engine
+        aspect_weights = self.aspect_weights or request.aspect_weights
+        if request.row is not None:
+            weighted = engine.weighted_scores_for(request.row, candidates.rows, aspect_weights)
+        elif request.query_vectors is not None:
+            weighted = engine.query_aspect_scores(request.query_vectors, candidates.rows, aspect_weights)
+        else:
+            weighted = engine.seed_aspect_scores(request.params["seed_rows"], candidates.rows, aspect_weights,
+                                                 request.params.get("seed_aggregation", "max"),
+                                                 request.params.get("seed_weights"))
+        candidates.aspect_weighted = weighted
+        return {"aspect_similarity": weighted.sum(axis=0)}
+
+
+class QuerySimilarityFeature(FeatureStage):
+    """Similarity of every candidate to the raw query embedding in ``params["embedding"]`` on one aspect."""
+
+    default_name = "semantic"
+
+    def __init__(self, aspect: str = "overall", feature: str = "semantic", **kwargs):
+        kwargs.setdefault("name", feature)
+        super().__init__(**kwargs)
+        self.aspect = aspect
+        self.feature = feature
+
+    def compute(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> Dict[str, np.ndarray]:
+        return {self.feature: state.scoring_engine.query_similarity(self.aspect, request.params["embedding"],
+                                                                    rows=candidates.rows)}
+
+
+class PrecomputedFeature(FeatureStage):
+    """A feature read from a precomputed whole-catalog array in the request parameters."""
+
+    def __init__(self, feature: str, param: Optional[str] = None, **kwargs):
+        kwargs.setdefault("name", feature)
+        super().__init__(**kwargs)
+        self.feature = feature
+        self.param = param or feature
+
+    def compute(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> Dict[str, np.ndarray]:
+        return {self.feature: np.asarray(request.params[self.param])[candidates.rows]}
+
+
+class GenreMatchFeature(FeatureStage):
+    """Share of the requested genres (``params["genres"]``) each candidate has."""
+
+    default_name = "genre_match"
+
+    def compute(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> Dict[str, np.ndarray]:
+        genres = request.params["genres"]
+        return {"genre_match": state.attribute_index.genre_overlap(genres)[candidates.rows] / len(genres)}
+
+
+class RatingBoostFeature(FeatureStage):
+    """IMDB rating above ``params["min_rating"]``, scaled to 0-1."""
+
+    default_name = "rating_boost"
+
+    def compute(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> Dict[str, np.ndarray]:
+        min_rating = request.params.get("min_rating", 0.0)
+        ratings = state.attribute_index.ratings[candidates.rows]
+        return {"rating_boost": (ratings - min_rating) / (10 - min_rating)}
+
+
+class PersonalizationFeature(FeatureStage):
+    """Match of every candidate with the liked genres, favorite actors, minimum rating and decades of ``params["profile"]``."""
+
+    default_name = "personalization"
+
+    def compute(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> Dict[str, np.ndarray]:
+        index = state.attribute_index
+        user_profile = request.params["profile"]
+        liked_genres = set(user_profile.get("liked_genres", []))
+        favorite_actors = set(user_profile.get("favorite_actors", []))
+        preferred_decades = set(user_profile.get("preferred_decades", []))
+        min_rating = user_profile.get("min_rating", 6.0)
+
+        personalization = np.zeros(len(index.ratings), dtype=np.float64)
+
+        # Genre matching
+        personalization += 0.3 * index.genre_overlap(liked_genres) / np.maximum(index.genre_counts, 1)
+
+        # Actor matching (distinct stars per movie, as in a set of names)
+        personalization += 0.2 * index.star_overlap(favorite_actors) / index.distinct_star_counts
+
+        # Rating threshold
+        ratings = index.ratings.astype(np.float64)
+        personalization += np.where(ratings >= min_rating, 0.1 * (ratings / 10.0), 0.0)
+
+        # Decade preference
+        personalization += 0.1 * np.isin(index.decades, list(preferred_decades))
+        return {"personalization": personalization[candidates.rows]}
+
+
+class WeightedScorer(Stage):
+    """
+    Scores candidates as a weighted sum of features.
+
+    ``params["feature_weights"]`` overrides the configured weights per request.
+    Missing values (a feature a candidate was not scored on, or a feature stage
+    skipped after early termination) count as 0; if no weighted feature was
+    computed at all, candidates keep their retrieval ``similarity``. Excluded
+    rows score -inf.
+    """
+
+    default_name = "scorer"
+
+    def __init__(self, weights: Dict[str, float], **kwargs):
+        kwargs.setdefault("required", True)
+        super().__init__(**kwargs)
+        self.weights = weights
+
+    @staticmethod
+    def _values(candidates: CandidateSet, feature: str) -> Optional[np.ndarray]:
+        values = candidates.features.get(feature)
+        if values is not None and np.isnan(values).any():
+            values = np.where(np.isnan(values), 0.0, values)
+        return values
+
+    def run(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> None:
+        scores = None
+        for feature, weight in request.params.get("feature_weights", self.weights).items():
+            values = self._values(candidates, feature)
+            if values is not None:
+                scores = weight * values if scores is None else scores + weight * values
+        if scores is None:
+            similarity = self._values(candidates, "similarity")
+            scores = np.zeros(len(candidates)) if similarity is None else np.array(similarity, dtype=np.float64)
+        if request.exclude:
+            scores[np.isin(candidates.rows, request.exclude)] = -np.inf
+        candidates.scores = scores
+
+
+class TopKReRanker(Stage):
+    """The k best scored candidates."""
+
+    default_name = "top_k"
+
+    def run(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> None:
+        top = top_k_indices(candidates.scores, request.k)
+        candidates.selected = top[np.isfinite(candidates.scores[top])]
+
+
+class MMRReRanker(Stage):
+    """
+    Maximal marginal relevance over the best scored candidates.
+
+    ``params["candidate_pool"]`` and ``params["mmr_lambda"]`` override the
+    configured pool size and relevance/novelty trade-off per request.
+    """
+
+    default_name = "mmr"
+
+    def __init__(self, aspect_weights: Dict[str, float], candidate_pool: int = 500, mmr_lambda: float = 0.7,
+                 **kwargs):
+        """
+        Args:
+            aspect_weights: Weights per aspect of the candidates' pairwise similarity
+            candidate_pool: Number of top-scored candidates the re-ranker chooses from
+            mmr_lambda: Relevance/novelty trade-off (1.0 disables diversification)
+        """
+        super().__init__(**kwargs)
+        self.aspect_weights = aspect_weights
+        self.candidate_pool = candidate_pool
+        self.mmr_lambda = mmr_lambda
+
+    def run(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> None:
+        scores = candidates.scores
+        pool = top_k_indices(scores, max(request.k, request.params.get("candidate_pool", self.candidate_pool)))
+        pool = pool[np.isfinite(scores[pool])]
+        pairwise = state.scoring_engine.pairwise_similarity(candidates.rows[pool], self.aspect_weights)
+        candidates.selected = pool[mmr_rerank(scores[pool], pairwise, request.k,
+                                              request.params.get("mmr_lambda", self.mmr_lambda))]
+
+
+class PipelineResult:
+    """Selected rows of a pipeline run with their scores, features and stage timings."""
+
+    __slots__ = ("rows", "scores", "features", "aspect_weighted", "timings", "skipped", "terminated_by", "total_ms")
+
+    def __init__(self, candidates: CandidateSet, timings: Dict[str, float], skipped: List[str],
+                 terminated_by: Optional[str], total_ms: float):
+        selected = candidates.selected if candidates.selected is not None else np.empty(0, dtype=np.int64)
+        self.rows = candidates.rows[selected]
+        self.scores = candidates.scores[selected] if candidates.scores is not None else np.empty(0)
+        self.features = {name: values[selected] for name, values in candidates.features.items()}
+        self.aspect_weighted = (candidates.aspect_weighted[:, selected]
+                                if candidates.aspect_weighted is not None else None)
+        self.timings = timings
+        self.skipped = skipped
+        self.terminated_by = terminated_by
+        self.total_ms = total_ms
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def feature(self, name: str) -> np.ndarray:
+        """Values of a feature for the selected rows (NaN if it was not computed, e.g. its stage was skipped)."""
+        return self.features.get(name, np.full(len(self.rows), np.nan))
+
+
+class Pipeline:
+    """
+    Staged recommendation pipeline: candidate generators, feature stages, a scorer and a re-ranker.
+
+    Generators run in order and their candidates are merged; feature stages add
+    features to every candidate; the scorer blends them and the re-ranker picks
+    the final k. Every stage is timed. When a stage runs over its budget (or the
+    run over ``total_budget_ms``) the pipeline terminates early: the remaining
+    stages are skipped unless required (the scorer always runs) and, if the
+    re-ranker was skipped, the best scored candidates are returned as they are.
+    Budgets are checked between stages, so a stage is never interrupted.
+
+    Pipelines are immutable configurations: ``with_stage`` and ``with_budgets``
+    return modified copies, e.g. to swap in a cheaper stage under load.
+    """
+
+    def __init__(self, name: str,
+                 generators: List[CandidateGenerator],
+                 features: Optional[List[FeatureStage]] = None,
+                 scorer: Optional[Stage] = None,
+                 reranker: Optional[Stage] = None,
+                 total_budget_ms: Optional[float] = None):
+        """
+        Args:
+            name: Pipeline name (in logs and stats)
+            generators: Candidate generators, run in order
+            features: Feature stages, run in order
+            scorer: Scoring stage (the generators' similarity if omitted)
+            reranker: Re-ranking stage (plain top-k if omitted)
+            total_budget_ms: Budget of the whole run
+        """
+        self.name = name
+        self.generators = list(generators)
+        self.features = list(features or [])
+        self.scorer = scorer or WeightedScorer({"similarity": 1.0})
+        self.reranker = reranker or TopKReRanker()
+        self.total_budget_ms = total_budget_ms
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def stages(self) -> List[Stage]:
+        return self.generators + self.features + [self.scorer, self.reranker]
+
+    def run(self, state: Any, request: PipelineRequest) -> PipelineResult:
+        """
+        Run the pipeline for one request.
+
+        Args:
+            state: Object serving the indexes the stages read (scoring_engine,
+                ann_index, neighbor_table, attribute_index, catalog_index, ...)
+            request: The request
+
+        Returns:
+            PipelineResult with the selected rows, best first
+        """
+        candidates = CandidateSet()
+        timings: Dict[str, float] = {}
+        skipped: List[str] = []
+        terminated_by = None
+        start_time = time.perf_counter()
+
+        for stage in self.stages:
+            if terminated_by is not None and not stage.required:
+                skipped.append(stage.name)
+                continue
+            if not isinstance(stage, CandidateGenerator) and not len(candidates):
+                break
+            stage_start = time.perf_counter()
+            stage.run(state, request, candidates)
+            stage_ms = (time.perf_counter() - stage_start) * 1000
+            timings[stage.name] = timings.get(stage.name, 0.0) + stage_ms
+
+            if terminated_by is None:
+                total_ms = (time.perf_counter() - start_time) * 1000
+                if stage.budget_ms is not None and stage_ms > stage.budget_ms:
+                    terminated_by = stage.name
+                    logger.info(f"Pipeline {self.name}: stage {stage.name} took {stage_ms:.1f} ms "
+                                f"(budget {stage.budget_ms} ms), terminating early")
+                elif self.total_budget_ms is not None and total_ms > self.total_budget_ms:
+                    terminated_by = stage.name
+                    logger.info(f"Pipeline {self.name}: {total_ms:.1f} ms after stage {stage.name} "
+                                f"(budget {self.total_budget_ms} ms), terminating early")
+
+        if len(candidates) and candidates.selected is None:
+            TopKReRanker().run(state, request, candidates)
+
+        total_ms = (time.perf_counter() - start_time) * 1000
+        self._record(timings, skipped, terminated_by, total_ms)
+        return PipelineResult(candidates, timings, skipped, terminated_by, total_ms)
+
+    def _record(self, timings: Dict[str, float], skipped: List[str], terminated_by: Optional[str],
+                total_ms: float) -> None:
+        with self._lock:
+            for name, stage_ms in list(timings.items()) + [("total", total_ms)]:
+                stats = self._stats.setdefault(name, {"runs": 0, "skipped": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                                      "terminations": 0})
+                stats["runs"] += 1
+                stats["total_ms"] += stage_ms
+                stats["max_ms"] = max(stats["max_ms"], stage_ms)
+            for name in skipped:
+                self._stats.setdefault(name, {"runs": 0, "skipped": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                              "terminations": 0})["skipped"] += 1
+            if terminated_by is not None:
+                self._stats[terminated_by]["terminations"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage runs, mean and max milliseconds, skips and early terminations (plus "total")."""
+        with self._lock:
+            return {
+                name: {**stats, "mean_ms": stats["total_ms"] / stats["runs"] if stats["runs"] else 0.0}
+                for name, stats in self._stats.items()
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def _copy(self) -> "Pipeline":
+        pipeline = copy.copy(self)
+        pipeline.generators = list(self.generators)
+        pipeline.features = list(self.features)
+        pipeline._stats = {}
+        pipeline._lock = threading.Lock()
+        return pipeline
+
+    def _stage(self, name: str) -> Stage:
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(f"Pipeline {self.name} has no stage '{name}', expected one of "
+                       f"{[stage.name for stage in self.stages]}")
+
+    def with_stage(self, name: str, stage: Stage) -> "Pipeline":
+        """Copy of the pipeline with the stage called ``name`` replaced."""
+        old = self._stage(name)
+        pipeline = self._copy()
+        pipeline.generators = [stage if existing is old else existing for existing in pipeline.generators]
+        pipeline.features = [stage if existing is old else existing for existing in pipeline.features]
+        if pipeline.scorer is old:
+            pipeline.scorer = stage
+        if pipeline.reranker is old:
+            pipeline.reranker = stage
+        return pipeline
+
+    def with_budgets(self, budgets: Dict[str, float], total_budget_ms: Optional[float] = None) -> "Pipeline":
+        """
+        Copy of the pipeline with stage budgets set.
+
+        Args:
+            budgets: Mapping of stage name to budget in milliseconds
+            total_budget_ms: Budget of the whole run (unchanged if omitted)
+        """
+        pipeline = self._copy()
+        for name, budget_ms in budgets.items():
+            stage = copy.copy(pipeline._stage(name))
+            stage.budget_ms = budget_ms
+            pipeline = pipeline.with_stage(name, stage)
+        if total_budget_ms is not None:
+            pipeline.total_budget_ms = total_budget_ms
+        return pipeline
+
+    def __repr__(self) -> str:
+        return f"Pipeline({self.name!r}, stages={[stage.name for stage in self.stages]})"
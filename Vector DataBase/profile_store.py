@@ -0,0 +1,301 @@
+import numpy as np
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Number of titles kept in a profile's recent watch list
+RECENT_WATCHES = 10
+
+# Event kinds: a watch adds a title's features, a rating re-weights an already watched title
+WATCH_EVENT = "watch"
+RATING_EVENT = "rating"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'watch',
+    rating REAL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_user ON events (user_id, seq);
+CREATE TABLE IF NOT EXISTS snapshots (
+    user_id TEXT PRIMARY KEY,
+    last_seq INTEGER NOT NULL,
+    aggregates TEXT NOT NULL,
+    taste_sum BLOB,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def empty_aggregates() -> Dict[str, Any]:
+    """Aggregates of a user without any events."""
+    return {
+        "genres": {},
+        "actors": {},
+        "directors": {},
+        "decades": {},
+        "recent_watches": [],
+        "title_weights": {},
+        "num_events": 0,
+        "taste_weight": 0.0,
+        "taste_sum": None
+    }
+
+
+def _add_weight(aggregates: Dict[str, Any], weight: float, features: Dict[str, Any]) -> None:
+    """Add ``weight`` times a movie's features to the weighted aggregates."""
+    for kind, names in (("genres", features["genres"]), ("actors", features["actors"]),
+                        ("directors", features["directors"]), ("decades", [str(features["decade"])])):
+        counts = aggregates[kind]
+        for name in names:
+            counts[name] = counts.get(name, 0.0) + weight
+
+    vector = features.get("vector")
+    if vector is not None:
+        if aggregates["taste_sum"] is None:
+            aggregates["taste_sum"] = np.zeros(vector.shape, dtype=np.float32)
+        aggregates["taste_sum"] += weight * vector
+        aggregates["taste_weight"] += weight
+
+
+def apply_event(aggregates: Dict[str, Any], title: str, weight: float, features: Dict[str, Any]) -> None:
+    """
+    Fold one watch event into a user's aggregates in place.
+
+    Args:
+        aggregates: Aggregates to update
+        title: Watched title
+        weight: Rating weight of the event (0-1)
+        features: Movie features with "genres", "actors", "directors" (name lists), "decade"
+            and optionally "vector" (``(aspects, dim)`` normalized aspect vectors)
+    """
+    _add_weight(aggregates, weight, features)
+    title_weights = aggregates["title_weights"]
+    title_weights[title] = title_weights.get(title, 0.0) + weight
+
+    recent = [title] + aggregates["recent_watches"]
+    aggregates["recent_watches"] = recent[:RECENT_WATCHES]
+    aggregates["num_events"] += 1
+
+
+def apply_rating(aggregates: Dict[str, Any], title: str, weight: float, features: Dict[str, Any]) -> None:
+    """
+    Fold one rating event into a user's aggregates in place.
+
+    The rating replaces the title's current weight (every weighted aggregate
+    moves by the difference), so rating a watched title does not count it twice
+    or add it to the recent watches again. Rating a title that was never
+    watched counts as watching it.
+
+    Args:
+        aggregates: Aggregates to update
+        title: Rated title
+        weight: Rating weight (0-1)
+        features: Movie features (see ``apply_event``)
+    """
+    title_weights = aggregates["title_weights"]
+    if title not in title_weights:
+        apply_event(aggregates, title, weight, features)
+        return
+    _add_weight(aggregates, weight - title_weights[title], features)
+    title_weights[title] = weight
+
+
+def profile_from_aggregates(user_id: str, aggregates: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    User profile in the schema of ``MovieRecommender.build_user_profile``.
+
+    Preferences are ordered by weight, ties by first appearance.
+    """
+    def ranked(counts: Dict[str, float]) -> Dict[str, float]:
+        return dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+
+    genre_preferences = ranked(aggregates["genres"])
+    actor_preferences = ranked(aggregates["actors"])
+    decade_preferences = ranked(aggregates["decades"])
+
+    profile = {
+        "user_id": user_id,
+        "recent_watches": list(aggregates["recent_watches"]),
+        "liked_genres": list(genre_preferences)[:5],
+        "favorite_actors": list(actor_preferences)[:5],
+        "preferred_decades": [int(decade) for decade in decade_preferences][:3],
+        "genre_preferences": genre_preferences,
+        "actor_preferences": actor_preferences,
+        "director_preferences": ranked(aggregates["directors"]),
+        "min_rating": 7.0,
+        "last_updated": time.time()
+    }
+    if aggregates["taste_sum"] is not None:
+        taste = aggregates["taste_sum"]
+        norms = np.maximum(np.linalg.norm(taste, axis=-1, keepdims=True), 1e-12)
+        profile["taste_vector"] = (taste / norms).astype(np.float32)
+    return profile
+
+
+class ProfileStore:
+    """
+    Persistent per-user profile aggregates backed by SQLite.
+
+    Watch and rating events are appended to an event log, which is O(1) per
+    event. A user's aggregates (genre, actor, director and decade weights,
+    recent watches and the unnormalized taste vector) live in a snapshot row;
+    reading a profile folds only the events logged since that snapshot.
+    Compaction folds pending events into the snapshots and deletes them from
+    the log, so reads never replay a full history.
+    """
+
+    def __init__(self, path: str,
+                 featurize: Callable[[List[str]], List[Optional[Dict[str, Any]]]],
+                 compact_threshold: int = 64):
+        """
+        Open (or create) a store.
+
+        Args:
+            path: SQLite database file
+            featurize: Function mapping titles to movie features (see ``apply_event``),
+                with None for titles missing from the catalog
+            compact_threshold: Pending events of a user that trigger compaction on read
+        """
+        self.path = path
+        self.featurize = featurize
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def record_event(self, user_id: str, title: str, rating: Optional[float] = None) -> None:
+        """
+        Append a watch event; ``rating`` is the user's 0-10 rating (IMDB rating if omitted).
+        """
+        self.record_events([(user_id, title, rating)])
+
+    def record_rating(self, user_id: str, title: str, rating: float) -> None:
+        """
+        Append a rating event; the 0-10 ``rating`` replaces the title's earlier weight (see ``apply_rating``).
+        """
+        self.record_events([(user_id, title, rating)], kind=RATING_EVENT)
+
+    def record_events(self, events: List[Tuple[str, str, Optional[float]]], kind: str = WATCH_EVENT) -> None:
+        """Append several ``(user_id, title, rating)`` events of one kind in one transaction."""
+        if kind not in (WATCH_EVENT, RATING_EVENT):
+            raise ValueError(f"Unknown event kind '{kind}'")
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT INTO events (user_id, title, kind, rating, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(user_id, title, kind, rating, now) for user_id, title, rating in events]
+            )
+
+    def _read_snapshot(self, user_id: str) -> Tuple[int, Dict[str, Any]]:
+        row = self._connection.execute(
+            "SELECT last_seq, aggregates, taste_sum FROM snapshots WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            return 0, empty_aggregates()
+
+        last_seq, aggregates_json, taste_blob = row
+        aggregates = json.loads(aggregates_json)
+        shape = aggregates.pop("taste_shape", None)
+        aggregates["taste_sum"] = (np.frombuffer(taste_blob, dtype=np.float32).reshape(shape).copy()
+                                   if taste_blob is not None else None)
+        return last_seq, aggregates
+
+    def _write_snapshot(self, user_id: str, last_seq: int, aggregates: Dict[str, Any]) -> None:
+        taste_sum = aggregates["taste_sum"]
+        stored = {key: value for key, value in aggregates.items() if key != "taste_sum"}
+        stored["taste_shape"] = list(taste_sum.shape) if taste_sum is not None else None
+        self._connection.execute(
+            "INSERT OR REPLACE INTO snapshots (user_id, last_seq, aggregates, taste_sum, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (user_id, last_seq, json.dumps(stored),
+             taste_sum.astype(np.float32).tobytes() if taste_sum is not None else None, time.time())
+        )
+        self._connection.execute("DELETE FROM events WHERE user_id = ? AND seq <= ?", (user_id, last_seq))
+
+    def _fold(self, user_id: str) -> Tuple[int, Dict[str, Any], int]:
+        """Snapshot aggregates with pending events applied, the last event seq and the number applied."""
+        last_seq, aggregates = self._read_snapshot(user_id)
+        pending = self._connection.execute(
+            "SELECT seq, title, kind, rating FROM events WHERE user_id = ? AND seq > ? ORDER BY seq",
+            (user_id, last_seq)
+        ).fetchall()
+        if not pending:
+            return last_seq, aggregates, 0
+
+        features = self.featurize([title for _, title, _, _ in pending])
+        for (seq, title, kind, rating), movie in zip(pending, features):
+            if movie is not None:
+                weight = (rating if rating is not None else movie["imdb_rating"]) / 10.0
+                apply = apply_rating if kind == RATING_EVENT else apply_event
+                apply(aggregates, title, weight, movie)
+        return pending[-1][0], aggregates, len(pending)
+
+    def aggregates(self, user_id: str) -> Dict[str, Any]:
+        """Current aggregates of a user, compacting them when many events are pending."""
+        with self._lock:
+            last_seq, aggregates, applied = self._fold(user_id)
+            if applied >= self.compact_threshold:
+                with self._connection:
+                    self._write_snapshot(user_id, last_seq, aggregates)
+        return aggregates
+
+    def profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Stored profile of a user, or None if the user has no events."""
+        aggregates = self.aggregates(user_id)
+        if aggregates["num_events"] == 0:
+            return None
+        return profile_from_aggregates(user_id, aggregates)
+
+    def compact(self, user_ids: Optional[List[str]] = None) -> int:
+        """
+        Fold pending events into the snapshots and drop them from the event log.
+
+        Args:
+            user_ids: Users to compact (every user with pending events if omitted)
+
+        Returns:
+            Number of events folded
+        """
+        start_time = time.time()
+        folded = 0
+        with self._lock:
+            if user_ids is None:
+                user_ids = [row[0] for row in self._connection.execute("SELECT DISTINCT user_id FROM events")]
+            with self._connection:
+                for user_id in user_ids:
+                    last_seq, aggregates, applied = self._fold(user_id)
+                    if applied:
+                        self._write_snapshot(user_id, last_seq, aggregates)
+                        folded += applied
+        logger.info(f"Compacted {folded} events of {len(user_ids)} users in {time.time() - start_time:.2f}s")
+        return folded
+
+    def snapshot(self, path: str) -> None:
+        """Write a consistent point-in-time copy of the store to ``path``."""
+        with self._lock:
+            target = sqlite3.connect(path)
+            try:
+                self._connection.backup(target)
+            finally:
+                target.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Number of users with snapshots and of events pending compaction."""
+        with self._lock:
+            users = self._connection.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+            pending = self._connection.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        return {"users": users, "pending_events": pending}
@@ -0,0 +1,162 @@
+import numpy as np
+from typing import Any, Dict, List, Optional
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Storage precisions of the aspect matrices, from exact to most compact
+PRECISIONS = ["float32", "float16", "int8"]
+
+
+class QuantizedMatrix:
+    """
+    A ``(rows, dim)`` matrix stored as float16 or as int8 codes with per-dimension scales.
+
+    Products are computed block by block: each block of rows is widened to
+    float32 just before its matrix product, so only the compressed matrix and
+    one small float32 block are ever resident.
+    """
+
+    def __init__(self, codes: np.ndarray, scales: Optional[np.ndarray] = None, block_size: int = 8192):
+        """
+        Args:
+            codes: float16 values, or int8 codes
+            scales: Per-dimension float32 scales of int8 codes
+            block_size: Rows widened to float32 per matrix product
+        """
+        self.codes = codes
+        self.scales = scales
+        self.block_size = block_size
+
+    @classmethod
+    def quantize(cls, matrix: np.ndarray, precision: str, block_size: int = 8192) -> "QuantizedMatrix":
+        """
+        Compress a float matrix.
+
+        "int8" uses symmetric scalar quantization: each dimension is scaled so its
+        largest absolute value maps to 127.
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if precision == "float16":
+            return cls(matrix.astype(np.float16), block_size=block_size)
+        if precision == "int8":
+            scales = np.abs(matrix).max(axis=0) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.clip(np.rint(matrix / scales), -127, 127).astype(np.int8)
+            return cls(codes, scales.astype(np.float32), block_size=block_size)
+        raise ValueError(f"Unknown precision '{precision}', expected 'float16' or 'int8'")
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def precision(self) -> str:
+        return "int8" if self.scales is not None else "float16"
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def dequantize(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate float32 values of the given rows (all rows if omitted)."""
+        codes = self.codes if rows is None else self.codes[rows]
+        values = codes.astype(np.float32)
+        if self.scales is not None:
+            values *= self.scales
+        return values
+
+    def dot(self, vectors: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Product of the (selected rows of the) matrix with float32 vectors.
+
+        Args:
+            vectors: ``(dim,)`` vector or ``(dim, n)`` matrix
+            rows: Only multiply these rows (all rows if omitted)
+
+        Returns:
+            ``(rows,)`` or ``(rows, n)`` float32 result
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        # Fold int8 scales into the (much smaller) right-hand side
+        if self.scales is not None:
+            vectors = vectors * (self.scales if vectors.ndim == 1 else self.scales[:, None])
+
+        codes = self.codes if rows is None else self.codes[rows]
+        result = np.empty((codes.shape[0],) + vectors.shape[1:], dtype=np.float32)
+        for start_idx in range(0, codes.shape[0], self.block_size):
+            end_idx = start_idx + self.block_size
+            result[start_idx:end_idx] = codes[start_idx:end_idx].astype(np.float32) @ vectors
+        return result
+
+
+def precision_report(aspect_matrices: Dict[str, np.ndarray],
+                     precisions: Optional[List[str]] = None,
+                     aspect_weights: Optional[Dict[str, float]] = None,
+                     k: int = 10,
+                     num_queries: int = 200,
+                     seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Memory footprint and ranking agreement of compressed scoring engines with float32.
+
+    Args:
+        aspect_matrices: Mapping of aspect name to a ``(movies, dim)`` matrix
+        precisions: Precisions to compare (all compressed precisions if omitted)
+        aspect_weights: Query weighting (hybrid search defaults if omitted)
+        k: Result list length
+        num_queries: Number of sampled query movies
+        seed: Seed of the query sample
+
+    Returns:
+        One row per precision (float32 first) with resident matrix bytes, the share
+        of float32 memory, overlap@k with the float32 top-k before and after
+        rescoring, the largest rescored score difference, and p50/p99 latency in ms
+    """
+    # Imported here because the scoring engine itself depends on this module
+    from scoring_engine import AspectScoringEngine
+
+    if aspect_weights is None:
+        aspect_weights = {"overall": 0.4, "genre": 0.3, "plot": 0.2, "cast": 0.1}
+    precisions = precisions or PRECISIONS[1:]
+
+    reference = AspectScoringEngine(aspect_matrices)
+    rows = np.random.default_rng(seed).choice(reference.num_movies, min(num_queries, reference.num_movies),
+                                              replace=False)
+    weights = reference.weight_vector(aspect_weights)
+    truth = [reference.similar_to_row(row, k, aspect_weights) for row in rows]
+
+    report = []
+    for precision in ["float32"] + list(precisions):
+        engine = reference if precision == "float32" else AspectScoringEngine(aspect_matrices, precision=precision)
+
+        latencies, first_pass, rescored, score_error = [], [], [], []
+        for row, (true_ids, true_scores, _) in zip(rows, truth):
+            start_time = time.perf_counter()
+            ids, scores, _ = engine.similar_to_row(row, k, aspect_weights)
+            latencies.append((time.perf_counter() - start_time) * 1000)
+
+            approx_scores = engine.score(engine.row_vectors(row), weights)[0]
+            approx_scores[row] = -np.inf
+            approx_ids = np.argsort(-approx_scores, kind="stable")[:k]
+
+            first_pass.append(len(np.intersect1d(true_ids, approx_ids)) / max(len(true_ids), 1))
+            rescored.append(len(np.intersect1d(true_ids, ids)) / max(len(true_ids), 1))
+            score_error.append(float(np.abs(np.sort(scores) - np.sort(true_scores)).max()) if len(ids) else 0.0)
+
+        memory = engine.memory_bytes()
+        p50, p99 = np.percentile(latencies, [50, 99])
+        report.append({
+            "precision": precision,
+            "memory_bytes": int(memory),
+            "memory_ratio": memory / reference.memory_bytes(),
+            f"first_pass_overlap@{k}": float(np.mean(first_pass)),
+            f"rescored_overlap@{k}": float(np.mean(rescored)),
+            "max_score_error": float(np.max(score_error)),
+            "p50_ms": float(p50),
+            "p99_ms": float(p99)
+        })
+        logger.info(f"{precision}: {memory / 2**20:.1f} MiB, overlap@{k} "
+                    f"{np.mean(first_pass):.3f} first pass / {np.mean(rescored):.3f} rescored")
+
+    return report
@@ -0,0 +1,104 @@
+import numpy as np
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from collections import OrderedDict
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """Cache key form of a query: case-folded with collapsed whitespace."""
+    return " ".join(str(text).split()).casefold()
+
+
+class LRUCache:
+    """Thread-safe bounded least-recently-used cache with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for ``key`` (marking it most recently used), or None."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, capacity, hits, misses and hit rate."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+class QueryEmbeddingCache(LRUCache):
+    """LRU cache of query embeddings keyed by normalized query text."""
+
+    def __init__(self, encode_fn: Callable[[str], np.ndarray], maxsize: int = 1024):
+        """
+        Args:
+            encode_fn: Function turning a query string into an embedding
+            maxsize: Maximum number of cached queries
+        """
+        super().__init__(maxsize)
+        self.encode_fn = encode_fn
+
+    def encode(self, text: str) -> np.ndarray:
+        """Embedding of ``text``, encoded only on a cache miss."""
+        key = normalize_query(text)
+        embedding = self.get(key)
+        if embedding is None:
+            embedding = np.asarray(self.encode_fn(text), dtype=np.float32)
+            embedding.setflags(write=False)
+            self.put(key, embedding)
+        return embedding
+
+    def encode_many(self, texts: List[str]) -> np.ndarray:
+        """
+        ``(texts, dim)`` embeddings of several queries; all misses are encoded in one batched call.
+        """
+        keys = [normalize_query(text) for text in texts]
+        cached = [self.get(key) for key in keys]
+        missing = {key: text for key, text, embedding in zip(keys, texts, cached) if embedding is None}
+
+        if missing:
+            encoded = np.asarray(self.encode_fn(list(missing.values())), dtype=np.float32)
+            for key, embedding in zip(missing, encoded):
+                embedding.setflags(write=False)
+                self.put(key, embedding)
+                missing[key] = embedding
+
+        return np.stack([embedding if embedding is not None else missing[key]
+                         for key, embedding in zip(keys, cached)])
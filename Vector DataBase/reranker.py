@@ -0,0 +1,214 @@
+import numpy as np
+from typing import Any, Dict, Optional, Sequence, Tuple
+import hashlib
+import re
+import threading
+import time
+import logging
+
+from model_registry import get_cross_encoder
+from pipeline import CandidateSet, PipelineRequest, Stage
+from query_cache import LRUCache, normalize_query
+from scoring_engine import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+# Model name of the deterministic stand-in cross-encoder (tests, benchmarks)
+STUB_CROSS_ENCODER = "stub-cross-encoder"
+
+_TOKEN = re.compile(r"\w+")
+
+
+class StubCrossEncoder:
+    """
+    Deterministic stand-in for a CrossEncoder that needs no model download.
+
+    A (query, document) pair scores the share of the query's words found in the document.
+    """
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        scores = np.zeros(len(pairs), dtype=np.float32)
+        for i, (query, document) in enumerate(pairs):
+            query_tokens = set(_TOKEN.findall(query.lower()))
+            if query_tokens:
+                scores[i] = len(query_tokens & set(_TOKEN.findall(document.lower()))) / len(query_tokens)
+        return scores
+
+
+def load_cross_encoder(model_name: str) -> Any:
+    """Shared cross-encoder by model name or local path (STUB_CROSS_ENCODER for the stub)."""
+    if model_name == STUB_CROSS_ENCODER:
+        return StubCrossEncoder()
+    return get_cross_encoder(model_name)
+
+
+class AdaptiveTopN:
+    """
+    Number of candidates to re-rank, sized to keep re-ranking within a latency budget.
+
+    Tracks a moving average of the model's cost per scored pair and picks the
+    largest N (between ``min_n`` and ``max_n``) whose pairs fit the budget, so N
+    shrinks when the model slows down under load and grows back when it recovers.
+    Without a budget N stays at ``max_n``.
+    """
+
+    def __init__(self, max_n: int = 50, min_n: int = 10, budget_ms: Optional[float] = None, smoothing: float = 0.3):
+        self.max_n = max_n
+        self.min_n = min(min_n, max_n)
+        self.budget_ms = budget_ms
+        self.smoothing = smoothing
+        self.ms_per_pair: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def n(self) -> int:
+        ms_per_pair = self.ms_per_pair
+        if self.budget_ms is None or not ms_per_pair:
+            return self.max_n
+        return int(np.clip(self.budget_ms / ms_per_pair, self.min_n, self.max_n))
+
+    def observe(self, num_pairs: int, elapsed_ms: float) -> None:
+        """Record a forward pass over ``num_pairs`` pairs."""
+        if num_pairs <= 0:
+            return
+        cost = elapsed_ms / num_pairs
+        with self._lock:
+            if self.ms_per_pair is None:
+                self.ms_per_pair = cost
+            else:
+                self.ms_per_pair += self.smoothing * (cost - self.ms_per_pair)
+
+
+class CrossEncoderReRanker(Stage):
+    """
+    Re-ranks the top-N candidates of a text query with a CPU cross-encoder.
+
+    The query (``params["query"]``) is paired with each candidate's description,
+    and every pair missing from the score cache is scored in one batched forward
+    pass. Scores are cached per (query hash, document hash), so repeated queries
+    cost no model time; the key identifies a movie by its text rather than its
+    catalog row, so entries stay valid when the catalog changes. N adapts to
+    ``latency_budget_ms`` (see AdaptiveTopN) unless the request fixes it with
+    ``params["num_candidates"]``. Candidates are ordered by cross-encoder score
+    (ties keep their retrieval order) and get a ``rerank_score`` feature.
+    """
+
+    default_name = "cross_encoder"
+
+    def __init__(self, model_name: str,
+                 top_n: int = 50,
+                 min_n: int = 10,
+                 latency_budget_ms: Optional[float] = None,
+                 batch_size: int = 64,
+                 cache_size: int = 20000,
+                 document_column: str = "movie_description",
+                 **kwargs):
+        """
+        Args:
+            model_name: Cross-encoder model name, local model path or STUB_CROSS_ENCODER
+            top_n: Most candidates re-ranked per query
+            min_n: Fewest candidates re-ranked when shrinking N to meet the budget
+            latency_budget_ms: Target model time per query (None: always re-rank top_n)
+            batch_size: Forward pass batch size
+            cache_size: (query, movie) scores kept in the LRU cache
+            document_column: Catalog column paired with the query
+        """
+        super().__init__(**kwargs)
+        self.model_name = model_name
+        self.top_n = AdaptiveTopN(top_n, min_n, latency_budget_ms)
+        self.batch_size = batch_size
+        self.cache = LRUCache(maxsize=cache_size)
+        self.document_column = document_column
+        self._model = None
+        self._lock = threading.Lock()
+        self._stats = {"queries": 0, "scored_pairs": 0, "cached_pairs": 0, "model_ms": 0.0, "total_ms": 0.0}
+
+    @property
+    def model(self) -> Any:
+        """Cross-encoder, loaded on first use."""
+        if self._model is None:
+            self._model = load_cross_encoder(self.model_name)
+        return self._model
+
+    def query_key(self, query: str) -> str:
+        """Cache key of a query: a hash of the model and the normalized query text."""
+        return hashlib.blake2b(f"{self.model_name}\0{normalize_query(query)}".encode("utf-8"),
+                               digest_size=16).hexdigest()
+
+    @staticmethod
+    def document_key(document: str) -> bytes:
+        """Cache key of a movie: a hash of the text it is scored on."""
+        return hashlib.blake2b(document.encode("utf-8"), digest_size=16).digest()
+
+    def score(self, query: str, documents: Sequence[str]) -> np.ndarray:
+        """
+        Cross-encoder scores of a query against movies, from the cache where possible.
+
+        Args:
+            query: Query text
+            documents: Text of each movie
+
+        Returns:
+            float32 score per document
+        """
+        key = self.query_key(query)
+        document_keys = [self.document_key(document) for document in documents]
+        scores = np.empty(len(documents), dtype=np.float32)
+        missing = []
+        for i, document_key in enumerate(document_keys):
+            cached = self.cache.get((key, document_key))
+            if cached is None:
+                missing.append(i)
+            else:
+                scores[i] = cached
+
+        model_ms = 0.0
+        if missing:
+            start_time = time.perf_counter()
+            predicted = self.model.predict([(query, documents[i]) for i in missing], batch_size=self.batch_size,
+                                           show_progress_bar=False)
+            model_ms = (time.perf_counter() - start_time) * 1000
+            self.top_n.observe(len(missing), model_ms)
+            for i, value in zip(missing, np.asarray(predicted, dtype=np.float32).reshape(-1)):
+                scores[i] = value
+                self.cache.put((key, document_keys[i]), float(value))
+
+        with self._lock:
+            self._stats["queries"] += 1
+            self._stats["scored_pairs"] += len(missing)
+            self._stats["cached_pairs"] += len(documents) - len(missing)
+            self._stats["model_ms"] += model_ms
+        return scores
+
+    def run(self, state: Any, request: PipelineRequest, candidates: CandidateSet) -> None:
+        start_time = time.perf_counter()
+        n = request.params.get("num_candidates") or self.top_n.n
+        top = top_k_indices(candidates.scores, max(n, request.k))
+        top = top[np.isfinite(candidates.scores[top])]
+
+        rows = candidates.rows[top]
+        documents = state.df[self.document_column].to_numpy()[rows]
+        scores = self.score(request.params["query"], documents)
+        order = np.argsort(-scores, kind="stable")
+
+        rerank_scores = np.full(len(candidates), np.nan)
+        rerank_scores[top] = scores
+        candidates.features["rerank_score"] = rerank_scores
+        candidates.selected = top[order[:request.k]]
+        with self._lock:
+            self._stats["total_ms"] += (time.perf_counter() - start_time) * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        """Queries, scored and cached pairs, model and stage latency, current N and cache stats."""
+        with self._lock:
+            stats = dict(self._stats)
+        queries = max(stats["queries"], 1)
+        return {
+            "model": self.model_name,
+            **stats,
+            "mean_model_ms": stats["model_ms"] / queries,
+            "mean_ms": stats["total_ms"] / queries,
+            "top_n": self.top_n.n,
+            "ms_per_pair": self.top_n.ms_per_pair,
+            "cache": self.cache.stats()
+        }
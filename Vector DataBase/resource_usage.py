@@ -0,0 +1,62 @@
+from typing import Dict, Iterator
+from contextlib import contextmanager
+import os
+import sys
+import time
+import logging
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process (0 where unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far (0 where unavailable)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PhaseTimer:
+    """Records wall time and memory of named phases, e.g. the steps of a cold start."""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.phases: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block and log its duration, resident memory growth and peak memory."""
+        rss_before = rss_bytes()
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start_time
+            rss_after = rss_bytes()
+            self.phases[name] = {
+                "seconds": seconds,
+                "rss_mb": rss_after / 2**20,
+                "rss_delta_mb": (rss_after - rss_before) / 2**20,
+                "peak_rss_mb": peak_rss_bytes() / 2**20
+            }
+            logger.info(f"{self.label}{name}: {seconds:.2f}s, rss {rss_after / 2**20:.0f} MiB "
+                        f"({(rss_after - rss_before) / 2**20:+.0f} MiB), peak {peak_rss_bytes() / 2**20:.0f} MiB")
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(phase["seconds"] for phase in self.phases.values())
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Movie fields of every result, in output order
+RESULT_FIELDS = ["movie_id", "title", "year", "genre", "director", "stars",
+                 "imdb_rating", "votes", "overview", "gross", "runtime"]
+
+
+def _json_safe(value: Any) -> Any:
+    """``value`` with NaN and infinite floats, also in nested lists and dicts, replaced by None."""
+    if isinstance(value, float):
+        return value if np.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+class MovieResult:
+    """A single recommended movie: the shared movie fields plus named scores."""
+
+    __slots__ = ("movie_id", "title", "year", "genre", "director", "stars", "imdb_rating",
+                 "votes", "overview", "gross", "runtime", "scores", "aspect_scores")
+
+    def __init__(self, scores: Dict[str, float], aspect_scores: Optional[Dict[str, float]] = None, **fields):
+        for name in RESULT_FIELDS:
+            setattr(self, name, fields[name])
+        self.scores = scores
+        self.aspect_scores = aspect_scores
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {name: getattr(self, name) for name in RESULT_FIELDS}
+        record.update(self.scores)
+        if self.aspect_scores is not None:
+            record["aspect_scores"] = self.aspect_scores
+        return record
+
+
+class ResultSet:
+    """
+    A ranked result list stored column by column.
+
+    Every column is a plain Python list produced by one fancy-indexing pass over
+    the catalog columns, so hydrating a top-k never touches a pandas row.
+    Records are materialized only on access (``to_dicts``, iteration).
+    """
+
+    __slots__ = ("fields", "aspect_scores")
+
+    def __init__(self, fields: Dict[str, List[Any]], aspect_scores: Optional[List[Dict[str, float]]] = None):
+        """
+        Args:
+            fields: Mapping of field name (movie fields, then scores) to one value per result
+            aspect_scores: Optional per-aspect score breakdown of each result
+        """
+        self.fields = fields
+        self.aspect_scores = aspect_scores
+
+    def __len__(self) -> int:
+        return len(self.fields["movie_id"])
+
+    def __getitem__(self, i: int) -> MovieResult:
+        scores = {name: values[i] for name, values in self.fields.items() if name not in RESULT_FIELDS}
+        return MovieResult(scores, self.aspect_scores[i] if self.aspect_scores is not None else None,
+                           **{name: self.fields[name][i] for name in RESULT_FIELDS})
+
+    def __iter__(self) -> Iterator[MovieResult]:
+        return (self[i] for i in range(len(self)))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Results as plain dictionaries (the format of every public recommender method)."""
+        names = list(self.fields)
+        records = [dict(zip(names, values)) for values in zip(*self.fields.values())]
+        if self.aspect_scores is not None:
+            for record, aspect_scores in zip(records, self.aspect_scores):
+                record["aspect_scores"] = aspect_scores
+        return records
+
+    def to_json(self) -> str:
+        """Results as a JSON array; non-finite scores (e.g. of a skipped stage) become null."""
+        return json.dumps(_json_safe(self.to_dicts()), allow_nan=False)
+
+
+class ResultColumns:
+    """Precomputed per-movie result fields, hydrated for a whole top-k at once."""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        """
+        Args:
+            columns: Mapping of every name in RESULT_FIELDS to a per-movie array
+        """
+        self.columns = columns
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "ResultColumns":
+        """Build the result columns of a preprocessed catalog."""
+        stars = (df["Star1"].astype(str) + ", " + df["Star2"].astype(str) + ", " +
+                 df["Star3"].astype(str) + ", " + df["Star4"].astype(str))
+        columns = {
+            "movie_id": np.arange(len(df), dtype=np.int64),
+            "title": df["Series_Title"].astype(str),
+            "year": df["Released_Year"].astype(str),
+            "genre": df["Genre"].astype(str),
+            "director": df["Director"].astype(str),
+            "stars": stars,
+            "imdb_rating": df["IMDB_Rating"].astype(float),
+            "votes": df["No_of_Votes"].astype(int),
+            "overview": df["Overview"].astype(str),
+            "gross": df["Gross"].astype(str),
+            "runtime": df["Runtime"].astype(str)
+        }
+        return cls({name: np.asarray(column) for name, column in columns.items()})
+
+    def __len__(self) -> int:
+        return len(self.columns["movie_id"])
+
+    def hydrate(self, rows, aspect_scores: Optional[List[Dict[str, float]]] = None, **scores) -> ResultSet:
+        """
+        Result set of the given catalog rows.
+
+        Args:
+            rows: Catalog rows in rank order
+            aspect_scores: Optional per-aspect score breakdown of each row
+            **scores: Named score arrays aligned with ``rows`` (e.g. similarity_score)
+
+        Returns:
+            ResultSet with the movie fields of ``rows`` and the given scores
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        fields = {name: column[rows].tolist() for name, column in self.columns.items()}
+        for name, values in scores.items():
+            fields[name] = np.asarray(values, dtype=np.float64).tolist()
+        return ResultSet(fields, aspect_scores)
+
+    def records(self, rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Movie fields of the given rows (all rows if omitted) as dictionaries, e.g. vector DB metadata."""
+        return self.hydrate(np.arange(len(self)) if rows is None else rows).to_dicts()
@@ -0,0 +1,546 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+
+from quantization import PRECISIONS, QuantizedMatrix
+
+logger = logging.getLogger(__name__)
+
+# Aspects blended by hybrid search, in the order they are stacked in memory
+ENGINE_ASPECTS = ["overall", "genre", "plot", "cast"]
+
+
+def l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    """Return a float32 copy of ``matrix`` with unit-length rows."""
+    matrix = np.array(matrix, dtype=np.float32, copy=True)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    matrix /= norms
+    return matrix
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` highest scores, best first, using a single argpartition."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise top-k of a ``(queries, movies)`` score matrix, best first."""
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def subset_positions(candidate_rows: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Position of each row within sorted ``candidate_rows`` (-1 where it is not a candidate)."""
+    rows = np.asarray(rows, dtype=np.int64)
+    positions = np.searchsorted(candidate_rows, rows)
+    clipped = np.minimum(positions, max(len(candidate_rows) - 1, 0))
+    found = (positions < len(candidate_rows)) & (rows >= 0)
+    if len(candidate_rows):
+        found &= candidate_rows[clipped] == rows
+    return np.where(found, positions, -1)
+
+
+def mmr_rerank(relevance: np.ndarray, similarity: np.ndarray, k: int, mmr_lambda: float = 0.7) -> np.ndarray:
+    """
+    Maximal marginal relevance selection over a candidate pool.
+
+    Each step picks the candidate maximizing
+    ``mmr_lambda * relevance - (1 - mmr_lambda) * max similarity to the picks so far``;
+    the running max-similarity is updated with one row of the precomputed
+    pairwise matrix per pick, so selection costs O(k * candidates).
+
+    Args:
+        relevance: Relevance score per candidate
+        similarity: ``(candidates, candidates)`` pairwise similarity
+        k: Number of candidates to select
+        mmr_lambda: 1.0 ranks by relevance only, 0.0 by novelty only
+
+    Returns:
+        Selected candidate positions, in selection order
+    """
+    relevance = np.asarray(relevance, dtype=np.float64)
+    k = min(k, len(relevance))
+    max_similarity = np.zeros(len(relevance), dtype=np.float64)
+    available = np.ones(len(relevance), dtype=bool)
+    selected = np.empty(k, dtype=np.int64)
+
+    for i in range(k):
+        mmr = mmr_lambda * relevance - (1 - mmr_lambda) * max_similarity
+        mmr[~available] = -np.inf
+        pick = int(np.argmax(mmr))
+        selected[i] = pick
+        available[pick] = False
+        np.maximum(max_similarity, similarity[pick], out=max_similarity)
+
+    return selected
+
+
+class AspectScoringEngine:
+    """
+    Exact in-memory cosine scoring over several aspect embedding matrices.
+
+    All aspect matrices are L2-normalized and stacked into one contiguous
+    ``(aspects, movies, dim)`` float32 array so every aspect similarity for a
+    query is a single stacked matrix-vector product.
+
+    With a compressed precision ("float16" or "int8") only the quantized
+    matrices are held in memory. Full-catalog scoring runs on them, and the
+    best candidates of a ranking are rescored against the original float32
+    matrices (typically memory-mapped from the embedding store).
+    """
+
+    def __init__(self, aspect_matrices: Dict[str, np.ndarray],
+                 precision: str = "float32",
+                 rescore_size: int = 256):
+        """
+        Build the engine from per-aspect embedding matrices.
+
+        Args:
+            aspect_matrices: Mapping of aspect name to a ``(movies, dim)`` matrix
+            precision: "float32", "float16" or "int8" storage of the normalized matrices
+            rescore_size: Candidates rescored in float32 per ranking with a compressed precision
+        """
+        if not aspect_matrices:
+            raise ValueError("At least one aspect matrix is required")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+        self.aspects = list(aspect_matrices.keys())
+        self.aspect_positions = {aspect: i for i, aspect in enumerate(self.aspects)}
+        self.precision = precision
+        self.rescore_size = rescore_size
+
+        if precision == "float32":
+            self.matrices = np.ascontiguousarray(
+                l2_normalize(np.stack([np.asarray(m, dtype=np.float32) for m in aspect_matrices.values()]))
+            )
+            self.sources = None
+            self.compressed = None
+            self._shape = self.matrices.shape
+        else:
+            self.matrices = None
+            self.sources = list(aspect_matrices.values())
+            self.compressed = [QuantizedMatrix.quantize(l2_normalize(m), precision) for m in self.sources]
+            self._shape = (len(self.aspects),) + self.compressed[0].shape
+
+        logger.info(f"Scoring engine ready: {len(self.aspects)} aspects x "
+                    f"{self.num_movies} movies x {self.dim} dims ({precision}, "
+                    f"{self.memory_bytes() / 2**20:.1f} MiB)")
+
+    @property
+    def num_movies(self) -> int:
+        return self._shape[1]
+
+    @property
+    def dim(self) -> int:
+        return self._shape[2]
+
+    def memory_bytes(self) -> int:
+        """Bytes of the aspect matrices held in memory."""
+        if self.matrices is not None:
+            return self.matrices.nbytes
+        return sum(matrix.nbytes for matrix in self.compressed)
+
+    def aspect_vectors(self, position: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Exact normalized float32 vectors of one aspect (all movies if ``rows`` is omitted)."""
+        if self.matrices is not None:
+            return self.matrices[position] if rows is None else self.matrices[position, rows]
+        source = self.sources[position]
+        return l2_normalize(source if rows is None else source[rows])
+
+    def aspect_dot(self, position: int, vectors: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Similarity of movies to query vectors on one aspect, at the engine's precision.
+
+        Args:
+            position: Aspect position
+            vectors: Normalized ``(dim,)`` vector or ``(dim, queries)`` matrix
+            rows: Only score these row positions (all movies if omitted)
+
+        Returns:
+            ``(movies,)`` or ``(movies, queries)`` similarities
+        """
+        if self.matrices is not None:
+            matrix = self.matrices[position] if rows is None else self.matrices[position, rows]
+            return matrix @ vectors
+        return self.compressed[position].dot(vectors, rows)
+
+    def _exact_weighted(self, query_vectors: np.ndarray, candidates: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """
+        ``(aspects, candidates[, queries])`` float32 weighted similarities of selected movies.
+
+        Args:
+            query_vectors: Normalized ``(aspects, dim)`` or ``(aspects, dim, queries)`` query vectors
+        """
+        return np.stack([
+            (self.aspect_vectors(a, candidates) @ query_vectors[a]) * weights[a]
+            for a in range(len(self.aspects))
+        ])
+
+    def _exact_weighted_batch(self, query_vectors: np.ndarray, candidates: np.ndarray,
+                              weights: np.ndarray) -> np.ndarray:
+        """
+        ``(aspects, queries, candidates)`` float32 weighted similarities, one candidate list per query.
+
+        Args:
+            query_vectors: Normalized ``(queries, aspects, dim)`` query vectors
+            candidates: ``(queries, candidates)`` row positions
+        """
+        num_queries, num_candidates = candidates.shape
+        return np.stack([
+            np.einsum("qcd,qd->qc",
+                      self.aspect_vectors(a, candidates.ravel()).reshape(num_queries, num_candidates, -1),
+                      query_vectors[:, a]) * weights[a]
+            for a in range(len(self.aspects))
+        ])
+
+    def weight_vector(self, aspect_weights: Dict[str, float]) -> np.ndarray:
+        """Convert an aspect weight dict into a vector aligned with ``self.aspects``."""
+        weights = np.zeros(len(self.aspects), dtype=np.float32)
+        for aspect, weight in aspect_weights.items():
+            if aspect not in self.aspect_positions:
+                logger.warning(f"Unknown aspect '{aspect}' ignored by scoring engine")
+                continue
+            weights[self.aspect_positions[aspect]] = weight
+        return weights
+
+    def row_vectors(self, row: int) -> np.ndarray:
+        """Normalized ``(aspects, dim)`` query vectors of an indexed movie."""
+        return self.rows_vectors([row])[:, 0, :]
+
+    def rows_vectors(self, rows: Sequence[int]) -> np.ndarray:
+        """Normalized ``(aspects, rows, dim)`` vectors of several indexed movies."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if self.matrices is not None:
+            return self.matrices[:, rows, :]
+        return np.stack([self.aspect_vectors(a, rows) for a in range(len(self.aspects))])
+
+    def aspect_similarities(self, query_vectors: np.ndarray,
+                            candidate_rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine similarity of every movie to the query, per aspect.
+
+        Args:
+            query_vectors: Normalized ``(aspects, dim)`` query vectors
+            candidate_rows: Only score these row positions (all movies if omitted)
+
+        Returns:
+            ``(aspects, movies)`` similarity matrix
+        """
+        if self.matrices is not None:
+            matrices = self.matrices if candidate_rows is None else self.matrices[:, candidate_rows]
+            return np.matmul(matrices, query_vectors[:, :, None])[:, :, 0]
+        return np.stack([self.aspect_dot(a, query_vectors[a], candidate_rows) for a in range(len(self.aspects))])
+
+    def query_similarity(self, aspect: str, query_vector: np.ndarray,
+                         rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine similarity of a free query vector to movies on one aspect.
+
+        Args:
+            aspect: Aspect matrix to compare against
+            query_vector: Unnormalized ``(dim,)`` query embedding
+            rows: Only score these row positions (all movies if omitted)
+
+        Returns:
+            Similarity per scored movie
+        """
+        return self.aspect_dot(self.aspect_positions[aspect], l2_normalize(query_vector), rows)
+
+    def score(self, query_vectors: np.ndarray, weights: np.ndarray,
+              candidate_rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Blend aspect similarities with the given weights.
+
+        Returns:
+            Tuple of (blended scores per movie, weighted per-aspect scores), over
+            ``candidate_rows`` only when given
+        """
+        weighted = self.aspect_similarities(query_vectors, candidate_rows) * weights[:, None]
+        return weighted.sum(axis=0), weighted
+
+    def similar_to_row(self,
+                       row: int,
+                       k: int,
+                       aspect_weights: Dict[str, float],
+                       exclude: Optional[Sequence[int]] = None,
+                       candidate_rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Rank the catalog against an indexed movie.
+
+        Args:
+            row: Row position of the query movie (always excluded from results)
+            k: Number of results
+            aspect_weights: Weights per aspect
+            exclude: Additional row positions to leave out
+            candidate_rows: Sorted row positions to rank (all movies if omitted); no
+                other movie is scored
+
+        Returns:
+            Tuple of (row positions, blended scores, ``(aspects, k)`` weighted aspect scores)
+        """
+        weights = self.weight_vector(aspect_weights)
+        scores, weighted = self.score(self.row_vectors(row), weights, candidate_rows)
+
+        excluded = np.asarray([row] + (list(exclude) if exclude is not None else []), dtype=np.int64)
+        if candidate_rows is not None:
+            excluded = subset_positions(candidate_rows, excluded)
+            excluded = excluded[excluded >= 0]
+        scores[excluded] = -np.inf
+
+        if self.matrices is not None:
+            top = top_k_indices(scores, k)
+            top = top[np.isfinite(scores[top])]
+            return (top if candidate_rows is None else candidate_rows[top]), scores[top], weighted[:, top]
+
+        # First pass on compressed vectors, then rescore the best candidates in float32
+        candidates = top_k_indices(scores, max(k, self.rescore_size))
+        candidates = candidates[np.isfinite(scores[candidates])]
+        if candidate_rows is not None:
+            candidates = candidate_rows[candidates]
+        weighted = self._exact_weighted(self.row_vectors(row), candidates, weights)
+        rescored = weighted.sum(axis=0)
+        top = top_k_indices(rescored, k)
+        return candidates[top], rescored[top], weighted[:, top]
+
+    def score_batch(self, query_vectors: np.ndarray, aspect_weights: Dict[str, float],
+                    candidate_rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Blended scores of the whole catalog for a batch of queries, one matrix product per aspect.
+
+        Args:
+            query_vectors: Normalized ``(queries, aspects, dim)`` query vectors
+            aspect_weights: Weights per aspect
+            candidate_rows: Only score these row positions (all movies if omitted)
+
+        Returns:
+            ``(queries, movies)`` scores (at the engine's precision), one column per candidate row when given
+        """
+        weights = self.weight_vector(aspect_weights)
+        num_scored = self.num_movies if candidate_rows is None else len(candidate_rows)
+        scores = np.zeros((query_vectors.shape[0], num_scored), dtype=np.float32)
+        for a, weight in enumerate(weights):
+            if weight != 0:
+                scores += weight * self.aspect_dot(a, np.ascontiguousarray(query_vectors[:, a, :].T), candidate_rows).T
+        return scores
+
+    def search_batch(self, query_vectors: np.ndarray, k: int, aspect_weights: Dict[str, float],
+                     exclude_rows: Optional[np.ndarray] = None,
+                     candidate_rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k movies for a batch of queries.
+
+        Args:
+            query_vectors: Normalized ``(queries, aspects, dim)`` query vectors
+            k: Number of results per query
+            aspect_weights: Weights per aspect
+            exclude_rows: One row position per query to leave out of its results (-1 for none)
+            candidate_rows: Sorted row positions to rank (all movies if omitted); no
+                other movie is scored
+
+        Returns:
+            Tuple of ``(queries, k)`` row positions and blended scores, best first
+            (-inf scores mark missing results)
+        """
+        if candidate_rows is not None and len(candidate_rows) == 0:
+            return np.empty((len(query_vectors), 0), dtype=np.int64), np.empty((len(query_vectors), 0), dtype=np.float32)
+
+        scores = self.score_batch(query_vectors, aspect_weights, candidate_rows)
+        queries = np.arange(len(query_vectors))
+        if exclude_rows is not None:
+            exclude_rows = np.asarray(exclude_rows, dtype=np.int64)
+            if candidate_rows is not None:
+                exclude_rows = subset_positions(candidate_rows, exclude_rows)
+            scores[queries[exclude_rows >= 0], exclude_rows[exclude_rows >= 0]] = -np.inf
+
+        if self.matrices is not None:
+            top, top_scores = top_k_rows(scores, k)
+            return (top if candidate_rows is None else candidate_rows[top]), top_scores
+
+        # First pass on compressed vectors, then rescore the best candidates in float32
+        candidates, first_pass = top_k_rows(scores, max(k, self.rescore_size))
+        if candidate_rows is not None:
+            candidates = candidate_rows[candidates]
+        rescored = self._exact_weighted_batch(query_vectors, candidates, self.weight_vector(aspect_weights)).sum(axis=0)
+        rescored[~np.isfinite(first_pass)] = -np.inf
+        top, top_scores = top_k_rows(rescored, k)
+        return np.take_along_axis(candidates, top, axis=1), top_scores
+
+    def similar_to_rows(self, rows: Sequence[int], k: int,
+                        aspect_weights: Dict[str, float],
+                        candidate_rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Batched ``similar_to_row``: rank the catalog against several indexed movies at once.
+
+        Returns:
+            Tuple of ``(rows, k)`` row positions and blended scores, best first
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        return self.search_batch(self.rows_vectors(rows).transpose(1, 0, 2), k, aspect_weights,
+                                 exclude_rows=rows, candidate_rows=candidate_rows)
+
+    def weighted_scores_for(self, row: int, candidates: Sequence[int], aspect_weights: Dict[str, float]) -> np.ndarray:
+        """``(aspects, candidates)`` weighted aspect scores of selected movies against an indexed movie."""
+        candidates = np.asarray(candidates, dtype=np.int64)
+        return self._exact_weighted(self.row_vectors(row), candidates, self.weight_vector(aspect_weights))
+
+    def taste_vector(self, rows: Sequence[int], row_weights: Optional[Sequence[float]] = None) -> np.ndarray:
+        """
+        Weighted mean of indexed movies' aspect vectors, renormalized per aspect.
+
+        Returns:
+            ``(aspects, dim)`` query vectors usable with ``score``
+        """
+        vectors = self.rows_vectors(rows)
+        if row_weights is None:
+            row_weights = np.ones(vectors.shape[1], dtype=np.float32)
+        return l2_normalize(np.einsum("r,ard->ad", np.asarray(row_weights, dtype=np.float32), vectors))
+
+    def pairwise_similarity(self, rows: Sequence[int], aspect_weights: Dict[str, float]) -> np.ndarray:
+        """``(rows, rows)`` blended aspect similarity between indexed movies."""
+        weights = self.weight_vector(aspect_weights)
+        vectors = self.rows_vectors(rows)
+        similarity = np.zeros((vectors.shape[1], vectors.shape[1]), dtype=np.float32)
+        for a, weight in enumerate(weights):
+            if weight != 0:
+                similarity += weight * (vectors[a] @ vectors[a].T)
+        return similarity
+
+    def score_seeds(self,
+                    rows: Sequence[int],
+                    aspect_weights: Dict[str, float],
+                    aggregation: str = "max",
+                    seed_weights: Optional[Sequence[float]] = None,
+                    candidate_rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score the whole catalog against several indexed movies at once.
+
+        Args:
+            rows: Row positions of the seed movies
+            aspect_weights: Weights per aspect
+            aggregation: "max" keeps each movie's best seed, "mean" averages seeds
+            seed_weights: Relative seed importance for "mean" (uniform if omitted)
+            candidate_rows: Only score these row positions (all movies if omitted)
+
+        Returns:
+            Tuple of (aggregated scores per movie, ``(aspects, movies)`` weighted aspect scores),
+            one entry per candidate row when given
+        """
+        seed_weights = self._seed_weights(len(rows), aggregation, seed_weights)
+        weights = self.weight_vector(aspect_weights)
+
+        # (aspects, movies, dim) x (aspects, dim, seeds) -> (aspects, movies, seeds)
+        seeds = self.rows_vectors(rows).transpose(0, 2, 1)
+        if self.matrices is not None:
+            matrices = self.matrices if candidate_rows is None else self.matrices[:, candidate_rows]
+            weighted = np.matmul(matrices, seeds) * weights[:, None, None]
+        else:
+            weighted = np.stack([self.aspect_dot(a, seeds[a], candidate_rows) * weights[a]
+                                 for a in range(len(self.aspects))])
+        scores, weighted = self._aggregate_seeds(weighted, aggregation, seed_weights)
+
+        if self.matrices is None:
+            # Rescore the best candidates in float32
+            candidates = top_k_indices(scores, self.rescore_size)
+            exact = self._exact_weighted(seeds, candidates if candidate_rows is None else candidate_rows[candidates],
+                                         weights)
+            scores[candidates], weighted[:, candidates] = self._aggregate_seeds(exact, aggregation, seed_weights)
+
+        return scores, weighted
+
+    def score_seed_groups(self,
+                          groups: Sequence[Sequence[int]],
+                          aspect_weights: Dict[str, float],
+                          aggregation: str = "max",
+                          seed_weights: Optional[Sequence[Sequence[float]]] = None,
+                          candidate_rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Batched ``score_seeds`` for several seed groups (e.g. several users' histories).
+
+        All seeds of all groups are scored in one matrix product per aspect; memory
+        grows with ``total seeds x movies``, so callers should bound the batch.
+
+        Args:
+            groups: Seed row positions per group
+            aspect_weights: Weights per aspect
+            aggregation: "max" or "mean", as in ``score_seeds``
+            seed_weights: Relative seed importance per group for "mean"
+            candidate_rows: Only score these row positions (all movies if omitted)
+
+        Returns:
+            ``(groups, movies)`` aggregated scores, one column per candidate row when given
+        """
+        groups = [np.asarray(group, dtype=np.int64) for group in groups]
+        seed_vectors = self.rows_vectors(np.concatenate(groups)).transpose(1, 0, 2)
+        totals = self.score_batch(seed_vectors, aspect_weights, candidate_rows)
+        bounds = np.cumsum([0] + [len(group) for group in groups])
+
+        scores = np.empty((len(groups), totals.shape[1]), dtype=np.float32)
+        for i, group in enumerate(groups):
+            group_weights = self._seed_weights(len(group), aggregation, seed_weights[i] if seed_weights else None)
+            block = totals[bounds[i]:bounds[i + 1]]
+            scores[i] = block.max(axis=0) if aggregation == "max" else group_weights @ block
+
+            if self.matrices is None:
+                # Rescore the best candidates in float32
+                candidates = top_k_indices(scores[i], self.rescore_size)
+                scores[i, candidates] = self.seed_aspect_scores(
+                    group, candidates if candidate_rows is None else candidate_rows[candidates],
+                    aspect_weights, aggregation, group_weights
+                ).sum(axis=0)
+        return scores
+
+    def seed_aspect_scores(self,
+                           rows: Sequence[int],
+                           candidates: Sequence[int],
+                           aspect_weights: Dict[str, float],
+                           aggregation: str = "max",
+                           seed_weights: Optional[Sequence[float]] = None) -> np.ndarray:
+        """``(aspects, candidates)`` exact weighted aspect scores of selected movies, aggregated over seeds."""
+        seed_weights = self._seed_weights(len(rows), aggregation, seed_weights)
+        seeds = self.rows_vectors(rows).transpose(0, 2, 1)
+        exact = self._exact_weighted(seeds, np.asarray(candidates, dtype=np.int64), self.weight_vector(aspect_weights))
+        return self._aggregate_seeds(exact, aggregation, seed_weights)[1]
+
+    def query_aspect_scores(self, query_vectors: np.ndarray, candidates: Sequence[int],
+                            aspect_weights: Dict[str, float]) -> np.ndarray:
+        """``(aspects, candidates)`` exact weighted aspect scores of selected movies against free query vectors."""
+        return self._exact_weighted(query_vectors, np.asarray(candidates, dtype=np.int64),
+                                    self.weight_vector(aspect_weights))
+
+    @staticmethod
+    def _seed_weights(num_seeds: int, aggregation: str, seed_weights: Optional[Sequence[float]]) -> np.ndarray:
+        """Validate the aggregation and normalize seed weights (uniform if omitted)."""
+        if aggregation not in ("max", "mean"):
+            raise ValueError(f"Unknown seed aggregation '{aggregation}', expected 'max' or 'mean'")
+        if seed_weights is None:
+            seed_weights = np.ones(num_seeds, dtype=np.float32)
+        seed_weights = np.asarray(seed_weights, dtype=np.float32)
+        return seed_weights / seed_weights.sum()
+
+    @staticmethod
+    def _aggregate_seeds(weighted: np.ndarray, aggregation: str,
+                         seed_weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Collapse ``(aspects, movies, seeds)`` weighted scores over seeds."""
+        totals = weighted.sum(axis=0)
+        if aggregation == "max":
+            best_seed = totals.argmax(axis=1)
+            movies = np.arange(totals.shape[0])
+            return totals[movies, best_seed], weighted[:, movies, best_seed]
+        return totals @ seed_weights, weighted @ seed_weights
+
+    def aspect_score_dicts(self, weighted: np.ndarray, weights: np.ndarray) -> List[Dict[str, float]]:
+        """Turn an ``(aspects, k)`` weighted score block into per-result dicts of active aspects."""
+        active = [i for i in range(len(self.aspects)) if weights[i] != 0]
+        return [
+            {self.aspects[i]: float(weighted[i, j]) for i in active}
+            for j in range(weighted.shape[1])
+        ]
@@ -0,0 +1,160 @@
+import pandas as pd
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+import time
+import logging
+
+# Parquet needs pyarrow; without it the catalog is pickled
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "snapshot.json"
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """Content hash of a file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_signature(data_path: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Identity of a source file: its content hash, plus absolute path, size and mtime.
+
+    Args:
+        data_path: Source file
+        content_hash: Hash of the file's content if already known (computed otherwise)
+    """
+    stat = os.stat(data_path)
+    return {
+        "path": os.path.abspath(data_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content_hash": content_hash or file_hash(data_path)
+    }
+
+
+def source_matches(data_path: str, signature: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether a source file still has the content recorded in ``signature``.
+
+    Size and mtime are a cheap pre-check: a different size means changed
+    content and an unchanged mtime means unchanged content. Otherwise (e.g. the
+    file was rewritten with the same bytes by a checkout) the content is hashed.
+    """
+    if not signature or "content_hash" not in signature:
+        return False
+    stat = os.stat(data_path)
+    if stat.st_size != signature["size"]:
+        return False
+    if stat.st_mtime_ns == signature["mtime_ns"] and os.path.abspath(data_path) == signature["path"]:
+        return True
+    return file_hash(data_path) == signature["content_hash"]
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    """Hard link a file (instant, no extra disk), copying across file systems."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def write_snapshot(path: str, catalog: pd.DataFrame, components: Dict[str, str], info: Dict[str, Any]) -> None:
+    """
+    Write a cold-start snapshot directory.
+
+    The preprocessed catalog is stored as Parquet (pickle without pyarrow) and
+    every component directory (embedding store, indexes) is hard linked in, so a
+    snapshot costs almost no extra disk. Component files are always replaced,
+    never rewritten in place, so later updates never leak into a snapshot. The
+    snapshot is built next to ``path`` and swapped in at the end.
+
+    Args:
+        path: Snapshot directory
+        catalog: Preprocessed catalog DataFrame
+        components: Mapping of component name to the directory to include
+        info: Extra manifest fields (source signature, model name, ...)
+    """
+    start_time = time.time()
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    catalog_file = "catalog.parquet" if HAS_PYARROW else "catalog.pkl"
+    if HAS_PYARROW:
+        catalog.to_parquet(os.path.join(tmp_path, catalog_file))
+    else:
+        catalog.to_pickle(os.path.join(tmp_path, catalog_file))
+
+    for name, component_path in components.items():
+        shutil.copytree(component_path, os.path.join(tmp_path, name), copy_function=_link_or_copy)
+
+    manifest = {**info, "catalog": catalog_file, "components": list(components), "created_at": time.time()}
+    with open(os.path.join(tmp_path, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    logger.info(f"Wrote snapshot to {path} in {time.time() - start_time:.2f}s")
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """Manifest of a snapshot, or None if there is no complete snapshot at ``path``."""
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def read_catalog(path: str, manifest: Dict[str, Any]) -> pd.DataFrame:
+    catalog_path = os.path.join(path, manifest["catalog"])
+    if catalog_path.endswith(".parquet"):
+        return pd.read_parquet(catalog_path)
+    return pd.read_pickle(catalog_path)
+
+
+def component_path(path: str, manifest: Dict[str, Any], name: str) -> Optional[str]:
+    """Directory of a component inside the snapshot, if it was included."""
+    return os.path.join(path, name) if name in manifest["components"] else None
+
+
+def open_snapshot(path: str, expected: Dict[str, Any],
+                  source_path: Optional[str] = None) -> Optional[Tuple[Dict[str, Any], pd.DataFrame]]:
+    """
+    Open a snapshot if it matches the expected manifest fields and source file.
+
+    Args:
+        path: Snapshot directory
+        expected: Manifest fields that must match (e.g. model name)
+        source_path: File the snapshot was built from, which must still have the
+            content recorded in the manifest's ``source`` signature
+
+    Returns:
+        Tuple of (manifest, catalog), or None if missing or stale
+    """
+    manifest = read_manifest(path)
+    if manifest is None:
+        return None
+    stale = [key for key, value in expected.items() if manifest.get(key) != value]
+    if source_path is not None and not source_matches(source_path, manifest.get("source")):
+        stale.append("source")
+    if stale:
+        logger.info(f"Snapshot at {path} is stale ({', '.join(stale)} changed)")
+        return None
+    return manifest, read_catalog(path, manifest)
@@ -0,0 +1,72 @@
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+# The recommender modules are flat scripts next to this directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scoring_engine import ENGINE_ASPECTS  # noqa: E402
+
+
+def random_aspect_matrices(num_movies: int = 200, dim: int = 16, seed: int = 0):
+    """Random (unnormalized) embedding matrix per engine aspect."""
+    rng = np.random.default_rng(seed)
+    return {aspect: rng.normal(size=(num_movies, dim)).astype(np.float32) for aspect in ENGINE_ASPECTS}
+
+
+@pytest.fixture
+def aspect_matrices():
+    return random_aspect_matrices()
+
+
+class HashingModel:
+    """Offline stand-in for a SentenceTransformer: a text embeds as the sum of its hashed words' vectors."""
+
+    def __init__(self, dimension: int = 32, num_buckets: int = 4096):
+        self.dimension = dimension
+        self.num_buckets = num_buckets
+        self.token_vectors = np.random.default_rng(0).normal(size=(num_buckets, dimension)).astype(np.float32)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def embed(self, text: str) -> np.ndarray:
+        buckets = [zlib.crc32(word.encode()) % self.num_buckets for word in text.lower().split()]
+        return self.token_vectors[buckets or [len(text) % self.num_buckets]].sum(axis=0)
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+        single = isinstance(texts, str)
+        embeddings = np.zeros((0 if single else len(texts), self.dimension), dtype=np.float32)
+        if single or len(texts):
+            embeddings = np.stack([self.embed(text) for text in ([texts] if single else texts)])
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+
+HASHING_MODEL = "test-hashing-model"
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data", "imdb_top_1000.csv")
+
+
+@pytest.fixture
+def make_recommender(tmp_path):
+    """Factory of MovieRecommenders over the first 150 catalog movies, with every store under ``tmp_path``."""
+    pytest.importorskip("chromadb")
+    import pandas as pd
+    from model_registry import register_model
+    from movie_recommender import MovieRecommender
+
+    register_model(HASHING_MODEL, HashingModel())
+    data_path = tmp_path / "catalog.csv"
+    if not data_path.exists():
+        pd.read_csv(DATA_PATH).head(150).to_csv(data_path, index=False)
+
+    def make(**params):
+        paths = {name: str(tmp_path / name) for name in
+                 ("db_path", "embedding_store_path", "neighbor_table_path", "ann_index_path")}
+        return MovieRecommender(data_path=str(data_path), embedding_model=HASHING_MODEL, encode_processes=1,
+                                profile_store_path=str(tmp_path / "profiles.db"), **{**paths, **params})
+    return make
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from ann_index import AspectAnnIndex, resolve_backend
+from scoring_engine import ENGINE_ASPECTS, AspectScoringEngine
+
+MIXED_WEIGHTS = {"overall": 0.4, "genre": 0.3, "plot": 0.2, "cast": 0.1}
+
+
+@pytest.fixture
+def engine(aspect_matrices):
+    return AspectScoringEngine(aspect_matrices)
+
+
+def queries(engine, rows):
+    return np.stack([engine.row_vectors(row) for row in rows])
+
+
+def reference_search(matrices, rows, k, aspect_weights):
+    """Top-k movies by brute-force blended cosine similarity to each query row."""
+    normalized = {aspect: matrix / np.linalg.norm(matrix, axis=1, keepdims=True) for aspect, matrix in matrices.items()}
+    scores = sum(weight * normalized[aspect][rows] @ normalized[aspect].T for aspect, weight in aspect_weights.items())
+    ids = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return ids, np.take_along_axis(scores, ids, axis=1)
+
+
+def test_full_rescoring_matches_exact_search(engine, aspect_matrices):
+    # Retrieving every movie by "overall" and rescoring them is exact for any weighting
+    index = AspectAnnIndex(engine, "exact", rescore_factor=engine.num_movies)
+    ids, scores = index.search(queries(engine, [0, 5, 42]), MIXED_WEIGHTS, 10)
+    expected_ids, expected_scores = reference_search(aspect_matrices, [0, 5, 42], 10, MIXED_WEIGHTS)
+    assert ids.tolist() == expected_ids.tolist()
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+
+
+@pytest.mark.parametrize("aspects, weights", [(None, {"overall": 1.0}), (ENGINE_ASPECTS, MIXED_WEIGHTS)])
+def test_indexed_weightings_need_no_rescoring(engine, aspect_matrices, aspects, weights):
+    index = AspectAnnIndex(engine, "exact", aspects=aspects, rescore_factor=1)
+    assert index.is_exact_for(weights)
+    ids, _ = index.search(queries(engine, [3, 7]), weights, 5, exclude=[3])
+    expected_ids, _ = reference_search(aspect_matrices, [3, 7], 6, weights)
+    assert ids.tolist() == [[row for row in expected if row != 3][:5] for expected in expected_ids.tolist()]
+
+
+def test_default_index_holds_overall_only(engine):
+    index = AspectAnnIndex(engine, "exact")
+    assert index.aspects == ["overall"]
+    assert index.index.vectors.shape == (engine.num_movies, engine.dim)
+    assert not index.is_exact_for(MIXED_WEIGHTS)
+
+
+def test_save_load_and_matches(engine, tmp_path):
+    index = AspectAnnIndex(engine, "exact", rescore_factor=8)
+    index.save(str(tmp_path), data_hash="abc")
+    assert AspectAnnIndex.load(str(tmp_path), engine, data_hash="other") is None
+
+    assert AspectAnnIndex.load(str(tmp_path), engine, data_hash="abc", rescore_factor=2).rescore_factor == 2
+    loaded = AspectAnnIndex.load(str(tmp_path), engine, data_hash="abc")
+    assert loaded.rescore_factor == 8
+    assert loaded.matches("exact")
+    assert loaded.matches("exact", rescore_factor=16)
+    assert not loaded.matches("hnsw")
+    assert not loaded.matches("exact", aspects=ENGINE_ASPECTS)
+    batch = queries(engine, [1])
+    assert loaded.search(batch, MIXED_WEIGHTS, 5)[0].tolist() == index.search(batch, MIXED_WEIGHTS, 5)[0].tolist()
+
+
+def test_resolve_backend_uses_exact_search_for_small_catalogs():
+    assert resolve_backend("auto", 1000) == "exact"
+    assert resolve_backend("exact", 10 ** 7) == "exact"
+    with pytest.raises(ValueError):
+        resolve_backend("annoy", 1000)
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from attribute_index import AttributeIndex, popcount
+from filters import MovieFilter
+
+GENRES = ["Drama", "Crime", "Comedy", "Action", "Romance"]
+
+
+@pytest.fixture(scope="module")
+def df():
+    rng = np.random.default_rng(9)
+    num_movies = 300
+    return pd.DataFrame({
+        "Series_Title": [f"Movie {i}" for i in range(num_movies)],
+        "Genre": [", ".join(rng.choice(GENRES, size=rng.integers(1, 4), replace=False)) for _ in range(num_movies)],
+        "IMDB_Rating": np.round(rng.uniform(7.5, 9.3, num_movies), 1),
+        "Released_Year": rng.integers(1950, 2021, num_movies),
+        "No_of_Votes": rng.integers(25_000, 2_000_000, num_movies),
+        "Runtime": [f"{minutes} min" for minutes in rng.integers(80, 200, num_movies)],
+        "Director": [f"Director {i}" for i in rng.integers(0, 20, num_movies)],
+        **{f"Star{j}": [f"Actor {i}" for i in rng.integers(0, 40, num_movies)] for j in range(1, 5)}
+    })
+
+
+@pytest.fixture(scope="module")
+def index(df):
+    return AttributeIndex.from_dataframe(df)
+
+
+def test_popcount():
+    bits = np.array([0, 1, 0b1011, 2 ** 63, 2 ** 64 - 1], dtype=np.uint64)
+    assert popcount(bits).tolist() == [bin(int(b)).count("1") for b in bits]
+
+
+def test_filter_matches_row_by_row_checks(df, index):
+    genre_sets = df["Genre"].str.split(", ").map(set)
+    runtimes = df["Runtime"].str.split().str[0].astype(int)
+    stars = df[["Star1", "Star2", "Star3", "Star4"]]
+
+    cases = [
+        ({"genres_any": ["Crime", "Romance"]}, genre_sets.map(lambda g: bool(g & {"Crime", "Romance"}))),
+        ({"genres_all": ["Drama", "Action"]}, genre_sets.map(lambda g: {"Drama", "Action"} <= g)),
+        ({"genres_all": ["Drama", "Western"]}, pd.Series(False, index=df.index)),
+        ({"min_rating": 8.0, "max_year": 1999}, (df["IMDB_Rating"] >= 8.0) & (df["Released_Year"] <= 1999)),
+        ({"min_votes": 500_000, "max_votes": 1_500_000}, df["No_of_Votes"].between(500_000, 1_500_000)),
+        ({"min_runtime": 120, "max_runtime": 150}, runtimes.between(120, 150)),
+        ({"directors": ["Director 3", "Director 7"]}, df["Director"].isin(["Director 3", "Director 7"])),
+        ({"actors": ["Actor 1"]}, (stars == "Actor 1").any(axis=1)),
+    ]
+    for conditions, expected in cases:
+        np.testing.assert_array_equal(index.filter(**conditions), expected.to_numpy(), err_msg=str(conditions))
+
+
+def test_genre_overlap(df, index):
+    expected = df["Genre"].str.split(", ").map(lambda g: len(set(g) & {"Drama", "Comedy", "Horror"}))
+    assert index.genre_overlap(["Drama", "Comedy", "Horror"]).tolist() == expected.tolist()
+
+
+def test_movie_filter_mask(index):
+    movie_filter = MovieFilter.coerce({"genres_any": ["Drama"], "min_rating": 8.2, "max_runtime": 140})
+    np.testing.assert_array_equal(
+        movie_filter.mask(index), index.filter(genres_any=["Drama"], min_rating=8.2, max_runtime=140)
+    )
+    assert MovieFilter.coerce({"genres_any": None}) is None
+    with pytest.raises(ValueError):
+        MovieFilter.coerce({"min_budget": 10})
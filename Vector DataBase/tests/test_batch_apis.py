@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+
+def assert_same_results(batch, single, score):
+    assert len(batch) == len(single)
+    for batch_results, single_results in zip(batch, single):
+        assert [movie["title"] for movie in batch_results] == [movie["title"] for movie in single_results]
+        np.testing.assert_allclose([movie[score] for movie in batch_results],
+                                   [movie[score] for movie in single_results], atol=1e-5)
+
+
+@pytest.fixture
+def recommender(make_recommender):
+    return make_recommender(index_backend="exact")
+
+
+def test_similar_movies_batch_matches_single_calls(recommender):
+    titles = recommender.df["Series_Title"].tolist()[:20] + ["Not A Movie"]
+    batch = list(recommender.get_similar_movies_batch(titles, 5, batch_size=8))
+    assert_same_results(batch, [recommender.get_similar_movies(title, 5) for title in titles], "similarity_score")
+    assert batch[-1] == []
+
+
+def test_text_query_batch_matches_single_calls(recommender):
+    queries = ["mafia family crime", "space adventure", "love story in paris", "Mafia  family crime"]
+    assert_same_results(list(recommender.get_recommendations_by_text_query_batch(queries, 5, batch_size=3)),
+                        [recommender.get_recommendations_by_text_query(query, 5) for query in queries],
+                        "relevance_score")
+
+
+def test_genre_mix_batch_matches_single_calls(recommender):
+    genre_lists = [["Crime", "Drama"], ["Sci-Fi"], ["Comedy", "Romance", "Drama"]]
+    assert_same_results(list(recommender.recommend_by_genre_mix_batch(genre_lists, 5)),
+                        [recommender.recommend_by_genre_mix(genres, 5) for genres in genre_lists],
+                        "combined_score")
+
+
+@pytest.mark.parametrize("seed_aggregation", ["max", "mean", "taste"])
+def test_personalized_batch_matches_single_calls(recommender, seed_aggregation):
+    titles = recommender.df["Series_Title"].to_numpy()
+    rng = np.random.default_rng(0)
+    profiles = [recommender.build_user_profile(f"user-{i}", list(rng.choice(titles, 10))) for i in range(6)] + [{}]
+    assert_same_results(
+        list(recommender.get_personalized_recommendations_batch(profiles, 5, seed_aggregation=seed_aggregation,
+                                                                batch_size=4)),
+        [recommender.get_personalized_recommendations(profile, 5, seed_aggregation=seed_aggregation)
+         for profile in profiles],
+        "combined_score"
+    )
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from chroma_sync import HASH_KEY, content_hashes, metadata_hashes, sync_collection
+
+
+class FakeCollection:
+    """In-memory stand-in for a ChromaDB collection, recording the ids written and deleted."""
+
+    def __init__(self):
+        self.rows = {}
+        self.upserted = []
+        self.deleted = []
+
+    def get(self, include, limit, offset):
+        ids = sorted(self.rows)[offset:offset + limit]
+        return {"ids": ids, "metadatas": [self.rows[row_id][1] for row_id in ids]}
+
+    def upsert(self, ids, embeddings, metadatas):
+        assert len(ids) == len(embeddings) == len(metadatas)
+        self.upserted.extend(ids)
+        for row_id, embedding, metadata in zip(ids, embeddings, metadatas):
+            self.rows[row_id] = (embedding, metadata)
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+        for row_id in ids:
+            del self.rows[row_id]
+
+
+def catalog(num_rows, model_name="model-a"):
+    ids = [f"movie_{i}" for i in range(num_rows)]
+    metadatas = [{"title": f"Movie {i}", "year": 1990 + i} for i in range(num_rows)]
+    text_hashes = np.array([f"text-{i}".encode() for i in range(num_rows)], dtype="S16")
+    hashes = content_hashes(text_hashes, metadata_hashes(metadatas), model_name)
+    embeddings = np.random.default_rng(num_rows).normal(size=(num_rows, 4)).astype(np.float32)
+    return ids, hashes, embeddings, metadatas
+
+
+@pytest.mark.parametrize("batch_size", [3, 100])
+def test_sync_upserts_and_deletes_only_differences(batch_size):
+    collection = FakeCollection()
+    ids, hashes, embeddings, metadatas = catalog(10)
+    assert sync_collection(collection, ids, hashes, embeddings, metadatas, batch_size) == \
+        {"upserted": 10, "deleted": 0, "unchanged": 0}
+    assert sorted(collection.upserted) == sorted(ids)
+    assert collection.rows["movie_4"][1] == {**metadatas[4], HASH_KEY: hashes[4]}
+
+    # Running again is a no-op
+    collection.upserted.clear()
+    assert sync_collection(collection, ids, hashes, embeddings, metadatas, batch_size) == \
+        {"upserted": 0, "deleted": 0, "unchanged": 10}
+    assert collection.upserted == [] and collection.deleted == []
+
+    # Change one row, drop two and add one
+    new_ids, new_hashes, new_embeddings, new_metadatas = catalog(11)
+    new_metadatas[2] = {**new_metadatas[2], "title": "Renamed"}
+    new_hashes[2] = content_hashes(np.array([b"text-2"], dtype="S16"), metadata_hashes([new_metadatas[2]]),
+                                   "model-a")[0]
+    keep = [i for i in range(11) if i not in (5, 7)]
+    new_ids = [new_ids[i] for i in keep]
+    new_hashes = [new_hashes[i] for i in keep]
+    new_metadatas = [new_metadatas[i] for i in keep]
+    new_embeddings = new_embeddings[keep]
+
+    assert sync_collection(collection, new_ids, new_hashes, new_embeddings, new_metadatas, batch_size) == \
+        {"upserted": 2, "deleted": 2, "unchanged": 7}
+    assert sorted(collection.upserted) == ["movie_10", "movie_2"]
+    assert sorted(collection.deleted) == ["movie_5", "movie_7"]
+    assert sorted(collection.rows) == sorted(new_ids)
+    assert collection.rows["movie_2"][1]["title"] == "Renamed"
+
+
+def test_sync_rewrites_rows_without_hash_and_after_model_change():
+    collection = FakeCollection()
+    ids, hashes, embeddings, metadatas = catalog(4)
+    collection.upsert(ids, embeddings.tolist(), metadatas)
+    collection.upserted.clear()
+    assert sync_collection(collection, ids, hashes, embeddings, metadatas)["upserted"] == 4
+
+    _, other_hashes, _, _ = catalog(4, model_name="model-b")
+    assert sync_collection(collection, ids, other_hashes, embeddings, metadatas)["upserted"] == 4
@@ -0,0 +1,34 @@
+import numpy as np
+
+from embedding_pipeline import encode_texts, length_buckets, token_lengths
+
+
+class LengthModel:
+    """Model without a tokenizer whose embedding of a text is its length and first character code."""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.batches.append(list(texts))
+        return np.array([[len(text), ord(text[0])] for text in texts], dtype=np.float32)
+
+
+def test_length_buckets_group_similar_lengths():
+    lengths = np.array([5, 1, 9, 3, 7, 2])
+    buckets = length_buckets(lengths, 3)
+    assert [lengths[bucket].tolist() for bucket in buckets] == [[1, 2], [3, 5], [7, 9]]
+    assert length_buckets(lengths, 10)[0].tolist() == [1]
+
+
+def test_encode_texts_keeps_input_order():
+    texts = ["a" * n + chr(ord("b") + n) for n in (7, 0, 3, 12, 5, 1, 9)]
+    model = LengthModel()
+    embeddings = encode_texts(model, texts, processes=1, num_buckets=3)
+
+    np.testing.assert_array_equal(embeddings, [[len(text), ord(text[0])] for text in texts])
+    assert token_lengths(model, texts).tolist() == [len(text) for text in texts]
+    # Each bucket is one encode call over texts of similar length
+    assert sorted(len(text) for batch in model.batches for text in batch) == sorted(len(text) for text in texts)
+    assert all(max(map(len, batch)) <= min(map(len, later)) for batch, later in zip(model.batches, model.batches[1:]))
+    assert encode_texts(model, [], processes=1).shape == (0, 0)
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+
+from hot_reload import CatalogWatcher, ServingState, on_serving_state, state_attribute
+
+
+class Owner:
+    df = state_attribute("df")
+
+    def __init__(self):
+        self._state = ServingState()
+        self._local = threading.local()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def swap(self, df):
+        state = ServingState(self._state.version + 1)
+        state.df = df
+        self._state = state
+
+    @on_serving_state
+    def read_twice(self):
+        first = self.df
+        self.entered.set()
+        self.release.wait(5)
+        return first, self.df
+
+    @on_serving_state
+    def iterate(self):
+        for _ in range(2):
+            yield self.df
+
+
+def test_call_keeps_its_state_across_a_swap():
+    owner = Owner()
+    owner.swap("old")
+    results = []
+    thread = threading.Thread(target=lambda: results.append(owner.read_twice()))
+    thread.start()
+    assert owner.entered.wait(5)
+    owner.swap("new")
+    owner.release.set()
+    thread.join(5)
+
+    assert results == [("old", "old")]
+    assert owner.df == "new"
+
+
+def test_generator_keeps_its_state_until_exhausted():
+    owner = Owner()
+    owner.swap("old")
+    iterator = owner.iterate()
+    assert next(iterator) == "old"
+    owner.swap("new")
+    assert list(iterator) == ["old"]
+    assert list(owner.iterate()) == ["new", "new"]
+
+
+def test_watcher_ignores_touch_and_reports_content_change(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text("title\nHeat\n")
+    watcher = CatalogWatcher(str(path), on_change=lambda: None)
+
+    os.utime(path, ns=(1, 1))
+    assert watcher.check() is None
+    assert watcher.check() is None
+
+    path.write_text("title\nRonin\n")
+    os.utime(path, ns=(2, 2))
+    assert watcher.check() is None  # not settled yet
+    content_hash = watcher.check()
+    assert content_hash is not None
+    # Still pending until acknowledged
+    assert watcher.check() == content_hash
+    watcher.acknowledge(content_hash)
+    assert watcher.check() is None
+
+
+def test_watcher_retries_failed_reload(tmp_path):
+    path = tmp_path / "catalog.csv"
+    path.write_text("title\nHeat\n")
+    calls = []
+
+    def on_change():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RuntimeError("reload failed")
+
+    watcher = CatalogWatcher(str(path), on_change=on_change, interval=0.01)
+    path.write_text("title\nRonin\n")
+    os.utime(path, ns=(2, 2))
+    watcher.start()
+    try:
+        deadline = time.monotonic() + 5
+        while len(calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+    finally:
+        watcher.stop(5)
+
+    # The failed reload is retried once, then the change is recorded as loaded
+    assert calls == [0, 1]
+    assert watcher.check() is None
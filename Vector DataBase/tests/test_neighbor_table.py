@@ -0,0 +1,71 @@
+import hashlib
+
+import numpy as np
+
+from conftest import random_aspect_matrices
+from neighbor_table import NeighborTable
+from scoring_engine import ENGINE_ASPECTS, AspectScoringEngine
+
+PRESETS = {"balanced": {"overall": 0.4, "genre": 0.3, "plot": 0.2, "cast": 0.1},
+           "plot": {"plot": 1.0}}
+
+
+def row_hashes(matrices):
+    return np.array([[hashlib.md5(vector.tobytes()).hexdigest() for vector in matrices[aspect]]
+                     for aspect in ENGINE_ASPECTS], dtype="S32")
+
+
+def build(path, matrices):
+    engine = AspectScoringEngine(matrices)
+    return NeighborTable.build(str(path), engine, "v1", row_hashes(matrices), PRESETS,
+                               n_neighbors=10, block_size=64)
+
+
+def assert_same_table(table, expected):
+    for preset in PRESETS:
+        ids, scores = table.arrays[preset]
+        expected_ids, expected_scores = expected.arrays[preset]
+        np.testing.assert_array_equal(ids, expected_ids)
+        np.testing.assert_allclose(np.asarray(scores, dtype=np.float32),
+                                   np.asarray(expected_scores, dtype=np.float32), atol=1e-3)
+
+
+def test_update_matches_full_build(tmp_path):
+    matrices = random_aspect_matrices(num_movies=300, seed=3)
+    table = build(tmp_path / "incremental", matrices)
+
+    # Change a few movies and append new ones
+    new_matrices = random_aspect_matrices(num_movies=320, seed=4)
+    for aspect in ENGINE_ASPECTS:
+        unchanged = np.setdiff1d(np.arange(300), [5, 42, 250])
+        new_matrices[aspect][unchanged] = matrices[aspect][unchanged]
+
+    engine = AspectScoringEngine(new_matrices)
+    updated = table.update(engine, "v2", row_hashes(new_matrices), block_size=64)
+    assert updated.is_current("v2")
+    assert_same_table(updated, build(tmp_path / "full", new_matrices))
+    assert_same_table(NeighborTable.open(str(tmp_path / "incremental")), updated)
+
+
+def test_update_without_changes_keeps_table(tmp_path):
+    matrices = random_aspect_matrices(num_movies=100, seed=5)
+    table = build(tmp_path / "table", matrices)
+    updated = table.update(AspectScoringEngine(matrices), "v2", row_hashes(matrices))
+    assert_same_table(updated, table)
+
+
+def test_update_rebuilds_when_catalog_shrinks(tmp_path):
+    table = build(tmp_path / "incremental", random_aspect_matrices(num_movies=100, seed=6))
+    smaller = random_aspect_matrices(num_movies=80, seed=7)
+    updated = table.update(AspectScoringEngine(smaller), "v2", row_hashes(smaller))
+    assert updated.arrays["plot"][0].shape == (80, 10)
+    assert_same_table(updated, build(tmp_path / "full", smaller))
+
+
+def test_neighbors_excludes_rows(tmp_path):
+    table = build(tmp_path / "table", random_aspect_matrices(num_movies=50, seed=8))
+    ids, _ = table.neighbors("balanced", 0, 5)
+    filtered, scores = table.neighbors("balanced", 0, 5, exclude=ids[:2])
+    assert filtered.tolist() == table.neighbors("balanced", 0, 7)[0][2:].tolist()
+    assert scores.dtype == np.float32 and np.all(np.diff(scores) <= 0)
+    assert table.preset_for({"plot": 1.0, "cast": 0.0}) == "plot"
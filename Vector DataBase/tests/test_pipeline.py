@@ -0,0 +1,92 @@
+import time
+
+import numpy as np
+import pytest
+
+from pipeline import (CandidateGenerator, CandidateSet, FeatureStage, Pipeline, PipelineRequest,
+                      PrecomputedCandidates, PrecomputedFeature, Stage, WeightedScorer)
+
+
+class SlowFeature(FeatureStage):
+    default_name = "slow"
+
+    def compute(self, state, request, candidates):
+        time.sleep(0.02)
+        return {"slow": np.ones(len(candidates))}
+
+
+def test_candidate_set_merges_in_first_seen_order():
+    candidates = CandidateSet()
+    candidates.add(np.array([5, 2, 9]), {"similarity": np.array([0.5, 0.2, 0.9])})
+    candidates.add(np.array([7, 2, 5]), {"similarity": np.array([0.7, 0.4, 0.1]), "genre": np.array([1.0, 2.0, 3.0])})
+
+    assert candidates.rows.tolist() == [5, 2, 9, 7]
+    np.testing.assert_array_equal(candidates.features["similarity"], [0.5, 0.4, 0.9, 0.7])
+    np.testing.assert_array_equal(candidates.features["genre"], [3.0, 2.0, np.nan, 1.0])
+
+
+def scores_pipeline(**kwargs):
+    return Pipeline(
+        "test",
+        [PrecomputedCandidates(name="first", param="first"), PrecomputedCandidates(name="second", param="second")],
+        [SlowFeature(), PrecomputedFeature("boost")],
+        WeightedScorer({"similarity": 1.0, "boost": 0.5}),
+        **kwargs
+    )
+
+
+def scores_request(k=3):
+    first = np.array([0.9, np.nan, 0.3, np.nan, 0.5, np.nan])
+    second = np.array([np.nan, 0.8, 0.1, np.nan, 0.6, np.nan])
+    boost = np.array([0.0, 0.0, 2.0, 0.0, 0.0, 0.0])
+    return PipelineRequest(k, first=first, second=second, boost=boost, exclude=[4])
+
+
+def test_pipeline_scores_and_ranks_merged_candidates():
+    result = scores_pipeline().run(None, scores_request())
+    assert result.rows.tolist() == [2, 0, 1]
+    np.testing.assert_allclose(result.scores, [1.3, 0.9, 0.8])
+    assert result.terminated_by is None and result.skipped == []
+
+
+def test_stage_over_budget_terminates_early():
+    pipeline = scores_pipeline().with_budgets({"slow": 1.0})
+    result = pipeline.run(None, scores_request())
+    assert result.terminated_by == "slow"
+    assert result.skipped == ["boost", "top_k"]
+    # The scorer still runs (without the skipped feature) and the best candidates are returned
+    assert result.rows.tolist() == [0, 1, 2]
+    assert np.isnan(result.feature("boost")).all()
+    assert pipeline.stats()["slow"]["terminations"] == 1
+    # Budgets are set on a copy
+    assert scores_pipeline().run(None, scores_request()).terminated_by is None
+
+
+def test_total_budget_terminates_early():
+    result = scores_pipeline(total_budget_ms=1.0).run(None, scores_request())
+    assert result.terminated_by == "slow"
+
+
+def test_stages_must_implement_their_hooks():
+    class Incomplete(CandidateGenerator):
+        pass
+
+    with pytest.raises(TypeError):
+        Stage()
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert SlowFeature().name == "slow"
+
+
+def test_search_backend_picks_exact_candidate_source(make_recommender):
+    def generator_types(recommender, name):
+        return [type(generator).__name__ for generator in recommender.pipelines[name].generators[0].generators]
+
+    engine = make_recommender()
+    assert generator_types(engine, "text") == ["AnnCandidates", "EngineCandidates"]
+    chroma = make_recommender(search_backend="chroma")
+    assert generator_types(chroma, "similar") == ["NeighborTableCandidates", "AnnCandidates",
+                                                  "ChromaCandidates", "EngineCandidates"]
+    assert chroma.get_similar_movies(chroma.df["Series_Title"].iloc[0], 5)
+    with pytest.raises(ValueError):
+        make_recommender(search_backend="pinecone")
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from profile_store import ProfileStore, apply_event, apply_rating, empty_aggregates, profile_from_aggregates
+
+CATALOG = {
+    f"Movie {i}": {
+        "genres": [["Drama", "Crime", "Comedy"][i % 3]],
+        "actors": [f"Actor {i % 4}", f"Actor {i % 5}"],
+        "directors": [f"Director {i % 2}"],
+        "decade": 1980 + 10 * (i % 4),
+        "imdb_rating": 5.0 + i % 5,
+        "vector": np.random.default_rng(i).normal(size=(4, 8)).astype(np.float32)
+    }
+    for i in range(20)
+}
+
+EVENTS = [("alice", f"Movie {i % 20}", None if i % 3 else float(i % 10)) for i in range(0, 90, 7)] + \
+         [("bob", f"Movie {i % 20}", 8.0) for i in range(5)] + \
+         [("alice", "Unknown Movie", 9.0)]
+
+
+def featurize(titles):
+    return [CATALOG.get(title) for title in titles]
+
+
+def replay(user_id, events):
+    aggregates = empty_aggregates()
+    for event_user, title, rating in events:
+        movie = CATALOG.get(title)
+        if event_user == user_id and movie is not None:
+            apply_event(aggregates, title, (rating if rating is not None else movie["imdb_rating"]) / 10.0, movie)
+    return aggregates
+
+
+def assert_same_aggregates(aggregates, expected):
+    for key in ("genres", "actors", "directors", "decades"):
+        assert aggregates[key].keys() == expected[key].keys()
+        for name, weight in expected[key].items():
+            assert aggregates[key][name] == pytest.approx(weight)
+    assert aggregates["recent_watches"] == expected["recent_watches"]
+    assert aggregates["num_events"] == expected["num_events"]
+    assert aggregates["taste_weight"] == pytest.approx(expected["taste_weight"])
+    np.testing.assert_allclose(aggregates["taste_sum"], expected["taste_sum"], rtol=1e-5)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.db"), featurize, compact_threshold=1000)
+    yield store
+    store.close()
+
+
+def test_compaction_matches_full_replay(store):
+    half = len(EVENTS) // 2
+    store.record_events(EVENTS[:half])
+    assert store.compact() == half
+    assert store.stats() == {"users": len({user_id for user_id, _, _ in EVENTS[:half]}), "pending_events": 0}
+
+    # Events after the snapshot are folded on read, then by the next compaction
+    store.record_events(EVENTS[half:])
+    for user_id in ("alice", "bob"):
+        assert_same_aggregates(store.aggregates(user_id), replay(user_id, EVENTS))
+    store.compact()
+    for user_id in ("alice", "bob"):
+        assert_same_aggregates(store.aggregates(user_id), replay(user_id, EVENTS))
+    assert store.stats()["pending_events"] == 0
+
+
+def test_read_compacts_past_threshold(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.db"), featurize, compact_threshold=3)
+    try:
+        for user_id, title, rating in EVENTS:
+            store.record_event(user_id, title, rating)
+        assert_same_aggregates(store.aggregates("alice"), replay("alice", EVENTS))
+        assert store.stats()["pending_events"] == sum(1 for user_id, _, _ in EVENTS if user_id == "bob")
+    finally:
+        store.close()
+
+
+def test_profile_matches_replayed_profile(store):
+    store.record_events(EVENTS)
+    assert store.profile("nobody") is None
+    profile = store.profile("alice")
+    expected = profile_from_aggregates("alice", replay("alice", EVENTS))
+    for key in ("recent_watches", "liked_genres", "favorite_actors", "preferred_decades"):
+        assert profile[key] == expected[key]
+    np.testing.assert_allclose(profile["taste_vector"], expected["taste_vector"], rtol=1e-5)
+
+
+def test_rating_replaces_watch_weight(store):
+    store.record_event("carol", "Movie 1", 4.0)
+    store.record_event("carol", "Movie 2")
+    store.record_rating("carol", "Movie 1", 9.0)
+    store.record_rating("carol", "Movie 3", 7.0)
+
+    # The rating re-weights the earlier watch instead of counting it twice
+    expected = replay("carol", [("carol", "Movie 1", 9.0), ("carol", "Movie 2", None), ("carol", "Movie 3", 7.0)])
+    aggregates = store.aggregates("carol")
+    assert aggregates["recent_watches"] == ["Movie 3", "Movie 2", "Movie 1"]
+    assert aggregates["num_events"] == 3
+    for key in ("genres", "actors", "directors", "decades"):
+        for name, weight in expected[key].items():
+            assert aggregates[key][name] == pytest.approx(weight)
+    assert aggregates["taste_weight"] == pytest.approx(expected["taste_weight"])
+    np.testing.assert_allclose(aggregates["taste_sum"], expected["taste_sum"], rtol=1e-5, atol=1e-6)
+
+    # Compaction keeps the per-title weights, so later ratings still replace them
+    store.compact()
+    store.record_rating("carol", "Movie 2", 2.0)
+    aggregates = store.aggregates("carol")
+    assert aggregates["title_weights"]["Movie 2"] == pytest.approx(0.2)
+    assert aggregates["num_events"] == 3
+
+
+def test_apply_rating_of_unwatched_title_counts_as_watch():
+    rated, watched = empty_aggregates(), empty_aggregates()
+    apply_rating(rated, "Movie 4", 0.6, CATALOG["Movie 4"])
+    apply_event(watched, "Movie 4", 0.6, CATALOG["Movie 4"])
+    assert_same_aggregates(rated, watched)
@@ -0,0 +1,51 @@
+import numpy as np
+
+from query_cache import LRUCache, QueryEmbeddingCache, normalize_query
+
+
+class CountingEncoder:
+    """Encoder recording every call, with one deterministic vector per normalized text."""
+
+    def __init__(self):
+        self.calls = []
+
+    def vector(self, text):
+        return np.random.default_rng(sum(normalize_query(text).encode())).normal(size=4).astype(np.float32)
+
+    def __call__(self, texts):
+        self.calls.append(texts)
+        if isinstance(texts, str):
+            return self.vector(texts)
+        return np.stack([self.vector(text) for text in texts])
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_query_cache_encodes_each_normalized_query_once():
+    encoder = CountingEncoder()
+    cache = QueryEmbeddingCache(encoder, maxsize=8)
+    first = cache.encode("Space  Adventure")
+    assert cache.encode("space adventure") is first
+    assert not first.flags.writeable
+    assert encoder.calls == ["Space  Adventure"]
+
+
+def test_encode_many_batches_only_the_misses():
+    encoder = CountingEncoder()
+    cache = QueryEmbeddingCache(encoder, maxsize=8)
+    cache.encode("heist")
+    embeddings = cache.encode_many(["Heist", "romance", "war", "ROMANCE"])
+    # One batched call for the two distinct uncached queries
+    assert [[normalize_query(text) for text in call] for call in encoder.calls[1:]] == [["romance", "war"]]
+    np.testing.assert_array_equal(embeddings[0], cache.encode("heist"))
+    np.testing.assert_array_equal(embeddings[1], embeddings[3])
+    assert embeddings.shape == (4, 4)
@@ -0,0 +1,69 @@
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import CandidateSet, PipelineRequest
+
+# The model registry behind the reranker imports chromadb's embedding function types
+pytest.importorskip("chromadb")
+from reranker import STUB_CROSS_ENCODER, AdaptiveTopN, CrossEncoderReRanker  # noqa: E402
+
+DOCUMENTS = ["a heist crew in los angeles", "a space crew finds a creature", "a mafia family saga",
+             "a heist gone wrong", "a love story in paris", "robbers plan one last heist"]
+
+
+def test_score_cache_is_keyed_by_query_and_document():
+    reranker = CrossEncoderReRanker(STUB_CROSS_ENCODER)
+    first = reranker.score("Heist crew", DOCUMENTS[:4])
+    assert reranker.stats()["scored_pairs"] == 4
+
+    # Same documents at other positions (e.g. rows after a catalog change) and the same normalized query hit the cache
+    again = reranker.score("heist  CREW", DOCUMENTS[3::-1])
+    np.testing.assert_array_equal(again, first[::-1])
+    assert reranker.stats()["scored_pairs"] == 4
+    assert reranker.stats()["cached_pairs"] == 4
+
+    reranker.score("heist crew", DOCUMENTS)
+    assert reranker.stats()["scored_pairs"] == 6
+    reranker.score("space creature", DOCUMENTS[:1])
+    assert reranker.stats()["scored_pairs"] == 7
+
+
+def test_adaptive_top_n_shrinks_and_recovers():
+    top_n = AdaptiveTopN(max_n=50, min_n=10, budget_ms=20.0, smoothing=1.0)
+    assert top_n.n == 50
+    top_n.observe(50, 50.0)  # 1 ms per pair
+    assert top_n.n == 20
+    top_n.observe(20, 200.0)  # 10 ms per pair: clipped to min_n
+    assert top_n.n == 10
+    top_n.observe(10, 1.0)
+    assert top_n.n == 50
+    assert AdaptiveTopN(max_n=30).n == 30
+
+
+def test_run_reorders_top_candidates():
+    reranker = CrossEncoderReRanker(STUB_CROSS_ENCODER, top_n=4, min_n=1)
+    state = types.SimpleNamespace(df=pd.DataFrame({"movie_description": DOCUMENTS}))
+    candidates = CandidateSet()
+    candidates.add(np.arange(6), {"similarity": np.linspace(1.0, 0.5, 6)})
+    candidates.scores = candidates.features["similarity"]
+
+    reranker.run(state, PipelineRequest(2, query="heist gone wrong"), candidates)
+    assert candidates.rows[candidates.selected].tolist() == [3, 0]
+    # Only the top-N were scored; the last heist is past them
+    assert np.isnan(candidates.features["rerank_score"][4:]).all()
+    assert reranker.stats()["scored_pairs"] == 4
+
+
+def test_skipped_reranker_leaves_no_rerank_score(make_recommender):
+    recommender = make_recommender(rerank_model=STUB_CROSS_ENCODER)
+    reranked = recommender.get_recommendations_by_text_query("mafia family crime", 5, rerank=True)
+    assert all(np.isfinite(movie["rerank_score"]) for movie in reranked)
+
+    # A zero budget terminates the pipeline after candidate generation, before the cross-encoder
+    skipped = make_recommender(rerank_model=STUB_CROSS_ENCODER, pipeline_budgets={"text_rerank": {"candidates": 0.0}})
+    results = skipped.get_recommendations_by_text_query("mafia family crime", 5, rerank=True)
+    assert len(results) == 5
+    assert all("rerank_score" not in movie for movie in results)
@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from results import RESULT_FIELDS, ResultColumns
+
+
+def catalog():
+    return pd.DataFrame({
+        "Series_Title": ["Heat", "Ronin", "Alien"],
+        "Released_Year": [1995, 1998, 1979],
+        "Genre": ["Crime, Drama", "Action", "Horror, Sci-Fi"],
+        "Director": ["Michael Mann", "John Frankenheimer", "Ridley Scott"],
+        "Star1": ["Al Pacino", "Robert De Niro", "Sigourney Weaver"],
+        "Star2": ["Robert De Niro", "Jean Reno", "Tom Skerritt"],
+        "Star3": ["Val Kilmer", "Natascha McElhone", "John Hurt"],
+        "Star4": ["Jon Voight", "Stellan Skarsgard", "Veronica Cartwright"],
+        "IMDB_Rating": [8.3, 7.2, 8.5],
+        "No_of_Votes": [577113, 197096, 787806],
+        "Overview": ["A heist.", "A chase.", "A creature."],
+        "Gross": ["67,436,818", "41,610,884", "78,900,000"],
+        "Runtime": ["170 min", "122 min", "117 min"]
+    })
+
+
+def test_hydrate_selects_rows_in_rank_order():
+    columns = ResultColumns.from_dataframe(catalog())
+    results = columns.hydrate([2, 0], similarity_score=np.array([0.9, 0.5], dtype=np.float32),
+                              aspect_scores=[{"overall": 0.9}, {"overall": 0.5}])
+
+    records = results.to_dicts()
+    assert [record["title"] for record in records] == ["Alien", "Heat"]
+    assert list(records[0])[:len(RESULT_FIELDS)] == RESULT_FIELDS
+    assert records[1]["stars"] == "Al Pacino, Robert De Niro, Val Kilmer, Jon Voight"
+    assert records[0]["movie_id"] == 2 and records[0]["year"] == "1979"
+    assert records[0]["aspect_scores"] == {"overall": 0.9}
+    # Plain Python values, as the dictionaries are returned to API callers
+    assert type(records[0]["similarity_score"]) is float and type(records[0]["votes"]) is int
+    assert records[0]["similarity_score"] == float(np.float32(0.9))
+
+
+def test_result_objects_match_dicts():
+    results = ResultColumns.from_dataframe(catalog()).hydrate([1, 2], combined_score=[0.7, 0.6])
+    assert len(results) == 2
+    assert [movie.to_dict() for movie in results] == results.to_dicts()
+    assert results[0].scores == {"combined_score": 0.7}
+    assert results[1].title == "Alien"
+
+
+def test_records_cover_the_whole_catalog():
+    columns = ResultColumns.from_dataframe(catalog())
+    assert len(columns) == 3
+    assert [record["title"] for record in columns.records()] == ["Heat", "Ronin", "Alien"]
+    assert columns.records(np.array([1]))[0]["director"] == "John Frankenheimer"
+
+
+def test_to_json_writes_non_finite_scores_as_null():
+    results = ResultColumns.from_dataframe(catalog()).hydrate([0, 1], relevance_score=[0.8, 0.4],
+                                                              rerank_score=[1.5, np.nan],
+                                                              aspect_scores=[{"overall": np.inf}, {"overall": 0.4}])
+    records = json.loads(results.to_json())
+    assert records[0]["rerank_score"] == 1.5 and records[1]["rerank_score"] is None
+    assert records[0]["aspect_scores"] == {"overall": None}
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from conftest import random_aspect_matrices
+from scoring_engine import AspectScoringEngine, mmr_rerank, subset_positions, top_k_indices
+
+WEIGHTS = {"overall": 0.4, "genre": 0.3, "plot": 0.2, "cast": 0.1}
+
+
+def cosine(a, b):
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def reference_similar(matrices, row, k, aspect_weights, candidates=None):
+    """The per-movie loop hybrid search used before the engine: blended cosine of every other movie."""
+    num_movies = len(next(iter(matrices.values())))
+    scores = []
+    for movie in (candidates if candidates is not None else range(num_movies)):
+        if movie == row:
+            continue
+        score = sum(weight * cosine(matrices[aspect][row], matrices[aspect][movie])
+                    for aspect, weight in aspect_weights.items())
+        scores.append((movie, score))
+    scores.sort(key=lambda item: item[1], reverse=True)
+    return scores[:k]
+
+
+def test_top_k_indices_matches_full_sort():
+    scores = np.random.default_rng(1).normal(size=500)
+    assert top_k_indices(scores, 10).tolist() == np.argsort(-scores)[:10].tolist()
+    assert top_k_indices(scores, 1000).tolist() == np.argsort(-scores).tolist()
+    assert len(top_k_indices(scores, 0)) == 0
+
+
+def test_similar_to_row_matches_per_row_loop(aspect_matrices):
+    engine = AspectScoringEngine(aspect_matrices)
+    for row in (0, 17, 199):
+        rows, scores, weighted = engine.similar_to_row(row, 10, WEIGHTS)
+        expected = reference_similar(aspect_matrices, row, 10, WEIGHTS)
+        assert rows.tolist() == [movie for movie, _ in expected]
+        np.testing.assert_allclose(scores, [score for _, score in expected], atol=1e-5)
+        np.testing.assert_allclose(weighted.sum(axis=0), scores, atol=1e-5)
+
+
+def test_similar_to_row_ranks_candidate_rows_only(aspect_matrices):
+    engine = AspectScoringEngine(aspect_matrices)
+    candidates = np.arange(0, 200, 3)
+    rows, scores, _ = engine.similar_to_row(9, 5, WEIGHTS, exclude=[12], candidate_rows=candidates)
+    expected = reference_similar(aspect_matrices, 9, 5, WEIGHTS, [c for c in candidates if c != 12])
+    assert rows.tolist() == [movie for movie, _ in expected]
+    np.testing.assert_allclose(scores, [score for _, score in expected], atol=1e-5)
+
+
+def test_search_batch_matches_single_queries(aspect_matrices):
+    engine = AspectScoringEngine(aspect_matrices)
+    queries = engine.rows_vectors([3, 50, 120]).transpose(1, 0, 2)
+    ids, scores = engine.search_batch(queries, 7, WEIGHTS)
+    for query, query_ids, query_scores in zip(queries, ids, scores):
+        blended, _ = engine.score(query, engine.weight_vector(WEIGHTS))
+        assert query_ids.tolist() == top_k_indices(blended, 7).tolist()
+        np.testing.assert_allclose(query_scores, blended[query_ids], atol=1e-5)
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_compressed_precision_rescores_exactly(precision):
+    matrices = random_aspect_matrices(num_movies=1000, dim=32, seed=2)
+    exact = AspectScoringEngine(matrices)
+    compressed = AspectScoringEngine(matrices, precision=precision)
+    recall = []
+    for row in range(0, 1000, 100):
+        exact_rows, _, _ = exact.similar_to_row(row, 10, WEIGHTS)
+        rows, scores, _ = compressed.similar_to_row(row, 10, WEIGHTS)
+        # Returned scores are float32 rescores, whatever the storage precision
+        np.testing.assert_allclose(scores, exact.weighted_scores_for(row, rows, WEIGHTS).sum(axis=0), atol=1e-5)
+        recall.append(len(set(rows) & set(exact_rows)) / 10)
+    assert np.mean(recall) >= 0.95
+
+
+def test_subset_positions():
+    candidates = np.array([2, 5, 9])
+    assert subset_positions(candidates, [5, 3, 9, -1]).tolist() == [1, -1, 2, -1]
+    assert subset_positions(np.empty(0, dtype=np.int64), [1]).tolist() == [-1]
+
+
+def test_mmr_rerank_orders_by_relevance_without_diversity():
+    relevance = np.array([0.2, 0.9, 0.5, 0.7])
+    similarity = np.eye(4)
+    assert mmr_rerank(relevance, similarity, 4, mmr_lambda=1.0).tolist() == [1, 3, 2, 0]
+
+
+def test_mmr_rerank_skips_near_duplicates():
+    relevance = np.array([1.0, 0.99, 0.5])
+    # Candidate 1 duplicates candidate 0; candidate 2 is unrelated to both
+    similarity = np.array([[1.0, 1.0, 0.0],
+                           [1.0, 1.0, 0.0],
+                           [0.0, 0.0, 1.0]])
+    assert mmr_rerank(relevance, similarity, 2, mmr_lambda=0.5).tolist() == [0, 2]
@@ -0,0 +1,56 @@
+import os
+
+import pandas as pd
+
+import snapshot
+
+
+def write_source(tmp_path, text):
+    path = tmp_path / "catalog.csv"
+    path.write_text(text)
+    return str(path)
+
+
+def test_snapshot_round_trip_and_staleness(tmp_path):
+    source_path = write_source(tmp_path, "title\nHeat\n")
+    component = tmp_path / "store"
+    component.mkdir()
+    (component / "data.bin").write_bytes(b"\x00\x01")
+    catalog = pd.DataFrame({"title": ["Heat"], "rating": [8.3]})
+    path = str(tmp_path / "snapshot")
+
+    snapshot.write_snapshot(path, catalog, {"store": str(component)},
+                            {"source": snapshot.source_signature(source_path), "model_name": "m"})
+    manifest, restored = snapshot.open_snapshot(path, {"model_name": "m"}, source_path)
+    pd.testing.assert_frame_equal(restored, catalog)
+    with open(os.path.join(snapshot.component_path(path, manifest, "store"), "data.bin"), "rb") as f:
+        assert f.read() == b"\x00\x01"
+    assert snapshot.component_path(path, manifest, "missing") is None
+
+    # A different configuration or source content makes it stale; rewriting the same bytes does not
+    assert snapshot.open_snapshot(path, {"model_name": "other"}, source_path) is None
+    os.utime(source_path, ns=(1, 1))
+    assert snapshot.open_snapshot(path, {"model_name": "m"}, source_path) is not None
+    write_source(tmp_path, "title\nRonin\n")
+    assert snapshot.open_snapshot(path, {"model_name": "m"}, source_path) is None
+    assert snapshot.open_snapshot(str(tmp_path / "nowhere"), {}) is None
+
+
+def test_recommender_restores_matching_snapshot_only(make_recommender, tmp_path):
+    snapshot_path = str(tmp_path / "snapshot")
+    built = make_recommender(index_backend="exact", snapshot_path=snapshot_path)
+    assert "write snapshot" in built.startup.phases
+
+    restored = make_recommender(index_backend="exact", snapshot_path=snapshot_path)
+    assert "read snapshot" in restored.startup.phases
+    assert "load catalog" not in restored.startup.phases
+    title = built.df["Series_Title"].iloc[3]
+    assert restored.get_similar_movies(title, 5) == built.get_similar_movies(title, 5)
+
+    # A snapshot of another index configuration is rebuilt rather than restored
+    rebuilt = make_recommender(index_backend="hnsw", snapshot_path=snapshot_path)
+    assert "load catalog" in rebuilt.startup.phases
+    assert rebuilt.ann_index.backend == "hnsw"
+    exact = make_recommender(index_backend="exact", snapshot_path=snapshot_path)
+    assert "load catalog" in exact.startup.phases
+    assert exact.ann_index is None